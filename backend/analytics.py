@@ -0,0 +1,150 @@
+"""Сложность вопросов по журналу ответов (answers.AnswerLog).
+
+Всё считается векторно в numpy за проход по массивам событий:
+- точность — bincount по номеру вопроса с весами «верно»;
+- медиана времени ответа — одна сортировка ключей (вопрос << 32 | биты
+  float32 времени): внутри вопроса время идёт по возрастанию, медиана
+  берётся по смещениям групп;
+- индекс дискриминации — доля верных ответов у 27% сильнейших игроков
+  минус доля у 27% слабейших (по точности игрока на всех его ответах).
+  Около нуля или ниже — вопрос не отличает знающих от угадывающих.
+"""
+import time
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Доля игроков в верхней и нижней группах индекса дискриминации
+GROUP = 0.27
+# Игрок с меньшим числом ответов не попадает в группы
+MIN_PLAYER_ANSWERS = 5
+# Сглаживание точности к средней: столько «виртуальных» ответов
+PRIOR_ANSWERS = 4.0
+
+
+class QuestionAnalytics:
+    """Массивы по номеру вопроса из AnswerLog; NaN — данных нет."""
+
+    def __init__(self, answers, correct, accuracy, expected, median_seconds, discrimination,
+                 events: int, players: int, total: int, elapsed: float):
+        self.answers = answers
+        self.correct = correct
+        self.accuracy = accuracy
+        self.expected = expected
+        self.median_seconds = median_seconds
+        self.discrimination = discrimination
+        self.events = events
+        self.players = players
+        # AnswerLog.total на момент снимка: по нему видно, устарел ли расчёт
+        self.total = total
+        self.elapsed = elapsed
+        self.mean_accuracy = float(correct.sum() / answers.sum()) if events else 0.5
+        self.computed_at = time.time()
+
+    def expected_accuracy(self, qid: Optional[int]) -> float:
+        """Ожидаемая доля верных ответов; для неизвестного вопроса — средняя."""
+        if qid is None or qid >= len(self.expected):
+            return self.mean_accuracy
+        return float(self.expected[qid])
+
+    def row(self, qid: int, info) -> dict:
+        def number(value, digits):
+            return None if np.isnan(value) else round(float(value), digits)
+
+        question_id, bank, text = info[qid]
+        return {
+            "id": question_id,
+            "bank": bank,
+            "question": text,
+            "answers": int(self.answers[qid]),
+            "accuracy": number(self.accuracy[qid], 3),
+            "median_seconds": number(self.median_seconds[qid], 2),
+            "discrimination": number(self.discrimination[qid], 3),
+        }
+
+    def summary(self, info, limit: int = 20, min_answers: int = 5) -> dict:
+        """Отчёт: самые трудные, самые лёгкие и хуже всех различающие вопросы."""
+        eligible = np.flatnonzero(self.answers >= min_answers)
+
+        def ranked(values, reverse=False) -> List[dict]:
+            candidates = eligible[~np.isnan(values[eligible])]
+            order = np.argsort(values[candidates], kind="stable")
+            if reverse:
+                order = order[::-1]
+            return [self.row(int(qid), info) for qid in candidates[order[:limit]]]
+
+        return {
+            "events": self.events,
+            "players": self.players,
+            "questions": int(np.count_nonzero(self.answers)),
+            "eligible": int(len(eligible)),
+            "accuracy": round(self.mean_accuracy, 3),
+            "computed_at": self.computed_at,
+            "compute_ms": round(self.elapsed * 1000, 3),
+            "hardest": ranked(self.accuracy),
+            "easiest": ranked(self.accuracy, reverse=True),
+            "least_discriminating": ranked(self.discrimination),
+        }
+
+
+def _rates(questions, correct, size: int):
+    answers = np.bincount(questions, minlength=size)
+    hits = np.bincount(questions, weights=correct, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return answers, hits, hits / answers
+
+
+def compute(columns, n_questions: int, total: int = 0) -> QuestionAnalytics:
+    """Статистика по колонкам AnswerLog.snapshot(); n_questions — число известных вопросов."""
+    if np is None:
+        raise RuntimeError("numpy is required for analytics")
+    start = time.perf_counter()
+    questions_raw, players_raw, correct_raw, seconds_raw = columns
+    questions = np.frombuffer(questions_raw, dtype=np.uint32).astype(np.intp)
+    players = np.frombuffer(players_raw, dtype=np.uint32).astype(np.intp)
+    correct = np.frombuffer(correct_raw, dtype=np.uint8).astype(np.float64)
+    seconds = np.frombuffer(seconds_raw, dtype=np.float32)
+    size = max(n_questions, int(questions.max()) + 1 if len(questions) else 0)
+
+    answers, hits, accuracy = _rates(questions, correct, size)
+    mean = hits.sum() / answers.sum() if len(questions) else 0.5
+    expected = (hits + PRIOR_ANSWERS * mean) / (answers + PRIOR_ANSWERS)
+
+    # Медиана: неотрицательные float32 упорядочены так же, как их биты
+    keys = (questions.astype(np.uint64) << np.uint64(32)) | seconds.view(np.uint32).astype(np.uint64)
+    keys.sort()
+    ordered = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32).view(np.float32)
+    median = np.full(size, np.nan)
+    present = np.flatnonzero(answers)
+    if len(present):
+        starts = np.concatenate(([0], np.cumsum(answers)[:-1]))[present]
+        counts = answers[present]
+        low = ordered[starts + (counts - 1) // 2].astype(np.float64)
+        high = ordered[starts + counts // 2].astype(np.float64)
+        median[present] = (low + high) / 2
+
+    # Дискриминация: верхняя и нижняя группы игроков по их точности
+    player_answers, _, player_accuracy = _rates(players, correct, 0)
+    qualified = np.flatnonzero(player_answers >= MIN_PLAYER_ANSWERS)
+    discrimination = np.full(size, np.nan)
+    group = int(len(qualified) * GROUP)
+    if group:
+        order = qualified[np.argsort(player_accuracy[qualified], kind="stable")]
+        upper = np.zeros(len(player_answers), dtype=bool)
+        lower = np.zeros(len(player_answers), dtype=bool)
+        upper[order[-group:]] = True
+        lower[order[:group]] = True
+        in_upper, in_lower = upper[players], lower[players]
+        upper_answers, _, upper_rate = _rates(questions[in_upper], correct[in_upper], size)
+        lower_answers, _, lower_rate = _rates(questions[in_lower], correct[in_lower], size)
+        both = (upper_answers > 0) & (lower_answers > 0)
+        discrimination[both] = upper_rate[both] - lower_rate[both]
+
+    return QuestionAnalytics(
+        answers, hits, accuracy, expected, median, discrimination,
+        events=len(questions), players=int(np.count_nonzero(player_answers)), total=total,
+        elapsed=time.perf_counter() - start,
+    )
@@ -0,0 +1,87 @@
+from array import array
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from dedup import question_key
+
+
+class AnswerLog:
+    """Журнал ответов в плоских массивах: вопрос, игрок, верно ли, время ответа.
+
+    Событие занимает 13 байт (четыре array без объектов на запись), поэтому
+    миллионы ответов держатся в памяти, а analytics.py читает их как
+    numpy-массивы без преобразований. Журнал только дописывается; при
+    max_events старшая половина событий отбрасывается.
+
+    Номер вопроса присваивается по содержимому (ключ из dedup.py), так что
+    один и тот же вопрос из разных банков и после перезагрузки банка
+    считается одним.
+    """
+
+    def __init__(self, max_events: int = 5_000_000):
+        self.max_events = max(2, max_events)
+        self.questions = array("I")
+        self.players = array("I")
+        self.correct = array("B")
+        self.seconds = array("f")
+        self._by_location: Dict[Hashable, int] = {}
+        self._by_content: Dict[str, int] = {}
+        # По номеру вопроса: ID (начало ключа), банк и текст для отчётов
+        self.question_info: List[Tuple[str, str, str]] = []
+        self._player_ids: Dict[str, int] = {}
+        self.total = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def question_id(self, bank_name: str, store, index: int) -> int:
+        location = (bank_name, store.digest, index)
+        qid = self._by_location.get(location)
+        if qid is None:
+            question = store[index]
+            key = question_key(question)
+            qid = self._by_content.get(key)
+            if qid is None:
+                qid = self._by_content[key] = len(self.question_info)
+                self.question_info.append((key[:12], bank_name, question["question"]))
+            self._by_location[location] = qid
+        return qid
+
+    def lookup(self, bank_name: str, store, index: int) -> Optional[int]:
+        """Номер вопроса, если на него уже отвечали; без вычисления ключа."""
+        return self._by_location.get((bank_name, store.digest, index))
+
+    def record(self, qid: int, player: str, correct: bool, seconds: float):
+        if len(self.questions) >= self.max_events:
+            self._compact()
+        pid = self._player_ids.get(player)
+        if pid is None:
+            pid = self._player_ids[player] = len(self._player_ids)
+        self.questions.append(qid)
+        self.players.append(pid)
+        self.correct.append(1 if correct else 0)
+        self.seconds.append(max(0.0, seconds))
+        self.total += 1
+
+    def _compact(self):
+        half = len(self.questions) // 2
+        for column in (self.questions, self.players, self.correct, self.seconds):
+            del column[:half]
+        self.dropped += half
+
+    def snapshot(self) -> Tuple[array, array, array, array]:
+        """Копии колонок: их можно разбирать в потоке, пока журнал дописывается."""
+        return self.questions[:], self.players[:], self.correct[:], self.seconds[:]
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self.questions),
+            "total": self.total,
+            "dropped": self.dropped,
+            "questions": len(self.question_info),
+            "players": len(self._player_ids),
+            "bytes": sum(
+                len(column) * column.itemsize
+                for column in (self.questions, self.players, self.correct, self.seconds)
+            ),
+        }
@@ -1,15 +1,32 @@
-import json
 import random
-import re
 import time
 import asyncio
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+import logging
+import os
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Set
 import pathlib
 
+import analytics
+from answers import AnswerLog
+from connections import ConnectionManager, spawn
+from frames import FrameCache, dumps, extend, loads
+from limits import ANY as ANY_ACTION, RateLimiter, parse_limits
+from logs import LogPipeline, parse_sample
+from metrics import LoopLagMonitor, Registry
+from banks import QuestionBank
+from reloader import BankWatcher
+from persistence import ScoreStore
+from players import PlayerStore
+import protocol
+from rooms import Room, RoomRegistry
+from search import SearchIndex
+from session import Session
+from shared_state import create_backend
+from static_files import CachedPage, CachedStaticFiles, find_build
+from timers import TimerWheel
+
 app = FastAPI()
 
 app.add_middleware(
@@ -20,72 +37,364 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DATA_PATH = pathlib.Path(__file__).parent / "midterm.txt"
+DEFAULT_BANK = os.environ.get("DEFAULT_BANK", "midterm")
+QUESTION_BANK_CACHE = int(os.environ.get("QUESTION_BANK_CACHE", "4"))
+# Виртуальный банк из всех файлов без дубликатов; пустое значение отключает
+MERGED_BANK = os.environ.get("MERGED_BANK", "all")
+LEADERBOARD_BROADCAST_HZ = float(os.environ.get("LEADERBOARD_BROADCAST_HZ", "4"))
+SEND_QUEUE_MAX = int(os.environ.get("SEND_QUEUE_MAX", "64"))
+SEND_TIMEOUT = float(os.environ.get("SEND_TIMEOUT", "5"))
+BANK_RELOAD_INTERVAL = float(os.environ.get("BANK_RELOAD_INTERVAL", "2"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+REVIEW_RATE = float(os.environ.get("REVIEW_RATE", "0"))
+MAX_PREFETCH = int(os.environ.get("MAX_PREFETCH", "5"))
+MAX_SEARCH_RESULTS = int(os.environ.get("MAX_SEARCH_RESULTS", "50"))
+ANALYTICS_MAX_EVENTS = int(os.environ.get("ANALYTICS_MAX_EVENTS", "5000000"))
+ANALYTICS_INTERVAL = float(os.environ.get("ANALYTICS_INTERVAL", "10"))
+# Адаптивная сложность: из скольких ближайших вопросов выбирать (1 — выключена)
+ADAPTIVE_CANDIDATES = int(os.environ.get("ADAPTIVE_CANDIDATES", "1"))
+TARGET_ACCURACY = float(os.environ.get("TARGET_ACCURACY", "0.7"))
+# Лимиты входящих сообщений на соединение: действие=в секунду/запас, "*" — все вместе
+RATE_LIMITS = parse_limits(os.environ.get(
+    "RATE_LIMITS",
+    "*=20/40,get_question=8/16,answer=8/16,get_leaderboard=2/5,register=1/5,start_game=1/5"
+))
+# Столько отброшенных подряд сообщений — и клиент отключается
+MAX_DROPPED_IN_ROW = int(os.environ.get("MAX_DROPPED_IN_ROW", "200"))
+MAX_MESSAGE_SIZE = int(os.environ.get("MAX_MESSAGE_SIZE", "4096"))
+MAX_NAME_LENGTH = int(os.environ.get("MAX_NAME_LENGTH", "64"))
+MAX_BANKS_PER_GAME = int(os.environ.get("MAX_BANKS_PER_GAME", "16"))
+GAME_DURATION = float(os.environ.get("GAME_DURATION", "60"))
+MAX_GAME_DURATION = float(os.environ.get("MAX_GAME_DURATION", "600"))
+TIMER_TICK = float(os.environ.get("TIMER_TICK", "0.1"))
+PLAYER_TTL = float(os.environ.get("PLAYER_TTL", "600"))
+PLAYER_SWEEP_INTERVAL = float(os.environ.get("PLAYER_SWEEP_INTERVAL", "30"))
+BEST_SCORES_MAX = int(os.environ.get("BEST_SCORES_MAX", "1000"))
+DB_PATH = os.environ.get("DB_PATH", str(pathlib.Path(__file__).parent / "sprint_quiz.db"))
+PERSISTENCE = os.environ.get("PERSISTENCE", "1") == "1"
+PERSIST_BATCH_MS = float(os.environ.get("PERSIST_BATCH_MS", "50"))
+PERSIST_BATCH_EVENTS = int(os.environ.get("PERSIST_BATCH_EVENTS", "500"))
+# Сколько секунд хранить журнал score_events (0 — без ограничения)
+SCORE_EVENTS_RETENTION = float(os.environ.get("SCORE_EVENTS_RETENTION", str(7 * 86400)))
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "local")
+STATE_NAMESPACE = os.environ.get("STATE_NAMESPACE", "sprint-quiz")
+STATE_SLOTS = int(os.environ.get("STATE_SLOTS", "65536"))
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+DEFAULT_ROOM = os.environ.get("DEFAULT_ROOM", "lobby")
+ROOM_IDLE_TTL = float(os.environ.get("ROOM_IDLE_TTL", "60"))
+ROOM_SWEEP_INTERVAL = float(os.environ.get("ROOM_SWEEP_INTERVAL", "10"))
+MAX_ROOMS = int(os.environ.get("MAX_ROOMS", "1000"))
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "get_question=0.05,answer=0.1")
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.25"))
+# permessage-deflate для WebSocket (uvicorn: --ws-per-message-deflate)
+WS_DEFLATE = os.environ.get("WS_DEFLATE", "1") == "1"
+FRONTEND_BUILD = os.environ.get(
+    "FRONTEND_BUILD", str(pathlib.Path(__file__).resolve().parent.parent / "frontend" / "build")
+)
 
-def parse_questions():
-    """Парсит текстовый файл в список вопросов."""
-    if not DATA_PATH.exists():
-        print(f"ERROR: File {DATA_PATH} not found!")
-        return []
-    
-    raw = DATA_PATH.read_text(encoding="utf-8")
-    blocks = re.split(r"\bANSWER:", raw)
-    questions = []
-    
-    for i in range(len(blocks) - 1):
-        block_lines = [line.strip() for line in blocks[i].split("\n")]
-        answer_raw = blocks[i + 1].strip().split("\n")[0].strip().upper()
-        
-        question_text = ""
-        choices = []
-        
-        for line in block_lines:
-            if not line:
-                continue
-            if re.match(r"^[A-E]\)", line):
-                choices.append(line)
-                continue
-            if len(line) == 1 and line.upper() in "ABCDE":
-                continue
-            if question_text == "":
-                question_text = line
-        
-        if question_text and choices:
-            questions.append({
-                "question": question_text,
-                "choices": choices,
-                "answer": answer_raw
-            })
-    
-    print(f"INFO: Loaded {len(questions)} questions from {DATA_PATH}")
-    return questions
+log_pipeline = LogPipeline(LOG_LEVEL, LOG_FORMAT, parse_sample(LOG_SAMPLE))
+log_pipeline.install()
+log = logging.getLogger("app")
+events = log_pipeline.events(log)
 
-QUESTIONS = parse_questions()
+metrics = Registry(prefix="sprint_quiz_")
+message_seconds = metrics.histogram(
+    "message_seconds", "Time spent handling one WebSocket message, by action",
+    labels=("action",)
+)
+broadcast_seconds = metrics.histogram(
+    "broadcast_seconds", "Time to queue one leaderboard broadcast to a room"
+)
+broadcast_recipients = metrics.histogram(
+    "broadcast_recipients", "Connections reached by one leaderboard broadcast",
+    buckets=(1, 2, 5, 10, 30, 100, 300, 1000, 3000, 10000)
+)
+questions_served = metrics.counter(
+    "questions_served", "Questions sent to players, by bank", labels=("bank",)
+)
+messages_dropped = metrics.counter(
+    "messages_dropped", "Inbound WebSocket messages dropped before a handler, by reason",
+    labels=("reason",)
+)
+search_seconds = metrics.histogram("search_seconds", "Time spent answering one /search query")
+analytics_seconds = metrics.histogram(
+    "analytics_seconds", "Time spent computing question analytics from the answer log",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+loop_lag = LoopLagMonitor(metrics.histogram(
+    "event_loop_lag_seconds", "How late the event loop wakes up a sleeping task",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+), interval=LOOP_LAG_INTERVAL)
 
-players: Dict[str, dict] = {}
-active_connections: Set[WebSocket] = set()
+def observe_broadcast(seconds: float, recipients: int):
+    broadcast_seconds.observe(seconds)
+    broadcast_recipients.observe(recipients)
 
-async def broadcast_leaderboard():
-    """Отправляет обновленный рейтинг всем подключенным игрокам."""
-    board = sorted(
-        players.items(),
-        key=lambda x: x[1]["score"],
-        reverse=True
-    )[:10]
-    
-    leaderboard_data = {
-        "type": "leaderboard",
-        "players": [
-            {"name": name, "score": data["score"]}
-            for name, data in board
-        ]
-    }
-    
-    for connection in active_connections:
-        try:
-            await connection.send_json(leaderboard_data)
-        except:
-            pass
+question_bank = QuestionBank(max_loaded=QUESTION_BANK_CACHE, merged_name=MERGED_BANK)
+if DEFAULT_BANK in question_bank:
+    log.info("Loaded %d questions from %s", len(question_bank.get(DEFAULT_BANK)), question_bank.paths[DEFAULT_BANK])
+else:
+    log.error("Default bank %s not found!", DEFAULT_BANK)
+
+# Поиск по всем банкам; индекс перестраивается при перезагрузке или появлении банка
+search_index = SearchIndex.build(question_bank.stores())
+log.info("Search index: %d questions, %d terms in %.1f ms", len(search_index.docs),
+         search_index.stats()["terms"], search_index.build_ms)
+
+# Объединённый банк собирается до старта; потом только в потоке, а игры
+# до готовности новой сборки получают прежнюю
+if question_bank.merged_name:
+    question_bank.build_merged()
+
+async def rebuild_search_index():
+    global search_index
+    # stores() читает незагруженные банки с диска: тоже в потоке
+    search_index = await asyncio.to_thread(lambda: SearchIndex.build(list(question_bank.stores())))
+
+async def rebuild_merged_bank():
+    if question_bank.merged_name:
+        await asyncio.to_thread(question_bank.build_merged)
+
+# Журнал ответов и последний расчёт сложности вопросов по нему
+answer_log = AnswerLog(ANALYTICS_MAX_EVENTS)
+question_analytics = None
+
+async def refresh_analytics():
+    """Пересчитывает аналитику в потоке, если в журнале появились ответы."""
+    global question_analytics
+    if analytics.np is None or not len(answer_log):
+        return
+    if question_analytics is not None and question_analytics.total == answer_log.total:
+        return
+    columns = answer_log.snapshot()
+    result = await asyncio.to_thread(
+        analytics.compute, columns, len(answer_log.question_info), answer_log.total
+    )
+    analytics_seconds.observe(result.elapsed)
+    question_analytics = result
+
+rooms = RoomRegistry(
+    DEFAULT_ROOM,
+    (DEFAULT_BANK,),
+    GAME_DURATION,
+    rate_hz=LEADERBOARD_BROADCAST_HZ,
+    idle_ttl=ROOM_IDLE_TTL,
+    max_rooms=MAX_ROOMS,
+    observe=observe_broadcast
+)
+shared_state = create_backend(STATE_BACKEND, STATE_NAMESPACE, STATE_SLOTS, REDIS_URL)
+
+KEY_SEPARATOR = "\x1f"
+
+def shared_key_for(room_id: str, player_id: str) -> str:
+    return f"{room_id}{KEY_SEPARATOR}{player_id}"
+
+def shared_key(room: Room, player_id: str) -> str:
+    """Ключ игрока в общем состоянии воркеров: рейтинги комнат не пересекаются."""
+    return shared_key_for(room.id, player_id)
+
+def forget_player(session: Session):
+    """Убирает вытесненную сессию из рейтинга комнаты и колеса таймеров."""
+    game_clock.cancel(session.timer)
+    room = session.room
+    if room is not None:
+        room.leaderboard.remove(session.name)
+        shared_state.publish(shared_key(room, session.name), None)
+        room.schedule_leaderboard()
+
+def apply_remote_score(key: str, score):
+    """Применяет изменение счёта, пришедшее от другого воркера."""
+    room_id, _, player_id = key.partition(KEY_SEPARATOR)
+    room = rooms.get(room_id)
+    if room is None:
+        return
+    if score is None:
+        session = players.get(player_id)
+        if session is not None and session.room is room and session.conn is not None:
+            # Игрок подключён к этому воркеру — его запись главнее. Сессии без
+            # соединения (поднятые из базы) счёт не переиздают: иначе воркеры
+            # пересылали бы его друг другу по кругу
+            shared_state.publish(key, session.score)
+            return
+        room.leaderboard.remove(player_id)
+    else:
+        room.leaderboard.set(player_id, score)
+    room.schedule_leaderboard()
+
+def restore_shared_scores(room: Room):
+    """Подтягивает счета комнаты, которые уже набраны в других воркерах."""
+    prefix = shared_key_for(room.id, "")
+    restored = 0
+    for key, score in shared_state.snapshot():
+        if key.startswith(prefix):
+            player_id = key[len(prefix):]
+            session = players.get(player_id)
+            if session is None or session.room is not room:
+                room.leaderboard.set(player_id, score)
+                restored += 1
+    if restored:
+        log.info("Room %s joined shared leaderboard with %d players from other workers", room.id, restored)
+
+players = PlayerStore(
+    ttl=PLAYER_TTL,
+    best_capacity=BEST_SCORES_MAX,
+    on_evict=forget_player
+)
+active_connections = ConnectionManager(
+    max_backlog=SEND_QUEUE_MAX,
+    send_timeout=SEND_TIMEOUT
+)
+
+score_store = ScoreStore(
+    DB_PATH,
+    batch_ms=PERSIST_BATCH_MS,
+    batch_size=PERSIST_BATCH_EVENTS,
+    retention=SCORE_EVENTS_RETENTION
+) if PERSISTENCE else None
+
+# Сохранённые счета игроков других комнат: комнаты после перезапуска ещё
+# нет, поэтому счета ждут, пока её снова откроют (см. restore_room_scores)
+pending_room_scores = {}
+
+def restore_session(name: str, score: int, updated: float, room: Room):
+    session = Session(name, room.bank)
+    session.score = score
+    session.game_active = False
+    session.last_seen = updated
+    session.room = room
+    players[name] = session
+    room.leaderboard.set(name, score)
+
+def restore_scores():
+    """Поднимает рейтинг и недавние сессии из базы после перезапуска."""
+    if score_store is None:
+        return
+    start = time.perf_counter()
+    for name, best in score_store.load_best(BEST_SCORES_MAX):
+        players.best.set(name, best)
+    recent = score_store.load(since=time.time() - PLAYER_TTL)
+    for name, score, best, updated, room_id in recent:
+        if room_id in ("", rooms.default.id):
+            restore_session(name, score, updated, rooms.default)
+        else:
+            pending_room_scores.setdefault(room_id, []).append((name, score, updated))
+    log.info("Restored %d players (%d waiting for %d rooms) and %d best scores in %.1f ms",
+             len(recent), sum(map(len, pending_room_scores.values())), len(pending_room_scores),
+             len(players.best), (time.perf_counter() - start) * 1000)
+
+def restore_room_scores(room: Room):
+    """Возвращает в заново открытую комнату её игроков, сохранённые до перезапуска."""
+    pending = pending_room_scores.pop(room.id, None)
+    if not pending:
+        return
+    cutoff = time.time() - PLAYER_TTL
+    restored = 0
+    for name, score, updated in pending:
+        if updated > cutoff and name not in players:
+            restore_session(name, score, updated, room)
+            restored += 1
+    if restored:
+        log.info("Room %s restored %d players from the database", room.id, restored)
+
+def set_score(player_id: str, score: int):
+    """Меняет счёт игрока, обновляет индекс рейтинга комнаты и журнал на диске."""
+    session = players[player_id]
+    session.score = score
+    session.room.leaderboard.set(player_id, score)
+    shared_state.publish(shared_key(session.room, player_id), score)
+    if score_store is not None:
+        score_store.record(player_id, score, session.room.id)
+
+question_frames = FrameCache()
+question_bodies = FrameCache()
+question_ids = protocol.QuestionIds()
+
+game_clock = TimerWheel(tick=TIMER_TICK)
+
+def end_game(session: Session):
+    """Завершает игру по таймеру: game_over и свежий рейтинг уходят сразу."""
+    session.timer = None
+    if not session.game_active:
+        return
+    session.game_active = False
+    session.pending.clear()
+    players.record_best(session)
+    players.touch(session)
+    log.info("Game over for %s - time expired", session.name,
+             extra={"event": "game_over", "player": session.name, "score": session.score})
+    if session.conn is not None:
+        session.conn.send(game_over_frame(session.conn, session))
+        session.conn.send(session.room.frame_for(session.conn), kind="leaderboard")
+    session.room.schedule_leaderboard()
+
+def start_clock(session: Session):
+    """(Пере)запускает часы игры сессии в общем колесе таймеров."""
+    game_clock.cancel(session.timer)
+    session.start_time = time.time()
+    session.game_active = True
+    session.answered = 0
+    session.answered_at = time.monotonic()
+    session.timer = game_clock.schedule(session.room.duration, end_game, session)
+
+def sweep_players():
+    """Периодическая чистка реестра игроков; перепланирует сама себя."""
+    removed = players.sweep()
+    if removed:
+        log.info("Evicted %d idle players, %d resident", removed, len(players))
+    game_clock.schedule(PLAYER_SWEEP_INTERVAL, sweep_players)
+
+async def collect_rooms():
+    removed = await rooms.collect()
+    if removed:
+        log.info("Closed %d empty rooms, %d open", removed, len(rooms))
+
+def sweep_rooms():
+    """Периодически закрывает опустевшие комнаты; перепланирует сама себя."""
+    spawn(collect_rooms())
+    game_clock.schedule(ROOM_SWEEP_INTERVAL, sweep_rooms)
+
+def schedule_analytics():
+    """Периодически пересчитывает сложность вопросов; перепланирует сама себя."""
+    spawn(refresh_analytics())
+    game_clock.schedule(ANALYTICS_INTERVAL, schedule_analytics)
+
+bank_watcher = BankWatcher(
+    question_bank,
+    interval=BANK_RELOAD_INTERVAL,
+    on_reload=lambda name: (
+        question_frames.clear(), question_bodies.clear(),
+        spawn(rebuild_search_index()), spawn(rebuild_merged_bank())
+    )
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    log_pipeline.start()
+    if score_store is not None:
+        restore_scores()
+        score_store.start()
+    restore_shared_scores(rooms.default)
+    shared_state.start(apply_remote_score)
+    rooms.start()
+    game_clock.start()
+    loop_lag.start()
+    game_clock.schedule(PLAYER_SWEEP_INTERVAL, sweep_players)
+    game_clock.schedule(ROOM_SWEEP_INTERVAL, sweep_rooms)
+    game_clock.schedule(ANALYTICS_INTERVAL, schedule_analytics)
+    bank_watcher.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await bank_watcher.stop()
+    await loop_lag.stop()
+    await game_clock.stop()
+    await rooms.stop()
+    shared_state.stop()
+    if score_store is not None:
+        await asyncio.to_thread(score_store.stop)
+    log_pipeline.stop()
 
 # HTML Frontend встроенный
 HTML_CONTENT = """
@@ -153,12 +462,16 @@ HTML_CONTENT = """
             const [playerName, setPlayerName] = useState('');
             const [currentQuestion, setCurrentQuestion] = useState(null);
             const [score, setScore] = useState(0);
-            const [timeLeft, setTimeLeft] = useState(60);
+            const [timeLeft, setTimeLeft] = useState(0);
             const [leaderboard, setLeaderboard] = useState([]);
             const [feedback, setFeedback] = useState(null);
+            const [correctAnswer, setCorrectAnswer] = useState(null);
             const [connectionStatus, setConnectionStatus] = useState('disconnected');
             const timerRef = useRef(null);
             const wsRef = useRef(null);
+            // Вопросы, присланные сервером заранее (режим prefetch)
+            const queueRef = useRef([]);
+            const hasQuestionRef = useRef(false);
             
             const WS_URL = `ws${window.location.protocol === 'https:' ? 's' : ''}://${window.location.host}/ws`;
             
@@ -185,9 +498,13 @@ HTML_CONTENT = """
                     
                     // Сразу регистрируем игрока
                     console.log('Registering player:', playerName);
+                    // Комната берётся из ссылки вида /?room=group-1
+                    const room = new URLSearchParams(window.location.search).get('room');
                     socket.send(JSON.stringify({
                         action: 'register',
-                        name: playerName
+                        name: playerName,
+                        prefetch: 1,
+                        ...(room ? { room } : {})
                     }));
                 };
                 
@@ -210,23 +527,36 @@ HTML_CONTENT = """
                         
                         setScreen('game');
                         setScore(0);
-                        setTimeLeft(60);
-                        startTimer();
+                        startTimer(data.duration);
                     }
                     
                     if (data.type === 'question') {
                         console.log('✅ Question received:', data.q.question);
-                        setCurrentQuestion(data.q);
-                        setFeedback(null);
+                        if (hasQuestionRef.current) {
+                            queueRef.current.push(data.q);
+                        } else {
+                            hasQuestionRef.current = true;
+                            setCurrentQuestion(data.q);
+                            setFeedback(null);
+                        }
                     }
                     
                     if (data.type === 'answer_result') {
                         console.log('Answer result:', data.result);
                         setScore(data.score);
+                        setCorrectAnswer(data.correct);
                         setFeedback(data.result);
+                        if (data.next) {
+                            queueRef.current.push(...data.next);
+                        }
                         
                         setTimeout(() => {
                             setFeedback(null);
+                            if (queueRef.current.length > 0) {
+                                setCurrentQuestion(queueRef.current.shift());
+                                return;
+                            }
+                            hasQuestionRef.current = false;
                             console.log('Requesting next question...');
                             socket.send(JSON.stringify({ action: 'get_question' }));
                         }, 800);
@@ -265,20 +595,23 @@ HTML_CONTENT = """
                 connectWebSocket();
             };
             
-            const startTimer = () => {
+            // Длительность игры задаёт сервер; таймер только показывает
+            // остаток, а игру завершает game_over от сервера
+            const startTimer = (duration) => {
                 if (timerRef.current) {
                     clearInterval(timerRef.current);
                 }
                 
-                timerRef.current = setInterval(() => {
-                    setTimeLeft((prev) => {
-                        if (prev <= 1) {
-                            endGame(score);
-                            return 0;
-                        }
-                        return prev - 1;
-                    });
-                }, 1000);
+                const deadline = Date.now() + duration * 1000;
+                const tick = () => {
+                    const left = Math.max(0, Math.ceil((deadline - Date.now()) / 1000));
+                    setTimeLeft(left);
+                    if (left === 0) {
+                        clearInterval(timerRef.current);
+                    }
+                };
+                tick();
+                timerRef.current = setInterval(tick, 1000);
             };
             
             const endGame = (finalScore) => {
@@ -297,13 +630,12 @@ HTML_CONTENT = """
                 if (!currentQuestion || feedback) return;
                 
                 const answer = choice.charAt(0);
-                console.log('Answering:', answer, 'Correct:', currentQuestion.answer);
+                console.log('Answering:', answer);
                 
                 if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
                     wsRef.current.send(JSON.stringify({
                         action: 'answer',
-                        answer: answer,
-                        correct: currentQuestion.answer
+                        answer: answer
                     }));
                 }
             };
@@ -311,9 +643,11 @@ HTML_CONTENT = """
             const restartGame = () => {
                 setScreen('home');
                 setScore(0);
-                setTimeLeft(60);
+                setTimeLeft(0);
                 setCurrentQuestion(null);
                 setFeedback(null);
+                queueRef.current = [];
+                hasQuestionRef.current = false;
                 setPlayerName('');
                 setConnectionStatus('disconnected');
                 if (wsRef.current) {
@@ -330,7 +664,7 @@ HTML_CONTENT = """
                                     <Trophy />
                                 </div>
                                 <h1 className="text-4xl font-bold text-gray-800 mb-2">Sprint Quiz</h1>
-                                <p className="text-gray-600">60 секунд. Максимум правильных ответов.</p>
+                                <p className="text-gray-600">Игра на время. Максимум правильных ответов.</p>
                                 {connectionStatus !== 'disconnected' && (
                                     <p className="text-sm text-blue-600 mt-2">
                                         {connectionStatus === 'connecting' && '🔄 Подключение...'}
@@ -408,8 +742,8 @@ HTML_CONTENT = """
                                     
                                     <div className="space-y-3">
                                         {currentQuestion.choices.map((choice, idx) => {
-                                            const isCorrect = feedback === 'correct' && choice.charAt(0) === currentQuestion.answer;
-                                            const isWrong = feedback === 'wrong' && choice.charAt(0) !== currentQuestion.answer;
+                                            const isCorrect = feedback === 'correct' && choice.charAt(0) === correctAnswer;
+                                            const isWrong = feedback === 'wrong' && choice.charAt(0) !== correctAnswer;
                                             
                                             return (
                                                 <button
@@ -508,119 +842,602 @@ HTML_CONTENT = """
 </html>
 """
 
+# Собранный фронтенд (npm run build), иначе встроенная страница выше.
+# В обоих случаях байты, сжатые варианты и ETag готовятся один раз.
+frontend_build = find_build(FRONTEND_BUILD)
+if frontend_build is not None:
+    index_page = CachedPage(pathlib.Path(frontend_build, "index.html").read_text(encoding="utf-8"))
+    if os.path.isdir(os.path.join(frontend_build, "static")):
+        app.mount("/static", CachedStaticFiles(directory=os.path.join(frontend_build, "static")), name="static")
+else:
+    index_page = CachedPage(HTML_CONTENT)
+
 @app.get("/", response_class=HTMLResponse)
-async def get_index():
-    return HTML_CONTENT
+async def get_index(request: Request):
+    return index_page.response(request.headers)
+
+def default_questions():
+    """Вопросы банка по умолчанию (пустой список, если банка нет)."""
+    if DEFAULT_BANK not in question_bank:
+        return []
+    return question_bank.get(DEFAULT_BANK)
+
+async def player_questions(player_id):
+    """Набор вопросов, выбранный игроком (или банк по умолчанию).
+
+    Бросает KeyError, если файл банка пропал.
+    """
+    player = players.get(player_id)
+    if player is not None:
+        return await question_bank.load(player.bank)
+    if DEFAULT_BANK not in question_bank:
+        return []
+    return await question_bank.load(DEFAULT_BANK)
+
+def question_body(bank_name, store, index) -> str:
+    """Закодированный вопрос без правильного ответа (кэшируется)."""
+    return question_bodies.get((bank_name, store.digest, index), lambda: {
+        "question": store.question(index),
+        "choices": store.choices(index)
+    })
+
+def question_frame(bank_name, store, index) -> str:
+    """Готовый кадр type=question; тело вопроса кодируется один раз."""
+    return question_frames.get(
+        (bank_name, store.digest, index),
+        lambda: extend('{"type":"question"}', q=question_body(bank_name, store, index)),
+        encoded=True
+    )
+
+def compact_question_body(conn, bank_name, store, index) -> str:
+    """Компактный протокол: номер вопроса, если клиент его уже получал, иначе полное тело."""
+    qid = question_ids.get((bank_name, store.digest, index))
+    if qid in conn.known_questions:
+        return str(qid)
+    conn.known_questions.add(qid)
+    return question_bodies.get(
+        ("compact", bank_name, store.digest, index),
+        lambda: protocol.question_body(qid, store.question(index), store.choices(index)),
+        encoded=True
+    )
+
+def send_error(conn, message: str):
+    conn.send(protocol.error(message) if conn.compact else {"error": message})
+
+def game_over_frame(conn, session):
+    if conn.compact:
+        return protocol.game_over(session.score, session.room.duration)
+    return {
+        "type": "game_over",
+        "final_score": session.score,
+        "time": session.room.duration
+    }
+
+def difficulty_rank(session, questions):
+    """Для адаптивного выбора: насколько ожидаемая точность вопроса далека от нужной игроку.
+
+    Игроку, который отвечает лучше TARGET_ACCURACY, достаются вопросы
+    труднее, и наоборот; первые ответы игры не учитываются.
+    """
+    result = question_analytics
+    if ADAPTIVE_CANDIDATES <= 1 or result is None:
+        return None
+    target = TARGET_ACCURACY
+    if session.answered >= 5:
+        target -= session.score / session.answered - TARGET_ACCURACY
+        target = max(0.1, min(target, 0.95))
+
+    def rank(pick):
+        qid = answer_log.lookup(*questions.locate(pick))
+        return abs(result.expected_accuracy(qid) - target)
+
+    return rank
+
+def serve_question(session, questions):
+    """Выбирает следующий вопрос для сессии и запоминает его как выданный."""
+    if session is not None:
+        pick = session.scheduler.next(
+            len(questions), difficulty_rank(session, questions), ADAPTIVE_CANDIDATES
+        )
+    else:
+        pick = random.randrange(len(questions))
+    bank_name, store, index = questions.locate(pick)
+    if session is not None:
+        session.serve(bank_name, store, index, pick)
+    questions_served.inc(bank_name)
+    return bank_name, store, index
+
+def parse_duration(value) -> float:
+    """Длительность игры для новой комнаты (секунды, в разумных пределах)."""
+    try:
+        duration = float(value) if value is not None else GAME_DURATION
+    except (TypeError, ValueError, OverflowError):
+        return GAME_DURATION
+    return max(5.0, min(duration, MAX_GAME_DURATION))
+
+def parse_prefetch(value) -> int:
+    """Глубина предзагрузки, запрошенная клиентом при регистрации."""
+    if value is True:
+        return 1
+    try:
+        return max(0, min(int(value or 0), MAX_PREFETCH))
+    except (TypeError, ValueError, OverflowError):
+        return 0
 
 @app.get("/stats")
 async def stats():
     return {
-        "total_questions": len(QUESTIONS),
+        "total_questions": len(default_questions()),
+        "banks": question_bank.stats(),
         "active_players": len(players),
-        "leaderboard": sorted(
-            [{"name": k, "score": v["score"]} for k, v in players.items()],
-            key=lambda x: x["score"],
-            reverse=True
-        )[:10]
+        "players": players.stats(),
+        "leaderboard": rooms.default.snapshot(),
+        "all_time": [
+            {"name": name, "score": score}
+            for name, score in players.best.top(10)
+        ],
+        "broadcast": rooms.default.broadcaster.stats(),
+        "rooms": rooms.stats(),
+        "connections": active_connections.stats(),
+        "question_frames": question_frames.stats(),
+        "timers": game_clock.stats(),
+        "persistence": score_store.stats() if score_store is not None else None,
+        "shared_state": shared_state.stats(),
+        "logging": log_pipeline.stats(),
+        "search": search_index.stats(),
+        "answer_log": answer_log.stats(),
+        "frontend": {"build": frontend_build, "index": index_page.stats()}
+    }
+
+metrics.gauge("connections", "Open WebSocket connections", lambda: len(active_connections))
+metrics.gauge(
+    "games_in_progress", "Sessions with a running game clock",
+    lambda: sum(players[name].game_active for name in players)
+)
+metrics.gauge("players_resident", "Player sessions held in memory", lambda: len(players))
+metrics.gauge("rooms", "Open rooms", lambda: len(rooms))
+metrics.gauge("answer_log_events", "Answers held in the analytics log", lambda: len(answer_log))
+metrics.gauge(
+    "send_queue_depth", "Frames waiting in per-connection send queues",
+    lambda: sum(conn.depth for conn in active_connections.connections)
+)
+metrics.counter_func("frames_sent", "Frames written to WebSockets", lambda: active_connections.sent)
+metrics.counter_func(
+    "send_failures", "WebSocket sends that raised an error",
+    lambda: active_connections.send_failures
+)
+metrics.counter_func(
+    "stale_frames_dropped", "Leaderboard frames replaced before they were sent",
+    lambda: active_connections.stale_dropped
+)
+metrics.counter_func(
+    "evictions", "Slow clients disconnected, by reason",
+    lambda: {(reason,): count for reason, count in active_connections.evictions.items()},
+    labels=("reason",)
+)
+metrics.gauge(
+    "persistence_backlog", "Score events queued but not yet written to SQLite",
+    lambda: score_store.queued - score_store.written if score_store is not None else 0
+)
+metrics.gauge(
+    "timer_lag_seconds", "Lag of the last game clock tick",
+    lambda: game_clock.lag_last
+)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/search")
+async def search(q: str = "", limit: int = 10, bank: str = None):
+    """Поиск вопроса по всем банкам: в каком банке (экзамене) он есть. Ответы не выдаются."""
+    if search_index.names != frozenset(question_bank.paths):
+        await rebuild_search_index()
+    started = time.perf_counter()
+    results = search_index.search(
+        q, max(1, min(limit, MAX_SEARCH_RESULTS)), bank.split(",") if bank else None
+    )
+    took = time.perf_counter() - started
+    search_seconds.observe(took)
+    return {"query": q, "took_ms": round(took * 1000, 3), "results": results}
+
+@app.get("/analytics")
+async def get_analytics(limit: int = 20, min_answers: int = 5):
+    """Сложность вопросов по журналу ответов: точность, медиана времени, дискриминация."""
+    if analytics.np is None:
+        raise HTTPException(status_code=503, detail="numpy is not installed")
+    if question_analytics is None:
+        await refresh_analytics()
+    result = question_analytics
+    if result is None:
+        return {"events": 0, "log": answer_log.stats()}
+    report = result.summary(answer_log.question_info, max(1, min(limit, 100)), max(1, min_answers))
+    report["pending_events"] = answer_log.total - result.total
+    return report
+
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/admin/banks")
+async def admin_banks(x_admin_token: str = Header(None)):
+    """Состояние банков и горячей перезагрузки: задержка, ошибки разбора."""
+    check_admin(x_admin_token)
+    return {
+        "banks": question_bank.stats(),
+        "reload": bank_watcher.stats()
     }
 
+@app.get("/admin/duplicates")
+async def admin_duplicates(x_admin_token: str = Header(None)):
+    """Отчёт о дубликатах между банками: группы, конфликты ответов."""
+    check_admin(x_admin_token)
+    if not question_bank.merged_name:
+        raise HTTPException(status_code=404, detail="Merged bank is disabled")
+    result = question_bank.merged or await asyncio.to_thread(question_bank.build_merged)
+    return result.report()
+
+def release_session(player_id, conn, room=None):
+    """Отвязывает сессию от закрытого соединения; дальше её вытеснит TTL."""
+    if room is not None:
+        room.leave(conn)
+    session = players.get(player_id)
+    if session is not None and session.conn is conn:
+        session.conn = None
+        players.touch(session)
+
+class Client:
+    """Состояние одного WebSocket-соединения, общее для обработчиков действий."""
+
+    __slots__ = ("conn", "player_id", "room", "limiter", "notice_timer")
+
+    def __init__(self, conn, limiter: RateLimiter):
+        self.conn = conn
+        self.player_id = None
+        self.room = None
+        self.limiter = limiter
+        self.notice_timer = None
+
+def check_bank_field(data):
+    bank = data.get("bank")
+    if bank is None or isinstance(bank, str):
+        return None
+    if not isinstance(bank, list) or len(bank) > MAX_BANKS_PER_GAME or \
+            not all(isinstance(name, str) for name in bank):
+        return f"Field 'bank' must be a string or a list of at most {MAX_BANKS_PER_GAME} strings"
+    return None
+
+def validate_register(data):
+    name = data.get("name")
+    if not isinstance(name, str) or not name.strip():
+        return "Field 'name' must be a non-empty string"
+    if len(name) > MAX_NAME_LENGTH:
+        return f"Field 'name' must be at most {MAX_NAME_LENGTH} characters"
+    room_id = data.get("room")
+    if room_id is not None and (isinstance(room_id, bool) or not isinstance(room_id, (str, int))
+                                or len(str(room_id)) > MAX_NAME_LENGTH):
+        return f"Field 'room' must be a string of at most {MAX_NAME_LENGTH} characters"
+    # \x1f разделяет комнату и имя в ключе общего состояния воркеров
+    if KEY_SEPARATOR in name or (room_id is not None and KEY_SEPARATOR in str(room_id)):
+        return "Fields 'name' and 'room' must not contain control characters"
+    limit = shared_state.max_key_bytes
+    if limit is not None and \
+            len(shared_key_for(str(room_id or DEFAULT_ROOM), name).encode("utf-8")) > limit:
+        return f"Name and room together must be at most {limit} bytes"
+    return check_bank_field(data)
+
+def validate_answer(data):
+    answer = data.get("answer", "")
+    if not isinstance(answer, str) or len(answer) > 16:
+        return "Field 'answer' must be a letter"
+    return None
+
+async def handle_register(client: Client, data: dict):
+    conn = client.conn
+    conn.compact = protocol.parse_proto(data.get("proto")) == protocol.PROTO_COMPACT
+    room_id = str(data.get("room") or DEFAULT_ROOM)
+    target = rooms.get(room_id)
+    try:
+        # Банк задаёт создатель комнаты; в общей комнате — каждый игрок
+        if target is None or target.shared_bank:
+            bank = question_bank.normalize(
+                data.get("bank") or (target.bank if target else DEFAULT_BANK)
+            )
+        else:
+            bank = target.bank
+        await question_bank.load(bank)
+    except KeyError as e:
+        send_error(conn, f"Unknown bank: {e.args[0]}")
+        return
+    if target is None:
+        # Пока банк читался, комнату мог открыть другой игрок
+        target = rooms.get(room_id)
+        if target is not None and not target.shared_bank:
+            bank = target.bank
+    if target is None:
+        try:
+            target = rooms.open(room_id, bank, parse_duration(data.get("duration")))
+        except ValueError as e:
+            send_error(conn, str(e))
+            return
+        restore_room_scores(target)
+        restore_shared_scores(target)
+        log.info("Room opened: %s (bank: %s, %gs)", room_id, ", ".join(bank), target.duration,
+                 extra={"event": "room_opened", "room": room_id})
+    room = client.room
+    if room is not target:
+        if room is not None:
+            room.leave(conn)
+        room = client.room = target
+        room.join(conn)
+    player_id = client.player_id = data["name"]
+    prefetch = parse_prefetch(data.get("prefetch"))
+    previous = players.get(player_id)
+    if previous is not None:
+        if previous.room is room:
+            game_clock.cancel(previous.timer)
+        else:
+            forget_player(previous)
+    session = Session(
+        player_id, bank,
+        review_rate=REVIEW_RATE,
+        prefetch=prefetch
+    )
+    session.conn = conn
+    session.room = room
+    players[player_id] = session
+    start_clock(session)
+    set_score(player_id, 0)
+    log.info("Player registered: %s (room: %s, bank: %s)", player_id, room.id, ", ".join(bank),
+             extra={"event": "register", "player": player_id, "room": room.id})
+    info = {
+        "status": "registered",
+        "name": player_id,
+        "room": room.id,
+        "bank": list(bank),
+        "duration": room.duration,
+        "prefetch": prefetch,
+        "total_questions": len(await player_questions(player_id))
+    }
+    if conn.compact:
+        del info["status"]
+        info["proto"] = protocol.PROTO_COMPACT
+        conn.send(protocol.registered(info))
+    else:
+        conn.send(info)
+    conn.send(room.frame_for(conn, full=True), kind="leaderboard")
+    room.schedule_leaderboard()
+
+async def handle_start_game(client: Client, data: dict):
+    conn, player_id = client.conn, client.player_id
+    if not player_id or player_id not in players:
+        return
+    session = players[player_id]
+    if data.get("bank"):
+        if not session.room.shared_bank:
+            send_error(conn, "Bank is fixed by the room")
+            return
+        try:
+            bank = question_bank.normalize(data["bank"])
+            await question_bank.load(bank)
+        except KeyError as e:
+            send_error(conn, f"Unknown bank: {e.args[0]}")
+            return
+        if players.get(player_id) is not session:
+            return
+        session.bank = bank
+    session.conn = conn
+    session.pending.clear()
+    start_clock(session)
+    set_score(player_id, 0)
+    log.info("Game started for: %s", player_id,
+             extra={"event": "start_game", "player": player_id})
+    conn.send(protocol.game_started() if conn.compact else {"status": "game_started"})
+
+async def handle_get_question(client: Client, data: dict):
+    conn, player_id = client.conn, client.player_id
+    try:
+        questions = await player_questions(player_id)
+    except KeyError as e:
+        send_error(conn, f"Unknown bank: {e.args[0]}")
+        return
+    if not questions:
+        log.error("No questions available!")
+        send_error(conn, "No questions available")
+        return
+
+    session = players.get(player_id)
+    # В режиме предзагрузки досылаем вопросы до полного запаса
+    count = max(1, session.missing()) if session is not None and session.prefetch else 1
+    for _ in range(count):
+        bank_name, store, index = serve_question(session, questions)
+        events(logging.INFO, "get_question", "Sending question %s#%d to %s",
+               bank_name, index, player_id, player=player_id)
+        # Правильный ответ остаётся на сервере
+        if conn.compact:
+            conn.send(protocol.question(compact_question_body(conn, bank_name, store, index)))
+        else:
+            conn.send(question_frame(bank_name, store, index))
+
+async def handle_answer(client: Client, data: dict):
+    conn, player_id = client.conn, client.player_id
+    if not player_id or player_id not in players:
+        return
+
+    session = players[player_id]
+    elapsed = time.time() - session.start_time
+    if session.game_active and elapsed > session.room.duration:
+        # Таймер ещё не сработал (точность — один тик)
+        game_clock.cancel(session.timer)
+        session.conn = conn
+        end_game(session)
+        return
+    if not session.game_active:
+        conn.send(game_over_frame(conn, session))
+        return
+
+    checked = session.check_answer(data.get("answer", ""))
+    if checked is None:
+        send_error(conn, "No question to answer")
+        return
+    is_correct, correct, served, seconds = checked
+    answer_log.record(answer_log.question_id(*served), player_id, is_correct, seconds)
+
+    if is_correct:
+        set_score(player_id, session.score + 1)
+        result = "correct"
+    else:
+        result = "wrong"
+
+    events(logging.INFO, "answer", "%s answered %s. Score: %d", player_id, result, session.score,
+           player=player_id, result=result)
+
+    bodies = None
+    if session.prefetch:
+        # Следующие вопросы едут вместе с результатом, без отдельного запроса
+        try:
+            questions = await player_questions(player_id)
+        except KeyError:
+            # Об ошибке клиент узнает из ответа на get_question
+            questions = []
+        bodies = []
+        if questions:
+            for _ in range(session.missing()):
+                served = serve_question(session, questions)
+                bodies.append(
+                    compact_question_body(conn, *served) if conn.compact else question_body(*served)
+                )
+    rank = session.room.leaderboard.rank(player_id)
+    time_left = max(0, session.room.duration - elapsed)
+    if conn.compact:
+        result_frame = protocol.answer_result(is_correct, correct, session.score, rank, time_left, bodies)
+    else:
+        result_frame = dumps({
+            "type": "answer_result",
+            "result": result,
+            "correct": correct,
+            "score": session.score,
+            "rank": rank,
+            "time_left": time_left
+        })
+        if bodies is not None:
+            result_frame = extend(result_frame, next="[" + ",".join(bodies) + "]")
+    conn.send(result_frame)
+
+    session.room.schedule_leaderboard()
+
+async def handle_get_leaderboard(client: Client, data: dict):
+    conn = client.conn
+    conn.send((client.room or rooms.default).frame_for(conn, full=True), kind="leaderboard")
+
+# Уведомление об отказе по лимиту: клиент повторяет свой неотвеченный
+# запрос. Отправляется не чаще раза за окно пополнения (RateLimiter.noticed)
+RATE_LIMITED = "rate_limited"
+rate_limited_frames = {False: dumps({"error": RATE_LIMITED}), True: protocol.error(RATE_LIMITED)}
+
+# Действие -> (обработчик, проверка полей: текст ошибки или None)
+HANDLERS = {
+    "register": (handle_register, validate_register),
+    "start_game": (handle_start_game, check_bank_field),
+    "get_question": (handle_get_question, None),
+    "answer": (handle_answer, validate_answer),
+    "get_leaderboard": (handle_get_leaderboard, None),
+}
+
+def send_rate_limited(client: Client):
+    client.notice_timer = None
+    if not client.conn.closed:
+        client.limiter.noticed(time.monotonic())
+        client.conn.send(rate_limited_frames[client.conn.compact])
+
+def notify_rate_limited(client: Client, now: float):
+    """Сообщает об отказе сразу или в конце окна, если уведомление уже было."""
+    if client.notice_timer is not None:
+        return
+    delay = client.limiter.notice_delay(now)
+    if delay > 0:
+        client.notice_timer = game_clock.schedule(delay, send_rate_limited, client)
+    else:
+        send_rate_limited(client)
+
+def reject(client: Client, reason: str, message: str = None, now: float = None):
+    """Отбрасывает входящее сообщение; клиента, который не унимается, отключает."""
+    messages_dropped.inc(reason)
+    if client.limiter.drop() >= MAX_DROPPED_IN_ROW:
+        client.conn.evict("abuse")
+    elif message is not None:
+        send_error(client.conn, message)
+    elif reason == RATE_LIMITED:
+        notify_rate_limited(client, now)
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
-    active_connections.add(ws)
-    player_id = None
+    conn = active_connections.add(ws)
+    client = Client(conn, RateLimiter(RATE_LIMITS))
+    limiter = client.limiter
     
-    print(f"New WebSocket connection. Total connections: {len(active_connections)}")
+    log.info("New WebSocket connection. Total connections: %d", len(active_connections),
+             extra={"event": "connect"})
     
     try:
         while True:
-            data = await ws.receive_json()
-            print(f"Received action: {data.get('action')} from {player_id}")
-            
-            if data["action"] == "register":
-                player_id = data["name"]
-                players[player_id] = {
-                    "score": 0,
-                    "start_time": time.time(),
-                    "game_active": True
-                }
-                print(f"Player registered: {player_id}")
-                await ws.send_json({
-                    "status": "registered",
-                    "name": player_id,
-                    "total_questions": len(QUESTIONS)
-                })
-                await broadcast_leaderboard()
-            
-            elif data["action"] == "start_game":
-                if player_id:
-                    players[player_id]["start_time"] = time.time()
-                    players[player_id]["game_active"] = True
-                    players[player_id]["score"] = 0
-                    print(f"Game started for: {player_id}")
-                    await ws.send_json({"status": "game_started"})
-            
-            elif data["action"] == "get_question":
-                if not QUESTIONS:
-                    print("ERROR: No questions available!")
-                    await ws.send_json({"error": "No questions available"})
-                    continue
-                
-                q = random.choice(QUESTIONS)
-                print(f"Sending question to {player_id}: {q['question'][:50]}...")
-                await ws.send_json({
-                    "type": "question",
-                    "q": q
-                })
-            
-            elif data["action"] == "answer":
-                if not player_id or player_id not in players:
-                    continue
-                
-                elapsed = time.time() - players[player_id]["start_time"]
-                if elapsed > 60:
-                    players[player_id]["game_active"] = False
-                    print(f"Game over for {player_id} - time expired")
-                    await ws.send_json({
-                        "type": "game_over",
-                        "final_score": players[player_id]["score"],
-                        "time": 60
-                    })
-                    await broadcast_leaderboard()
-                    continue
-                
-                answer = data["answer"].upper()
-                correct = data["correct"].upper()
-                
-                if answer == correct:
-                    players[player_id]["score"] += 1
-                    result = "correct"
-                else:
-                    result = "wrong"
-                
-                print(f"{player_id} answered {result}. Score: {players[player_id]['score']}")
-                
-                await ws.send_json({
-                    "type": "answer_result",
-                    "result": result,
-                    "score": players[player_id]["score"],
-                    "time_left": max(0, 60 - elapsed)
-                })
-                
-                await broadcast_leaderboard()
-            
-            elif data["action"] == "get_leaderboard":
-                await broadcast_leaderboard()
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Всё отбрасываемое отсеивается до разбора JSON и обработчика
+            now = time.monotonic()
+            if not limiter.allow(ANY_ACTION, now):
+                reject(client, RATE_LIMITED, now=now)
+                continue
+            raw = message.get("text")
+            if raw is None:
+                raw = message.get("bytes") or b""
+            if len(raw) > MAX_MESSAGE_SIZE:
+                reject(client, "too_large", "Message too large")
+                continue
+            try:
+                data = loads(raw)
+            except ValueError:
+                reject(client, "malformed", "Malformed JSON")
+                continue
+            action = data.get("action") if isinstance(data, dict) else None
+            entry = HANDLERS.get(action) if isinstance(action, str) else None
+            if entry is None:
+                reject(client, "unknown_action", "Unknown action")
+                continue
+            if not limiter.allow(action, now):
+                reject(client, RATE_LIMITED, now=now)
+                continue
+            handler, validate = entry
+            error = validate(data) if validate is not None else None
+            if error is not None:
+                reject(client, "invalid", error)
+                continue
+            limiter.handled()
+            started = time.perf_counter()
+            try:
+                events(logging.DEBUG, "action", "Received action: %s from %s", action, client.player_id)
+                session = players.get(client.player_id)
+                if session is not None:
+                    players.touch(session)
+                await handler(client, data)
+            finally:
+                message_seconds.labels(action).observe(time.perf_counter() - started)
     
     except WebSocketDisconnect:
-        active_connections.discard(ws)
-        print(f"WebSocket disconnected. Player: {player_id}. Remaining connections: {len(active_connections)}")
+        conn.close()
+        release_session(client.player_id, conn, client.room)
+        log.info("WebSocket disconnected. Player: %s. Remaining connections: %d",
+                 client.player_id, len(active_connections), extra={"event": "disconnect"})
     
     except Exception as e:
-        print(f"WebSocket error: {e}")
-        active_connections.discard(ws)
+        log.exception("WebSocket error: %s", e)
+        conn.close()
+        release_session(client.player_id, conn, client.room)
 
 if __name__ == "__main__":
     import uvicorn
-    print(f"Starting server with {len(QUESTIONS)} questions loaded")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    log.info("Starting server with %d questions loaded", len(default_questions()))
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=WS_DEFLATE)
\ No newline at end of file
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import pathlib
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from dedup import DedupResult, deduplicate
+from snapshot import QuestionStore, discover_banks, load_bank
+
+log = logging.getLogger(__name__)
+
+BankNames = Union[str, Iterable[str]]
+
+
+class BankUnion(Sequence):
+    """Объединение нескольких банков как одна последовательность вопросов."""
+
+    def __init__(self, parts: List[Tuple[str, QuestionStore]]):
+        self.parts = parts
+        self.names = tuple(name for name, _ in parts)
+        self._ends: List[int] = []
+        total = 0
+        for _, store in parts:
+            total += len(store)
+            self._ends.append(total)
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def locate(self, i: int) -> Tuple[str, QuestionStore, int]:
+        """Возвращает (имя банка, банк, индекс внутри банка) для общего индекса."""
+        if not 0 <= i < len(self):
+            raise IndexError("question index out of range")
+        part = bisect_right(self._ends, i)
+        start = self._ends[part - 1] if part else 0
+        name, store = self.parts[part]
+        return name, store, i - start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        _, store, local = self.locate(i)
+        return store[local]
+
+
+class QuestionBank:
+    """Реестр банков вопросов: находит файлы и лениво загружает их с LRU-ограничением.
+
+    Вытесненный из кэша банк остаётся жив, пока на него ссылаются
+    идущие игры, и загружается заново (из снимка) при следующем запросе.
+    merged_name — имя виртуального банка из всех файлов без дубликатов
+    (см. dedup.py). get() его не собирает: он строится build_merged()
+    (в потоке), а пока банки поменялись и новая сборка не готова,
+    отдаётся предыдущая.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[pathlib.Path] = None,
+        max_loaded: int = 4,
+        merged_name: Optional[str] = None,
+    ):
+        if paths is None:
+            paths = discover_banks()
+        self.paths: Dict[str, pathlib.Path] = {path.stem: path for path in paths}
+        self.max_loaded = max(1, max_loaded)
+        self._loaded: "OrderedDict[str, QuestionStore]" = OrderedDict()
+        self._loads: Dict[str, int] = {}
+        self.merged_name = merged_name or None
+        self.merged: Optional[DedupResult] = None
+        self._generation = 0
+        self._merged_generation = -1
+
+    def names(self) -> List[str]:
+        return sorted(self.paths)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.paths or name == self.merged_name
+
+    def get(self, name: str) -> QuestionStore:
+        if name == self.merged_name:
+            if self.merged is None:
+                raise KeyError(f"{name} is not built yet")
+            return self.merged.store
+        store = self._loaded.get(name)
+        if store is not None:
+            self._loaded.move_to_end(name)
+            return store
+        if name not in self.paths:
+            raise KeyError(name)
+        return self._remember(name, self._read(name))
+
+    async def load(self, names: BankNames) -> BankUnion:
+        """То же, что select(), но недостающие банки читаются в потоке.
+
+        Обработчики на цикле событий берут банки только так: чтение и
+        компиляция большого файла не останавливают остальных игроков.
+        """
+        parts = []
+        for name in self.normalize(names):
+            if name == self.merged_name or name in self._loaded:
+                store = self.get(name)
+            else:
+                store = await asyncio.to_thread(self._read, name)
+                # Пока файл читался, банк мог загрузить другой запрос
+                if name in self._loaded:
+                    store = self.get(name)
+                else:
+                    self._remember(name, store)
+            parts.append((name, store))
+        return BankUnion(parts)
+
+    def _read(self, name: str) -> QuestionStore:
+        try:
+            return load_bank(self.paths[name])
+        except FileNotFoundError:
+            # Файл удалили после discover_banks: для клиента это неизвестный банк
+            log.warning("Question bank %s is gone: %s", name, self.paths[name])
+            raise KeyError(name) from None
+
+    def _remember(self, name: str, store: QuestionStore) -> QuestionStore:
+        self._loads[name] = self._loads.get(name, 0) + 1
+        self._loaded[name] = store
+        while len(self._loaded) > self.max_loaded:
+            evicted, _ = self._loaded.popitem(last=False)
+            log.info("Question bank %s evicted from memory", evicted)
+        return store
+
+    def loaded(self, name: str) -> Optional[QuestionStore]:
+        """Загруженная версия банка или None; LRU-порядок не меняет."""
+        return self._loaded.get(name)
+
+    def refresh(self, paths: Iterable[pathlib.Path] = None) -> List[str]:
+        """Подхватывает новые файлы банков, возвращает имена добавленных."""
+        if paths is None:
+            paths = discover_banks()
+        added = []
+        for path in paths:
+            if path.stem not in self.paths:
+                self.paths[path.stem] = path
+                added.append(path.stem)
+        if added:
+            self.invalidate_merged()
+        return added
+
+    def replace(self, name: str, store: QuestionStore):
+        """Атомарно подменяет загруженный банк новой версией."""
+        if name in self._loaded:
+            self._loaded[name] = store
+            self._loads[name] = self._loads.get(name, 0) + 1
+        self.invalidate_merged()
+
+    def invalidate_merged(self):
+        """Отмечает объединённый банк устаревшим; прежний отдаётся до пересборки."""
+        self._generation += 1
+
+    @property
+    def merged_stale(self) -> bool:
+        return self._merged_generation != self._generation
+
+    def build_merged(self) -> DedupResult:
+        """Собирает объединённый банк без дубликатов, если он устарел.
+
+        Долгая операция: вызывать из потока. Если банки поменялись во
+        время сборки, результат всё равно подменяет прежний (он новее),
+        но остаётся устаревшим до следующей сборки.
+        """
+        generation = self._generation
+        merged = self.merged
+        if merged is not None and generation == self._merged_generation:
+            return merged
+        merged = deduplicate(list(self.stores()))
+        current = self.merged
+        if current is None or self._merged_generation < generation:
+            self.merged = merged
+            self._merged_generation = generation
+        log.info("Merged bank %s: %d of %d questions unique, built in %.1f ms",
+                 self.merged_name, len(merged.store), merged.total, merged.elapsed * 1000)
+        return merged
+
+    def stores(self) -> Iterable[Tuple[str, QuestionStore]]:
+        """Все банки по порядку имён; незагруженные читаются из снимка мимо LRU-кэша."""
+        for name in self.names():
+            store = self._loaded.get(name)
+            yield name, store if store is not None else load_bank(self.paths[name])
+
+    def normalize(self, names: BankNames) -> Tuple[str, ...]:
+        """Приводит имя или список имён к кортежу и проверяет, что банки существуют."""
+        if isinstance(names, str):
+            names = [names]
+        result = tuple(dict.fromkeys(str(name) for name in names))
+        if not result:
+            raise KeyError("empty bank selection")
+        for name in result:
+            if name not in self:
+                raise KeyError(name)
+        return result
+
+    def select(self, names: BankNames) -> BankUnion:
+        return BankUnion([(name, self.get(name)) for name in self.normalize(names)])
+
+    def stats(self) -> dict:
+        result = {}
+        for name in self.names():
+            store = self._loaded.get(name)
+            result[name] = {
+                "path": str(self.paths[name]),
+                "loaded": store is not None,
+                "questions": len(store) if store is not None else None,
+                "bytes": store.nbytes if store is not None else 0,
+                "loads": self._loads.get(name, 0),
+            }
+        if self.merged_name:
+            merged = self.merged
+            result[self.merged_name] = {
+                "merged": True,
+                "loaded": merged is not None,
+                "stale": self.merged_stale,
+                "questions": len(merged.store) if merged is not None else None,
+                "bytes": merged.store.nbytes if merged is not None else 0,
+                "duplicates": merged.total - len(merged.store) if merged is not None else None,
+            }
+        return result
@@ -0,0 +1,134 @@
+"""Задержка класса, когда одна вкладка засыпает сервер сообщениями.
+
+Поднимает сервер, играет --players ботами в одной комнате (ответ раз
+в --think секунд, время от ответа до answer_result) и параллельно
+запускает в отдельном процессе одного «спамера»: он без пауз шлёт
+get_leaderboard, get_question и битый JSON пачками по --batch. Прогон
+повторяется с лимитами по умолчанию и с RATE_LIMITS="" (без лимитов),
+плюс контрольный прогон без спамера. Спамер работает, пока сервер его
+не отключит (evictions в выводе).
+
+Запуск из каталога backend:  python bench/bench_abuse.py --players 30 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+import urllib.request
+
+from loadgen import free_port, start_server
+
+
+async def player(url: str, name: str, think: float, until: float, samples: list):
+    import websockets
+
+    rng = random.Random(name)
+    async with websockets.connect(url, max_queue=None) as ws:
+        await ws.send(json.dumps({"action": "register", "name": name, "room": "class", "prefetch": 1}))
+        while '"registered"' not in await ws.recv():
+            pass
+        await ws.send(json.dumps({"action": "get_question"}))
+        while time.monotonic() < until:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"action": "answer", "answer": rng.choice("ABCDE")}))
+            while True:
+                text = await ws.recv()
+                if '"answer_result"' in text:
+                    samples.append(time.perf_counter() - sent)
+                    break
+                if '"game_over"' in text:
+                    return
+
+
+async def spammer(url: str, until: float, batch: int) -> int:
+    import websockets
+
+    sent = 0
+    messages = [
+        json.dumps({"action": "get_leaderboard"}),
+        json.dumps({"action": "get_question"}),
+        "{oops",
+    ]
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            await ws.send(json.dumps({"action": "register", "name": "spammer", "room": "class"}))
+            while time.monotonic() < until:
+                for i in range(batch):
+                    await ws.send(messages[i % len(messages)])
+                sent += batch
+                # Отдаём управление, чтобы клиент вычитывал ответы
+                await asyncio.sleep(0)
+    except Exception:
+        pass
+    return sent
+
+
+def spam_process(url: str, until: float, batch: int, result):
+    result.put(asyncio.run(spammer(url, until, batch)))
+
+
+async def run(url: str, args, abuse: bool):
+    until = time.monotonic() + args.seconds
+    samples = []
+    if abuse:
+        result = multiprocessing.Queue()
+        process = multiprocessing.Process(target=spam_process, args=(url, until, args.batch, result))
+        process.start()
+    await asyncio.gather(*(player(url, f"p{i}", args.think, until, samples) for i in range(args.players)))
+    spam = 0
+    if abuse:
+        spam = result.get()
+        process.join()
+    return samples, spam
+
+
+def describe(samples) -> str:
+    samples = sorted(samples)
+    if not samples:
+        return "no answers"
+
+    def at(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"{len(samples):5d} answers  p50 {at(0.5):7.2f} ms  p99 {at(0.99):7.2f} ms  max {samples[-1] * 1000:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--think", type=float, default=0.5)
+    parser.add_argument("--batch", type=int, default=30, help="сообщений спамера между переключениями")
+    args = parser.parse_args()
+
+    for label, limits, abuse in (
+        ("no spammer", None, False),
+        ("spammer, limits", None, True),
+        ("spammer, no limits", "", True),
+    ):
+        env = {"PERSISTENCE": "0", "LOG_LEVEL": "WARNING", "GAME_DURATION": str(args.seconds + 30)}
+        if limits is not None:
+            env["RATE_LIMITS"] = limits
+        port = free_port()
+        server = start_server(port, 1, env)
+        try:
+            samples, spam = asyncio.run(run(f"ws://127.0.0.1:{port}/ws", args, abuse))
+            metrics = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        finally:
+            server.terminate()
+            server.wait()
+        def total(prefix):
+            return sum(float(line.rsplit(" ", 1)[1]) for line in metrics.splitlines() if line.startswith(prefix))
+
+        evictions = ",".join(
+            line.split('"')[1] for line in metrics.splitlines() if line.startswith("sprint_quiz_evictions_total")
+        )
+        print(f"{label:<20}{describe(samples)}  spam sent {spam:7d}, "
+              f"dropped {total('sprint_quiz_messages_dropped_total'):7.0f}, "
+              f"handled {total('sprint_quiz_message_seconds_count'):7.0f}, evicted: {evictions or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Аналитика по журналу ответов: numpy-расчёт против цикла на Python.
+
+Синтетический журнал: игроки со способностью θ и вопросы со сложностью b,
+вероятность верного ответа 1 / (1 + e^(b - θ)). Каждый 20-й вопрос
+«сломан» — на него отвечают наугад (25% верных при любой способности),
+и индекс дискриминации должен это показать. Записывается через
+AnswerLog.record, как на сервере.
+
+Запуск из каталога backend:  python bench/bench_analytics.py --events 1000000 5000000
+"""
+import argparse
+import math
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+import analytics
+from answers import AnswerLog
+
+
+class Store:
+    """Минимальный банк для AnswerLog.question_id."""
+
+    digest = b"synthetic"
+
+    def __getitem__(self, i):
+        return {"question": f"Question {i}?", "choices": [f"A) {i}", "B) x"], "answer": "A"}
+
+
+def make_log(events: int, questions: int, players: int, seed: int):
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(0, 1, players)
+    difficulty = rng.normal(0, 1.2, questions)
+    broken = np.arange(questions) % 20 == 0
+    q = rng.integers(0, questions, events)
+    p = rng.integers(0, players, events)
+    chance = 1 / (1 + np.exp(difficulty[q] - ability[p]))
+    chance[broken[q]] = 0.25
+    correct = rng.random(events) < chance
+    seconds = rng.gamma(2.0, 4.0, events) * (1 + 0.5 * (difficulty[q] > 0))
+
+    log = AnswerLog(max_events=events)
+    store = Store()
+    qids = [log.question_id("synthetic", store, i) for i in range(questions)]
+    names = [f"player{i}" for i in range(players)]
+    start = time.perf_counter()
+    for qi, pi, ok, sec in zip(q.tolist(), p.tolist(), correct.tolist(), seconds.tolist()):
+        log.record(qids[qi], names[pi], ok, sec)
+    record = (time.perf_counter() - start) / events
+    return log, broken, record
+
+
+def python_compute(log: AnswerLog, group: float = analytics.GROUP):
+    """Тот же расчёт словарями и списками: для сравнения."""
+    per_question = {}
+    per_player = {}
+    for qid, pid, ok, sec in zip(log.questions, log.players, log.correct, log.seconds):
+        per_question.setdefault(qid, []).append((ok, sec, pid))
+        answers = per_player.setdefault(pid, [0, 0])
+        answers[0] += 1
+        answers[1] += ok
+    ranked = sorted(
+        (hits / total, pid) for pid, (total, hits) in per_player.items()
+        if total >= analytics.MIN_PLAYER_ANSWERS
+    )
+    size = int(len(ranked) * group)
+    lower = {pid for _, pid in ranked[:size]}
+    upper = {pid for _, pid in ranked[-size:]} if size else set()
+    result = {}
+    for qid, rows in per_question.items():
+        up = [ok for ok, _, pid in rows if pid in upper]
+        low = [ok for ok, _, pid in rows if pid in lower]
+        result[qid] = (
+            sum(ok for ok, _, _ in rows) / len(rows),
+            statistics.median(sec for _, sec, _ in rows),
+            sum(up) / len(up) - sum(low) / len(low) if up and low else math.nan,
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--questions", type=int, default=1500)
+    parser.add_argument("--players", type=int, default=20000)
+    parser.add_argument("--python-limit", type=int, default=1_000_000,
+                        help="цикл на Python только до стольких событий")
+    args = parser.parse_args()
+
+    for events in args.events:
+        log, broken, record = make_log(events, args.questions, args.players, seed=events)
+        stats = log.stats()
+        start = time.perf_counter()
+        columns = log.snapshot()
+        snapshot = time.perf_counter() - start
+        result = analytics.compute(columns, len(log.question_info), log.total)
+        line = (f"{events:>9} events, {stats['bytes'] / 2**20:6.1f} MiB log, record {record * 1e6:.2f} us/event, "
+                f"snapshot {snapshot * 1000:6.1f} ms, numpy {result.elapsed * 1000:7.1f} ms")
+        if events <= args.python_limit:
+            start = time.perf_counter()
+            reference = python_compute(log)
+            python = time.perf_counter() - start
+            for qid, (accuracy, median, discrimination) in reference.items():
+                assert abs(result.accuracy[qid] - accuracy) < 1e-9
+                assert abs(result.median_seconds[qid] - median) < 1e-3
+                assert (math.isnan(discrimination) and np.isnan(result.discrimination[qid])) \
+                    or abs(result.discrimination[qid] - discrimination) < 1e-9
+            line += f", python {python * 1000:8.1f} ms ({python / result.elapsed:.0f}x)"
+        print(line)
+        print(f"{'':>10}discrimination: broken questions {np.nanmean(result.discrimination[broken]):.3f}, "
+              f"others {np.nanmean(result.discrimination[~broken]):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Дедупликация на синтетических банках в десятки тысяч вопросов.
+
+Базовые вопросы собираются из слов настоящих банков, затем часть из них
+копируется в другие банки: как есть (другой регистр и пунктуация),
+с переставленными вариантами или с опечатками. Известно, какие копии
+от какого вопроса произошли, поэтому считаются точность и полнота по
+парам вопросов, оказавшихся в одной группе.
+
+Запуск из каталога backend:  python bench/bench_dedup.py --questions 20000 40000
+"""
+import argparse
+import pathlib
+import random
+import string
+import sys
+from itertools import combinations
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from banks import QuestionBank
+from dedup import deduplicate
+from search import tokenize
+
+LETTERS = "ABCDE"
+
+
+def vocabulary() -> list:
+    words = set()
+    for _, store in QuestionBank().stores():
+        for i in range(len(store)):
+            words.update(word for word in tokenize(store.question(i)) if len(word) > 2)
+    return sorted(words)
+
+
+def base_question(rng: random.Random, words: list) -> dict:
+    text = " ".join(rng.choices(words, k=rng.randint(7, 16))).capitalize() + "?"
+    options = [" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(rng.randint(4, 5))]
+    return {
+        "question": text,
+        "choices": [f"{LETTERS[i]}) {option}" for i, option in enumerate(options)],
+        "answer": rng.choice(LETTERS[:len(options)]),
+    }
+
+
+def typo(rng: random.Random, text: str) -> str:
+    chars = list(text)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        action = rng.randrange(3)
+        if action == 0:
+            chars[i] = rng.choice(string.ascii_lowercase)
+        elif action == 1 and len(chars) > 1:
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice(string.ascii_lowercase))
+    return "".join(chars)
+
+
+def variant(rng: random.Random, question: dict) -> dict:
+    options = [choice[3:] for choice in question["choices"]]
+    correct = options[LETTERS.index(question["answer"])]
+    text = question["question"]
+    kind = rng.randrange(3)
+    if kind == 0:
+        text = text.upper().rstrip("?") + " ?"
+    elif kind == 1:
+        rng.shuffle(options)
+    else:
+        text = typo(rng, text)
+    return {
+        "question": text,
+        "choices": [f"{LETTERS[i]}) {option}" for i, option in enumerate(options)],
+        "answer": LETTERS[options.index(correct)],
+    }
+
+
+def make_banks(total: int, banks: int, duplicate_rate: float, seed: int):
+    """Банки из total вопросов и номер исходного вопроса для каждого из них."""
+    rng = random.Random(seed)
+    words = vocabulary()
+    result = [[] for _ in range(banks)]
+    origins = {}
+    originals = []
+    for _ in range(total):
+        bank = rng.randrange(banks)
+        if originals and rng.random() < duplicate_rate:
+            origin = rng.randrange(len(originals))
+            question = variant(rng, originals[origin])
+        else:
+            origin = len(originals)
+            question = base_question(rng, words)
+            originals.append(question)
+        origins[(f"bank{bank}", len(result[bank]))] = origin
+        result[bank].append(question)
+    return [(f"bank{i}", questions) for i, questions in enumerate(result)], origins
+
+
+def pairs(groups) -> set:
+    return {pair for group in groups for pair in combinations(sorted(group), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[10000, 20000, 40000])
+    parser.add_argument("--banks", type=int, default=8)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="доля копий среди вопросов")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for total in args.questions:
+        banks, origins = make_banks(total, args.banks, args.duplicates, args.seed)
+        result = deduplicate(banks)
+        truth = {}
+        for source, origin in origins.items():
+            truth.setdefault(origin, []).append(source)
+        expected = pairs(truth.values())
+        found = pairs(result.sources)
+        hits = len(expected & found)
+        precision = hits / len(found) if found else 1.0
+        recall = hits / len(expected) if expected else 1.0
+        print(f"{total:7d} questions -> {len(result.store):7d} unique in {result.elapsed:6.2f} s, "
+              f"precision {precision:.4f} recall {recall:.4f}, {len(result.conflicts)} conflicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Бенчмарк рассылки: JSON-кодирование на каждого клиента против одного кадра на всех.
+
+Запуск из каталога backend:  python bench/bench_frames.py
+"""
+import json
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from frames import JSON_BACKEND, dumps
+
+LEADERBOARD = {
+    "type": "leaderboard",
+    "players": [{"name": f"Игрок {i}", "score": 40 - i} for i in range(10)],
+}
+QUESTION = {
+    "type": "question",
+    "q": {
+        "question": "\"Everything flows\", there is nothing constant in the universe, considered:",
+        "choices": ["A) Thales", "B) Anaximander", "C) Democritus", "D) Heraclitus", "E) Protagoras"],
+        "answer": "D",
+    },
+}
+
+
+def send_json_each(payload, sinks):
+    # Так делает starlette WebSocket.send_json для каждого соединения
+    for sink in sinks:
+        sink.append(json.dumps(payload, separators=(",", ":"), ensure_ascii=False))
+
+
+def send_prepared(payload, sinks):
+    frame = dumps(payload)
+    for sink in sinks:
+        sink.append(frame)
+
+
+def measure(fn, payload, connections, rounds):
+    sinks = [[] for _ in range(connections)]
+    start = time.process_time()
+    for _ in range(rounds):
+        fn(payload, sinks)
+        for sink in sinks:
+            sink.clear()
+    return (time.process_time() - start) / rounds
+
+
+def main():
+    print(f"JSON backend: {JSON_BACKEND}")
+    print(f"{'payload':<12}{'conns':>7}{'per-conn ms':>14}{'once ms':>10}{'speedup':>9}")
+    for name, payload in (("leaderboard", LEADERBOARD), ("question", QUESTION)):
+        for connections in (100, 1_000, 10_000):
+            rounds = max(3, 20_000 // connections)
+            old = measure(send_json_each, payload, connections, rounds)
+            new = measure(send_prepared, payload, connections, rounds)
+            print(f"{name:<12}{connections:>7}{old * 1000:>14.3f}{new * 1000:>10.3f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Логи на горячем пути: print() на каждое сообщение против очереди с потоком-писателем.
+
+Имитирует обработчик WebSocket: на каждое сообщение — строка о полученном
+действии, о выданном вопросе и об ответе, как было раньше. Вывод идёт в
+канал, который читает отдельный процесс (как сборщик логов контейнера);
+вариант unbuffered соответствует PYTHONUNBUFFERED=1, когда каждая строка —
+отдельный системный вызов. С --reader-mbps читатель ограничен по скорости,
+как перегруженный сборщик логов: print() тогда ждёт его прямо в цикле
+событий, а очередь при переполнении теряет записи, но не блокирует.
+
+Запуск из каталога backend:  python bench/bench_logging.py --messages 100000
+"""
+import argparse
+import logging
+import pathlib
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from logs import LogPipeline
+
+
+def run_prints(stream, messages: int, flush: bool) -> float:
+    start = time.perf_counter()
+    for i in range(messages):
+        player = f"player-{i % 500}"
+        print(f"Received action: answer from {player}", file=stream, flush=flush)
+        print(f"Sending question to {player}: \"Everything flows\", there is nothing co...", file=stream, flush=flush)
+        print(f"{player} answered correct. Score: {i % 40}", file=stream, flush=flush)
+    return time.perf_counter() - start
+
+
+def run_pipeline(stream, messages: int, sample: dict) -> tuple:
+    pipeline = LogPipeline("INFO", "json", sample, max_queue=messages * 3 + 1, stream=stream)
+    logger = logging.getLogger("bench")
+    logger.propagate = False
+    pipeline.install(logger)
+    events = pipeline.events(logger)
+    start = time.perf_counter()
+    for i in range(messages):
+        player = f"player-{i % 500}"
+        events(logging.DEBUG, "action", "Received action: %s from %s", "answer", player)
+        events(logging.INFO, "get_question", "Sending question %s#%d to %s", "midterm", i % 186, player,
+               player=player)
+        events(logging.INFO, "answer", "%s answered %s. Score: %d", player, "correct", i % 40,
+               player=player, result="correct")
+    hot = time.perf_counter() - start
+    pipeline.stop()
+    total = time.perf_counter() - start
+    logger.removeHandler(pipeline.handler)
+    return hot, total
+
+
+def start_reader(mbps: float) -> subprocess.Popen:
+    if not mbps:
+        return subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    # Читает по 8 КБ с паузами, чтобы пропускная способность была mbps МБ/с
+    throttled = (
+        "import sys, time\n"
+        f"pause = 8192 / ({mbps} * 1e6)\n"
+        "while sys.stdin.buffer.read1(8192):\n"
+        "    time.sleep(pause)\n"
+    )
+    return subprocess.Popen([sys.executable, "-c", throttled], stdin=subprocess.PIPE, text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--reader-mbps", type=float, default=0.0, help="ограничить скорость читателя, МБ/с")
+    args = parser.parse_args()
+
+    reader = start_reader(args.reader_mbps)
+    stream = reader.stdin
+    buffered = run_prints(stream, args.messages, flush=False)
+    unbuffered = run_prints(stream, args.messages, flush=True)
+    full_hot, full_total = run_pipeline(stream, args.messages, {})
+    sampled_hot, sampled_total = run_pipeline(stream, args.messages, {"get_question": 0.05, "answer": 0.1})
+    stream.close()
+    reader.wait()
+
+    print(f"messages={args.messages} reader={'%g MB/s' % args.reader_mbps if args.reader_mbps else 'cat'}")
+
+    def rate(seconds):
+        return f"{args.messages / seconds:10.0f} messages/sec"
+
+    print(f"print, buffered stdout:        {rate(buffered)}")
+    print(f"print, unbuffered stdout:      {rate(unbuffered)}")
+    print(f"queue, every event:            {rate(full_hot)} on the loop "
+          f"({rate(full_total)} incl. drain)")
+    print(f"queue, sampled 5%/10%:         {rate(sampled_hot)} on the loop "
+          f"({rate(sampled_total)} incl. drain)")
+
+
+if __name__ == "__main__":
+    main()
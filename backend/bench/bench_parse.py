@@ -0,0 +1,130 @@
+"""Разбор банков: прежний re.split по ANSWER: против потокового parse_questions.
+
+Прежний разбор читает файл целиком и режет его на блоки, потоковый идёт
+по строкам открытого файла. Оба прогоняются по найденным банкам и по
+синтетическому банку из --lines строк (вопросы из настоящих банков,
+повторённые по кругу). Пиковая память меряется tracemalloc отдельным
+прогоном: вопросы только считаются, в список не собираются.
+
+Запуск из каталога backend:  python bench/bench_parse.py --lines 1000000
+"""
+import argparse
+import pathlib
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from questions import parse_questions
+from snapshot import discover_banks
+
+
+def split_parse(path: pathlib.Path):
+    """Прежний parse_questions_text: три прохода по копиям текста."""
+    blocks = re.split(r"\bANSWER:", path.read_text(encoding="utf-8"))
+    for i in range(len(blocks) - 1):
+        block_lines = [line.strip() for line in blocks[i].split("\n")]
+        answer_raw = blocks[i + 1].strip().split("\n")[0].strip().upper()
+        question_text = ""
+        choices = []
+        for line in block_lines:
+            if not line:
+                continue
+            if re.match(r"^[A-E]\)", line):
+                choices.append(line)
+                continue
+            if len(line) == 1 and line.upper() in "ABCDE":
+                continue
+            if question_text == "":
+                question_text = line
+        if question_text and choices:
+            yield {"question": question_text, "choices": choices, "answer": answer_raw}
+
+
+def stream_parse(path: pathlib.Path):
+    with path.open(encoding="utf-8", newline="\n") as f:
+        yield from parse_questions(f)
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(parse, path) -> int:
+    tracemalloc.start()
+    sum(1 for _ in parse(path))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def make_synthetic(banks, lines: int) -> pathlib.Path:
+    blocks = []
+    for path in banks:
+        text = path.read_text(encoding="utf-8")
+        blocks.extend(block + "ANSWER:" for block in text.split("ANSWER:")[:-1])
+    target = pathlib.Path(tempfile.mkstemp(suffix=".txt", prefix="bench-parse-")[1])
+    written = 0
+    with target.open("w", encoding="utf-8", newline="\n") as f:
+        while written < lines:
+            for block in blocks:
+                f.write(block)
+                written += block.count("\n")
+                if written >= lines:
+                    break
+        f.write(" A\n")
+    return target
+
+
+def compare(label: str, path: pathlib.Path, repeats: int, memory: bool):
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        lines = sum(1 for _ in f)
+    old = best_of(lambda: sum(1 for _ in split_parse(path)), repeats)
+    new = best_of(lambda: sum(1 for _ in stream_parse(path)), repeats)
+    line = (f"{label:<18}{lines:>9}{size / 2**20:>8.2f}"
+            f"{old * 1000:>11.1f}{new * 1000:>11.1f}{lines / new / 1e6:>9.2f}{old / new:>8.2f}x")
+    if memory:
+        line += f"{peak_memory(split_parse, path) / 2**20:>11.1f}{peak_memory(stream_parse, path) / 2**20:>11.2f}"
+    print(line)
+    return lines, size, old, new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000, help="строк в синтетическом банке")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    banks = discover_banks()
+    for path in banks:
+        # Результат тот же, что у прежнего разбора, плюс номер строки
+        assert list(split_parse(path)) == [
+            {k: v for k, v in q.items() if k != "line"} for q in stream_parse(path)
+        ], path
+    print(f"{'bank':<18}{'lines':>9}{'MiB':>8}{'split ms':>11}{'stream ms':>11}{'Mlines/s':>9}"
+          f"{'speedup':>9}{'split MiB':>11}{'stream MiB':>11}")
+    totals = [0, 0, 0.0, 0.0]
+    for path in banks:
+        for i, value in enumerate(compare(path.name, path, args.repeats * 4, memory=False)):
+            totals[i] += value
+    lines, size, old, new = totals
+    print(f"{'all banks':<18}{lines:>9}{size / 2**20:>8.2f}{old * 1000:>11.1f}{new * 1000:>11.1f}"
+          f"{lines / new / 1e6:>9.2f}{old / new:>8.2f}x")
+    synthetic = make_synthetic(banks, args.lines)
+    try:
+        compare("synthetic", synthetic, args.repeats, memory=True)
+    finally:
+        synthetic.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Бенчмарк пути ответа с записью счёта в SQLite и без неё.
+
+Гоняет то, что делает обработчик answer (обновление индекса рейтинга
+и, при включённой персистентности, постановка события в очередь записи),
+и отдельно меряет, с какой скоростью фоновый поток успевает сбрасывать
+события на диск.
+
+Запуск из каталога backend:  python bench/bench_persistence.py --seconds 3
+"""
+import argparse
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from leaderboard import Leaderboard
+from persistence import ScoreStore
+
+
+def run(seconds: float, players: int, store):
+    board = Leaderboard()
+    scores = [0] * players
+    answers = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        # пакетами, чтобы не мерить сам perf_counter
+        for _ in range(1000):
+            i = random.randrange(players)
+            scores[i] += 1
+            name = f"player-{i}"
+            board.set(name, scores[i])
+            if store is not None:
+                store.record(name, scores[i])
+        answers += 1000
+    return answers / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--batch-ms", type=float, default=50.0)
+    parser.add_argument("--batch-events", type=int, default=500)
+    args = parser.parse_args()
+
+    off = run(args.seconds, args.players, None)
+    print(f"persistence off: {off:12,.0f} answers/sec")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScoreStore(str(pathlib.Path(tmp) / "bench.db"), args.batch_ms, args.batch_events)
+        store.start()
+        on = run(args.seconds, args.players, store)
+        print(f"persistence on:  {on:12,.0f} answers/sec  ({on / off:.0%} of off)")
+
+        start = time.perf_counter()
+        written_before = store.written
+        store.stop(timeout=600)
+        drained = time.perf_counter() - start
+        stats = store.stats()
+        print(f"writer: {stats['written']:,} events in {stats['batches']:,} batches, "
+              f"backlog at stop {stats['queued'] - written_before:,} drained in {drained:.2f}s")
+        sustained = stats["written"] / (args.seconds + drained)
+        print(f"sustained disk throughput: {sustained:12,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
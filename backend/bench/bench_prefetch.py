@@ -0,0 +1,112 @@
+"""Сравнение темпа игры: запрос вопроса после ответа против предзагрузки (prefetch).
+
+Поднимает сервер на свободном порту и играет спринт ботом, который ведёт себя
+как браузерный клиент: 800 мс показывает результат, думает think секунд,
+а каждое сообщение задерживает на половину RTT в каждую сторону.
+
+Запуск из каталога backend:  python bench/bench_prefetch.py --rtt 0.3 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+FEEDBACK_DELAY = 0.8
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, duration: float):
+    os.environ["GAME_DURATION"] = str(duration)
+    os.environ.setdefault("BANK_RELOAD_INTERVAL", "0")
+    import uvicorn
+    import app as app_module
+
+    server = uvicorn.Server(uvicorn.Config(app_module.app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def play(url: str, name: str, prefetch: int, rtt: float, think: float, duration: float) -> int:
+    import websockets
+
+    half = rtt / 2
+    async with websockets.connect(url) as ws:
+        async def send(message):
+            await asyncio.sleep(half)
+            await ws.send(json.dumps(message))
+
+        async def receive(kind):
+            while True:
+                data = json.loads(await ws.recv())
+                if data.get("type") == kind or data.get("status") == kind:
+                    await asyncio.sleep(half)
+                    return data
+
+        register = {"action": "register", "name": name}
+        if prefetch:
+            register["prefetch"] = prefetch
+        await send(register)
+        await receive("registered")
+        await send({"action": "start_game"})
+        started = time.perf_counter()
+        await send({"action": "get_question"})
+        queue = [(await receive("question"))["q"]]
+        answered = 0
+        while time.perf_counter() - started < duration:
+            await asyncio.sleep(think)
+            await send({"action": "answer", "answer": "A"})
+            result = await receive("answer_result")
+            if time.perf_counter() - started > duration:
+                break
+            answered += 1
+            queue.pop(0)
+            queue.extend(result.get("next", []))
+            await asyncio.sleep(FEEDBACK_DELAY)
+            if not queue:
+                await send({"action": "get_question"})
+                queue.append((await receive("question"))["q"])
+        return answered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt", type=float, default=0.3, help="round trip, секунды")
+    parser.add_argument("--think", type=float, default=1.0, help="время на ответ, секунды")
+    parser.add_argument("--duration", type=float, default=20.0, help="длина спринта, секунды")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, args.duration + 5)
+    url = f"ws://127.0.0.1:{port}/ws"
+
+    async def run():
+        return await asyncio.gather(
+            play(url, "bench-legacy", 0, args.rtt, args.think, args.duration),
+            play(url, "bench-prefetch", 1, args.rtt, args.think, args.duration),
+        )
+
+    legacy, prefetch = asyncio.run(run())
+    server.should_exit = True
+    per_minute = 60.0 / args.duration
+    print(f"rtt={args.rtt}s think={args.think}s sprint={args.duration}s")
+    print(f"get_question after answer: {legacy * per_minute:6.1f} questions/min")
+    print(f"prefetch=1:                {prefetch * per_minute:6.1f} questions/min")
+
+
+if __name__ == "__main__":
+    main()
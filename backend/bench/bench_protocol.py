@@ -0,0 +1,128 @@
+"""Байты на игру: обычный JSON-протокол против компактного (proto=2).
+
+Поднимает сервер и играет в одной комнате --players ботами партию
+длиной --game секунд: register с prefetch, start_game, get_question и
+ответы с паузой --think. Считаются байты всех кадров, пришедших
+каждому игроку, и отдельно — сколько они заняли бы с permessage-deflate
+(zlib с общим контекстом на соединение, как делает расширение при
+context takeover).
+
+Запуск из каталога backend:  python bench/bench_protocol.py --players 30 --game 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import zlib
+
+from loadgen import free_port, start_server
+
+
+class Counter:
+    def __init__(self):
+        self.frames = 0
+        self.raw = 0
+        self.deflated = 0
+        self.by_kind = {}
+        self._zlib = zlib.compressobj(6, zlib.DEFLATED, -15)
+
+    def add(self, text: str, kind: str):
+        data = text.encode()
+        self.frames += 1
+        self.raw += len(data)
+        # Как в permessage-deflate: sync flush и без хвоста 00 00 ff ff
+        self.deflated += len(self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)) - 4
+        frames, size = self.by_kind.get(kind, (0, 0))
+        self.by_kind[kind] = (frames + 1, size + len(data))
+
+
+def kind_of(text: str) -> str:
+    data = json.loads(text)
+    if isinstance(data, list):
+        return {0: "error", 1: "registered", 2: "game_started", 3: "question", 4: "answer_result",
+                5: "leaderboard", 6: "leaderboard", 7: "game_over"}[data[0]]
+    return data.get("type") or data.get("status") or "error"
+
+
+async def player(url: str, name: str, room: str, proto: int, think: float, seed: int) -> Counter:
+    import websockets
+
+    rng = random.Random(seed)
+    counter = Counter()
+    async with websockets.connect(url, compression=None, max_queue=None) as ws:
+
+        async def receive(*kinds):
+            while True:
+                text = await ws.recv()
+                kind = kind_of(text)
+                counter.add(text, kind)
+                if kind in kinds:
+                    return kind
+
+        register = {"action": "register", "name": name, "room": room, "prefetch": 1}
+        if proto == 2:
+            register["proto"] = 2
+        await ws.send(json.dumps(register))
+        await receive("registered")
+        await ws.send(json.dumps({"action": "get_question"}))
+        await receive("question")
+        while True:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+            await ws.send(json.dumps({"action": "answer", "answer": rng.choice("ABCDE")}))
+            if await receive("answer_result", "game_over") == "game_over":
+                break
+        # Финальный рейтинг приходит следом за game_over
+        try:
+            while True:
+                counter.add(text := await asyncio.wait_for(ws.recv(), 0.5), kind_of(text))
+        except asyncio.TimeoutError:
+            pass
+    return counter
+
+
+async def play(url: str, proto: int, args) -> list:
+    room = f"proto-{proto}-{random.randrange(1 << 30)}"
+    return await asyncio.gather(*(
+        player(url, f"p{i}", room, proto, args.think, seed=i) for i in range(args.players)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--game", type=float, default=20.0, help="длительность партии, секунды")
+    parser.add_argument("--think", type=float, default=0.3)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, 1, {
+        "GAME_DURATION": str(args.game), "PERSISTENCE": "0", "LOG_LEVEL": "WARNING",
+    })
+    try:
+        url = f"ws://127.0.0.1:{port}/ws"
+        results = {proto: asyncio.run(play(url, proto, args)) for proto in (1, 2)}
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"players={args.players} game={args.game:g}s think={args.think:g}s, per player per game:")
+    for proto, label in ((1, "json"), (2, "compact")):
+        counters = results[proto]
+        n = len(counters)
+        frames = sum(c.frames for c in counters) / n
+        raw = sum(c.raw for c in counters) / n
+        deflated = sum(c.deflated for c in counters) / n
+        print(f"{label:>8}: {frames:7.1f} frames {raw / 1024:8.1f} KiB raw {deflated / 1024:8.1f} KiB deflate")
+        kinds = {}
+        for c in counters:
+            for kind, (count, size) in c.by_kind.items():
+                total = kinds.setdefault(kind, [0, 0])
+                total[0] += count
+                total[1] += size
+        for kind, (count, size) in sorted(kinds.items(), key=lambda item: -item[1][1]):
+            print(f"{'':>10}{kind:>14}: {count / n:7.1f} frames {size / n / 1024:8.1f} KiB, "
+                  f"{size / count:6.1f} B/frame")
+
+
+if __name__ == "__main__":
+    main()
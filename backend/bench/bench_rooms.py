@@ -0,0 +1,65 @@
+"""Цена рассылки рейтинга: одна общая группа против комнат по размеру класса.
+
+Одно изменение счёта в общей группе рассылается всем подключённым,
+в комнате — только её участникам. Соединения здесь не пишут в сокет,
+измеряется постановка кадров в очереди.
+
+Запуск из каталога backend:  python bench/bench_rooms.py --connections 3000 --room-size 30
+"""
+import argparse
+import asyncio
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from connections import Connection, ConnectionManager
+from rooms import RoomRegistry
+
+
+def populate(registry: RoomRegistry, manager: ConnectionManager, connections: int, room_size: int):
+    rooms = []
+    for i in range(connections):
+        if room_size:
+            room = registry.open(f"class-{i // room_size}", ("midterm",), 60.0)
+        else:
+            room = registry.default
+        conn = Connection(None, manager)
+        room.join(conn)
+        room.leaderboard.set(f"player-{i}", i % 40)
+        if room not in rooms:
+            rooms.append(room)
+    return rooms
+
+
+async def measure(connections: int, room_size: int, updates: int) -> tuple:
+    registry = RoomRegistry("lobby", ("midterm",), 60.0, max_rooms=connections + 1)
+    rooms = populate(registry, ConnectionManager(), connections, room_size)
+    frames = 0
+    start = time.perf_counter()
+    for n in range(updates):
+        room = rooms[n % len(rooms)]
+        name, score = room.leaderboard.top(1)[0]
+        room.leaderboard.set(name, score + 1)
+        frames += await room._broadcast(room.snapshot())
+    elapsed = time.perf_counter() - start
+    await registry.stop()
+    return elapsed, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=3000)
+    parser.add_argument("--room-size", type=int, default=30)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    for label, size in (("global group", 0), (f"rooms of {args.room_size}", args.room_size)):
+        elapsed, frames = asyncio.run(measure(args.connections, size, args.updates))
+        print(f"{label:>14}: {elapsed / args.updates * 1e6:9.1f} us/update, "
+              f"{frames / args.updates:7.1f} frames/update")
+
+
+if __name__ == "__main__":
+    main()
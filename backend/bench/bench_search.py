@@ -0,0 +1,76 @@
+"""Поиск вопроса по всем банкам: обратный индекс против перебора.
+
+Запросы берутся из самих банков: 1–3 слова случайного вопроса, последнее
+обрезано до префикса, как при наборе. Перебор сверяет каждое слово
+запроса с нормализованным текстом вопроса и вариантов (как grep по файлам).
+
+Запуск из каталога backend:  python bench/bench_search.py --queries 2000
+"""
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from banks import QuestionBank
+from search import SearchIndex, linear_search, tokenize
+
+
+def make_queries(banks, count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    texts = [store.question(i) for _, store in banks for i in range(len(store))]
+    queries = []
+    while len(queries) < count:
+        words = tokenize(rng.choice(texts))
+        if not words:
+            continue
+        start = rng.randrange(len(words))
+        picked = words[start:start + rng.randint(1, 3)]
+        last = picked[-1]
+        picked[-1] = last[:max(2, rng.randint(len(last) // 2, len(last)))]
+        queries.append(" ".join(picked))
+    return queries
+
+
+def timed(fn, queries) -> list:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples
+
+
+def describe(samples) -> str:
+    def at(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    return f"p50 {at(0.5):8.1f} us  p99 {at(0.99):8.1f} us  max {samples[-1] * 1e6:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    banks = list(QuestionBank().stores())
+    index = SearchIndex.build(banks)
+    queries = make_queries(banks, args.queries, args.seed)
+    # Индекс только что построен: кеш слияний префиксов пуст и наполняется по ходу
+    index_samples = timed(lambda q: index.search(q, args.limit), queries)
+    found = sum(bool(index.search(query, args.limit)) for query in queries)
+
+    stats = index.stats()
+    print(f"{stats['documents']} questions, {stats['terms']} terms, index built in {stats['build_ms']:.1f} ms")
+    print(f"{len(queries)} queries, {found} with results")
+    print(f"  index:  {describe(index_samples)}")
+    print(f"  linear: {describe(timed(lambda q: linear_search(banks, q, args.limit), queries[:200]))}"
+          f"  (first 200 queries)")
+
+
+if __name__ == "__main__":
+    main()
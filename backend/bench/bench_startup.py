@@ -0,0 +1,43 @@
+"""Бенчмарк загрузки банков: разбор .txt против чтения бинарного снимка.
+
+Запуск из каталога backend:  python bench/bench_startup.py
+"""
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from questions import parse_questions_text
+from snapshot import compile_bank, discover_banks, load_bank
+
+REPEATS = 20
+
+
+def best_of(fn, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    banks = discover_banks()
+    for source in banks:
+        compile_bank(source)
+
+    print(f"{'bank':<16}{'questions':>10}{'parse ms':>10}{'snapshot ms':>13}{'speedup':>9}")
+    total_parse = total_load = 0.0
+    for source in banks:
+        parse = best_of(lambda: parse_questions_text(source.read_text(encoding="utf-8")))
+        load = best_of(lambda: load_bank(source))
+        total_parse += parse
+        total_load += load
+        print(f"{source.name:<16}{len(load_bank(source)):>10}{parse * 1000:>10.3f}{load * 1000:>13.3f}{parse / load:>8.1f}x")
+    print(f"{'total':<16}{'':>10}{total_parse * 1000:>10.3f}{total_load * 1000:>13.3f}{total_parse / total_load:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Время до первого вопроса (TTFQ): встроенная страница с Babel в браузере против собранного бандла.
+
+Для каждого варианта поднимается сервер, затем как браузер с холодным
+кешем: GET / , все скрипты и стили со страницы, WebSocket register →
+start_game → get_question до первого вопроса. Повторный визит — с
+If-None-Match, а ассеты с immutable не запрашиваются вовсе.
+Время загрузки пересчитывается на канал --mbps/--rtt-ms; компиляцию JSX
+в браузере скрипт не измеряет (её нет только у бандла), поэтому для
+встроенной страницы результат — нижняя оценка.
+
+Ресурсы с CDN (React, Babel, Tailwind) качаются только с --online.
+
+Запуск из каталога backend (бандл — после npm run build во frontend/):
+    python bench/bench_ttfq.py --mbps 10 --rtt-ms 50 --online
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import re
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from loadgen import BACKEND_DIR, free_port, start_server
+
+ASSET = re.compile(r"""<(?:script[^>]*\bsrc|link[^>]*\bhref)=["']([^"']+)["']""")
+DEFAULT_BUILD = BACKEND_DIR.parent / "frontend" / "build"
+
+
+def fetch(url: str, headers: dict) -> tuple:
+    """Код ответа, заголовки и число байт на проводе (тело не распаковывается)."""
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, b""
+
+
+async def first_question(ws_url: str) -> float:
+    import websockets
+
+    start = time.perf_counter()
+    async with websockets.connect(ws_url) as ws:
+        await ws.send(json.dumps({"action": "register", "name": f"ttfq-{os.getpid()}", "prefetch": 1}))
+        await ws.send(json.dumps({"action": "start_game"}))
+        await ws.send(json.dumps({"action": "get_question"}))
+        while json.loads(await ws.recv()).get("type") != "question":
+            pass
+    return time.perf_counter() - start
+
+
+def visit(base: str, online: bool, cache: dict) -> dict:
+    """Один визит браузера; cache — ETag и immutable-ассеты с прошлого визита."""
+    accept = {"Accept-Encoding": "br, gzip"}
+    requests = transferred = 0
+    skipped_external = []
+    started = time.perf_counter()
+
+    headers = dict(accept)
+    if "/" in cache:
+        headers["If-None-Match"] = cache["/"]
+    status, response_headers, body = fetch(base + "/", headers)
+    requests += 1
+    transferred += len(body)
+    if status == 200:
+        cache["/"] = response_headers.get("ETag", "")
+        cache["html"] = body
+    html = cache["html"]
+    if response_headers.get("Content-Encoding") == "br":
+        import brotli
+        html = brotli.decompress(html)
+    elif response_headers.get("Content-Encoding") == "gzip":
+        import gzip
+        html = gzip.decompress(html)
+
+    for src in ASSET.findall(html.decode("utf-8", "replace")):
+        url = urllib.parse.urljoin(base + "/", src)
+        if not url.startswith(base) and not online:
+            skipped_external.append(url)
+            continue
+        if cache.get(url) == "immutable":
+            continue
+        headers = dict(accept)
+        if url in cache:
+            headers["If-None-Match"] = cache[url]
+        status, response_headers, body = fetch(url, headers)
+        requests += 1
+        transferred += len(body)
+        if "immutable" in response_headers.get("Cache-Control", ""):
+            cache[url] = "immutable"
+        elif response_headers.get("ETag"):
+            cache[url] = response_headers["ETag"]
+
+    page = time.perf_counter() - started
+    question = asyncio.run(first_question(base.replace("http", "ws", 1) + "/ws"))
+    return {
+        "requests": requests,
+        "bytes": transferred,
+        "local_seconds": page + question,
+        "question_seconds": question,
+        "skipped_external": skipped_external,
+    }
+
+
+def modelled(result: dict, mbps: float, rtt_ms: float) -> float:
+    """TTFQ на заданном канале: передача байт, RTT на страницу, ещё один на ассеты
+    (браузер качает их параллельно) и 2 RTT на WebSocket.
+    """
+    transfer = result["bytes"] * 8 / (mbps * 1e6)
+    rounds = 1 + (result["requests"] > 1) + 2
+    return transfer + rounds * rtt_ms / 1000 + result["local_seconds"]
+
+
+def measure(label: str, build: str, args) -> None:
+    port = free_port()
+    server = start_server(port, 1, {"FRONTEND_BUILD": build, "PERSISTENCE": "0", "LOG_LEVEL": "WARNING"})
+    try:
+        base = f"http://127.0.0.1:{port}"
+        cache = {}
+        cold = visit(base, args.online, cache)
+        warm = visit(base, args.online, cache)
+    finally:
+        server.terminate()
+        server.wait()
+    for name, result in (("cold", cold), ("repeat", warm)):
+        print(f"{label:>7} {name:>6}: {result['requests']:3d} requests {result['bytes'] / 1024:9.1f} KiB  "
+              f"local {result['local_seconds'] * 1000:7.1f} ms  "
+              f"at {args.mbps:g} Mbit/s + {args.rtt_ms:g} ms RTT: {modelled(result, args.mbps, args.rtt_ms) * 1000:8.1f} ms")
+    if cold["skipped_external"]:
+        print(f"{'':>15} not fetched (use --online): {', '.join(cold['skipped_external'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--build", default=str(DEFAULT_BUILD), help="каталог npm run build")
+    parser.add_argument("--mbps", type=float, default=10.0)
+    parser.add_argument("--rtt-ms", type=float, default=50.0)
+    parser.add_argument("--online", action="store_true", help="качать и ресурсы с CDN")
+    args = parser.parse_args()
+
+    measure("inline", "/nonexistent", args)
+    if pathlib.Path(args.build, "index.html").is_file():
+        measure("bundle", args.build, args)
+    else:
+        print(f"{'bundle':>7}: no build at {args.build}, run npm run build in frontend/", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Нагрузочный тест нескольких воркеров с общим рейтингом (STATE_BACKEND=shm).
+
+Для каждого числа воркеров поднимает ``uvicorn app:app --workers N``,
+подключает clients игроков из нескольких клиентских процессов, каждый
+отвечает на answers вопросов без пауз. Затем наблюдатели, попавшие на
+разные воркеры, запрашивают рейтинг — все снимки должны совпасть.
+
+Запуск из каталога backend:  python bench/bench_workers.py --workers 1 2 4 --clients 400
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        STATE_BACKEND="shm",
+        STATE_NAMESPACE=f"sprint-quiz-bench-{port}",
+        PERSISTENCE="0",
+        BANK_RELOAD_INTERVAL="0",
+        GAME_DURATION="600",
+        RATE_LIMITS="",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    pids = set()
+    deadline = time.monotonic() + 30
+    while len(pids) < workers and time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+                pids.add(json.load(response)["shared_state"]["pid"])
+        except OSError:
+            time.sleep(0.1)
+    return server
+
+
+async def player(url: str, name: str, answers: int):
+    import websockets
+
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"action": "register", "name": name, "prefetch": 1}))
+        await ws.send(json.dumps({"action": "get_question"}))
+        done = 0
+        while done < answers:
+            data = json.loads(await ws.recv())
+            if data.get("type") == "question":
+                await ws.send(json.dumps({"action": "answer", "answer": "A"}))
+            elif data.get("type") == "answer_result":
+                done += 1
+                if done < answers and not data.get("next"):
+                    await ws.send(json.dumps({"action": "get_question"}))
+                elif done < answers:
+                    await ws.send(json.dumps({"action": "answer", "answer": "A"}))
+
+
+def client_process(url: str, names: list, answers: int, out):
+    async def run():
+        return await asyncio.gather(*(player(url, name, answers) for name in names))
+
+    asyncio.run(run())
+    out.put(len(names) * answers)
+
+
+async def observe(url: str, observers: int) -> list:
+    import websockets
+
+    async def one(i):
+        async with websockets.connect(url) as ws:
+            await ws.send(json.dumps({"action": "get_leaderboard"}))
+            while True:
+                data = json.loads(await ws.recv())
+                if data.get("type") == "leaderboard":
+                    return [(p["name"], p["score"]) for p in data["players"]]
+
+    return await asyncio.gather(*(one(i) for i in range(observers)))
+
+
+def run_round(workers: int, clients: int, answers: int, procs: int) -> dict:
+    port = free_port()
+    server = start_server(port, workers)
+    url = f"ws://127.0.0.1:{port}/ws"
+    try:
+        names = [f"bot-{workers}-{i}" for i in range(clients)]
+        out = multiprocessing.Queue()
+        started = time.perf_counter()
+        children = [
+            multiprocessing.Process(target=client_process, args=(url, names[i::procs], answers, out))
+            for i in range(procs)
+        ]
+        for child in children:
+            child.start()
+        total = sum(out.get() for _ in children)
+        for child in children:
+            child.join()
+        elapsed = time.perf_counter() - started
+        # Даём ретрансляции и тику рассылки догнать последние ответы
+        time.sleep(1.0)
+        snapshots = asyncio.run(observe(url, workers * 4))
+        served_by = set()
+        for _ in range(workers * 8):
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+                served_by.add(json.load(response)["shared_state"]["pid"])
+        return {
+            "workers": workers,
+            "answers_per_sec": total / elapsed,
+            "elapsed": elapsed,
+            "consistent": all(s == snapshots[0] for s in snapshots),
+            "workers_seen": len(served_by),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=400, help="игроков за прогон")
+    parser.add_argument("--answers", type=int, default=20, help="ответов на игрока")
+    parser.add_argument("--client-procs", type=int, default=2, help="процессов-генераторов нагрузки")
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} answers={args.answers}")
+    baseline = None
+    for workers in args.workers:
+        result = run_round(workers, args.clients, args.answers, args.client_procs)
+        baseline = baseline or result["answers_per_sec"]
+        print(f"workers={workers}: {result['answers_per_sec']:8.0f} answers/sec "
+              f"(x{result['answers_per_sec'] / baseline:.2f}), "
+              f"leaderboard consistent={result['consistent']} "
+              f"across {result['workers_seen']} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""Генератор нагрузки на /ws: N игроков проходят настоящий цикл игры.
+
+Каждый бот делает register → start_game → (get_question → answer)…
+с паузой «на размышление», а после game_over начинает новую игру.
+Отчёт: перцентили задержки ответов и выдачи вопросов, ответы в секунду,
+задержка рассылки рейтинга (от изменения счёта до ближайшего кадра
+рейтинга) и CPU/память сервера. С --out пишет JSON-отчёт, который
+можно сравнить с прошлым через --compare.
+
+Запуск из каталога backend:
+    python bench/loadgen.py --players 200 --duration 30 --think 0.5 --out report.json
+    python bench/loadgen.py --url ws://host:8000/ws --players 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from array import array
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+# Пауза перед повтором запроса, отклонённого по лимиту сообщений
+RETRY_DELAY = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: dict) -> subprocess.Popen:
+    env = dict(os.environ, **env)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats").close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def process_tree(pid: int) -> list:
+    """pid процесса и всех его потомков (воркеры uvicorn)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except OSError:
+                continue
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def sample_usage(pid: int) -> tuple:
+    """Суммарное процессорное время (с) и RSS (байты) сервера со всеми воркерами."""
+    cpu = rss = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{member}/statm") as f:
+                rss += int(f.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return cpu, rss
+
+
+class Recorder:
+    __slots__ = ("answer_rtt", "question_rtt", "broadcast_lag", "answers", "games", "errors", "rate_limited")
+
+    def __init__(self):
+        self.answer_rtt = array("d")
+        self.question_rtt = array("d")
+        self.broadcast_lag = array("d")
+        self.answers = 0
+        self.games = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+
+async def player(url: str, name: str, args, deadline: float, rec: Recorder):
+    import websockets
+
+    async with websockets.connect(url, max_queue=None) as ws:
+        changed_at = None
+
+        async def receive(*kinds):
+            nonlocal changed_at
+            while True:
+                data = json.loads(await ws.recv())
+                kind = data.get("type") or data.get("status") or ("error" if "error" in data else None)
+                if kind == "leaderboard" and changed_at is not None:
+                    rec.broadcast_lag.append(time.perf_counter() - changed_at)
+                    changed_at = None
+                if kind == "error":
+                    # Отказ по лимиту — ответ на наш запрос: повторяем его
+                    if data["error"] == "rate_limited":
+                        rec.rate_limited += 1
+                        return data
+                    rec.errors += 1
+                if kind in kinds:
+                    return data
+
+        register = {"action": "register", "name": name}
+        if args.room_size:
+            register["room"] = f"load-{int(name.rsplit('-', 1)[1]) // args.room_size}"
+        await ws.send(json.dumps(register))
+        await receive("registered")
+        while time.perf_counter() < deadline:
+            await ws.send(json.dumps({"action": "start_game"}))
+            await receive("game_started")
+            rec.games += 1
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                await ws.send(json.dumps({"action": "get_question"}))
+                if "error" in await receive("question"):
+                    await asyncio.sleep(RETRY_DELAY)
+                    continue
+                rec.question_rtt.append(time.perf_counter() - sent)
+                if args.think:
+                    await asyncio.sleep(random.uniform(0.5, 1.5) * args.think)
+                while True:
+                    sent = time.perf_counter()
+                    await ws.send(json.dumps({"action": "answer", "answer": random.choice("ABCDE")}))
+                    result = await receive("answer_result", "game_over")
+                    if "error" not in result:
+                        break
+                    await asyncio.sleep(RETRY_DELAY)
+                if result.get("type") == "game_over":
+                    break
+                rec.answer_rtt.append(time.perf_counter() - sent)
+                # Пропускная способность считается только после разгона
+                if sent >= deadline - args.duration:
+                    rec.answers += 1
+                if result.get("result") == "correct":
+                    changed_at = time.perf_counter()
+
+
+def client_process(url: str, names: list, args, start_at: float, out):
+    rec = Recorder()
+
+    async def run():
+        # Подключения растягиваются на ramp секунд, чтобы не упереться в backlog accept()
+        async def delayed(i, name):
+            await asyncio.sleep(args.ramp * i / max(1, len(names)))
+            try:
+                await player(url, name, args, deadline, rec)
+            except Exception:
+                rec.errors += 1
+
+        await asyncio.gather(*(delayed(i, name) for i, name in enumerate(names)))
+
+    deadline = start_at + args.ramp + args.duration
+    asyncio.run(run())
+    out.put({
+        "answer_rtt": rec.answer_rtt.tobytes(),
+        "question_rtt": rec.question_rtt.tobytes(),
+        "broadcast_lag": rec.broadcast_lag.tobytes(),
+        "answers": rec.answers,
+        "games": rec.games,
+        "errors": rec.errors,
+        "rate_limited": rec.rate_limited,
+    })
+
+
+def percentiles(samples: array) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port, args.workers, {
+            "GAME_DURATION": str(args.game_duration),
+            "PERSISTENCE": "1" if args.persistence else "0",
+            "LOG_LEVEL": "WARNING",
+            "BANK_RELOAD_INTERVAL": "0",
+            "RATE_LIMITS": args.rate_limits,
+        })
+        url = f"ws://127.0.0.1:{port}/ws"
+    try:
+        names = [f"load-{i}" for i in range(args.players)]
+        out = multiprocessing.Queue()
+        start_at = time.perf_counter()
+        usage_before = sample_usage(server.pid) if server else None
+        children = [
+            multiprocessing.Process(target=client_process, args=(url, names[i::args.procs], args, start_at, out))
+            for i in range(args.procs)
+        ]
+        for child in children:
+            child.start()
+        peak_rss = 0
+        parts = []
+        while len(parts) < len(children):
+            try:
+                parts.append(out.get(timeout=0.5))
+            except Exception:
+                pass
+            if server:
+                peak_rss = max(peak_rss, sample_usage(server.pid)[1])
+        for child in children:
+            child.join()
+        elapsed = time.perf_counter() - start_at
+        usage_after = sample_usage(server.pid) if server else None
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    merged = {key: array("d") for key in ("answer_rtt", "question_rtt", "broadcast_lag")}
+    for part in parts:
+        for key, samples in merged.items():
+            samples.frombytes(part[key])
+    answers = sum(part["answers"] for part in parts)
+    report = {
+        "revision": git_revision(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "players": args.players,
+            "duration": args.duration,
+            "think": args.think,
+            "ramp": args.ramp,
+            "procs": args.procs,
+            "workers": args.workers if server else None,
+            "room_size": args.room_size,
+            "rate_limits": args.rate_limits if server else None,
+            "url": args.url or "spawned",
+            "cpus": os.cpu_count(),
+        },
+        "answers_after_ramp": answers,
+        "answers_per_sec": round(answers / args.duration, 1),
+        "games": sum(part["games"] for part in parts),
+        "errors": sum(part["errors"] for part in parts),
+        "rate_limited": sum(part["rate_limited"] for part in parts),
+        "answer_rtt": percentiles(merged["answer_rtt"]),
+        "question_rtt": percentiles(merged["question_rtt"]),
+        "broadcast_lag": percentiles(merged["broadcast_lag"]),
+        "server": None,
+    }
+    if server:
+        cpu = usage_after[0] - usage_before[0]
+        report["server"] = {
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(cpu / elapsed * 100, 1),
+            "rss_peak_mb": round(peak_rss / 2 ** 20, 1),
+        }
+    return report
+
+
+def compare(old: dict, new: dict):
+    rows = [
+        ("answers_per_sec", ("answers_per_sec",)),
+        ("answer p50 ms", ("answer_rtt", "p50_ms")),
+        ("answer p95 ms", ("answer_rtt", "p95_ms")),
+        ("answer p99 ms", ("answer_rtt", "p99_ms")),
+        ("question p99 ms", ("question_rtt", "p99_ms")),
+        ("broadcast p95 ms", ("broadcast_lag", "p95_ms")),
+        ("server cpu %", ("server", "cpu_percent")),
+        ("server rss MB", ("server", "rss_peak_mb")),
+    ]
+    print(f"{'':18} {old.get('revision', 'old'):>14} {new.get('revision', 'new'):>14}   change")
+    for label, path in rows:
+        a, b = old, new
+        for key in path:
+            a = (a or {}).get(key)
+            b = (b or {}).get(key)
+        change = f"{(b - a) / a * 100:+.1f}%" if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a else ""
+        print(f"{label:18} {str(a):>14} {str(b):>14}   {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20.0, help="секунды нагрузки после разгона")
+    parser.add_argument("--think", type=float, default=0.5, help="средняя пауза перед ответом, секунды")
+    parser.add_argument("--ramp", type=float, default=2.0, help="за сколько секунд подключить всех")
+    parser.add_argument("--procs", type=int, default=2, help="клиентских процессов")
+    parser.add_argument("--room-size", type=int, default=0, help="рассадить игроков по комнатам такого размера")
+    parser.add_argument("--url", help="готовый сервер вместо запуска локального")
+    parser.add_argument("--workers", type=int, default=1, help="воркеров uvicorn у локального сервера")
+    parser.add_argument("--game-duration", type=float, default=60.0)
+    parser.add_argument("--rate-limits", default="",
+                        help="RATE_LIMITS локального сервера (по умолчанию без лимитов: меряется сервер)")
+    parser.add_argument("--persistence", action="store_true", help="писать счета в SQLite")
+    parser.add_argument("--out", help="куда записать JSON-отчёт")
+    parser.add_argument("--compare", help="сравнить с прошлым JSON-отчётом")
+    args = parser.parse_args()
+    if args.workers > 1:
+        os.environ.setdefault("STATE_BACKEND", "shm")
+
+    report = run(args)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    if args.compare:
+        compare(json.loads(pathlib.Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+
+class LeaderboardBroadcaster:
+    """Фоновая рассылка рейтинга: склеивает обновления в тики с частотой rate_hz.
+
+    Обработчики сообщений только помечают рейтинг «грязным»; задача
+    раз в тик берёт снимок и рассылает его, если топ изменился.
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], Any],
+        send: Callable[[Any], Awaitable[int]],
+        rate_hz: float = 4.0,
+        observe: Optional[Callable[[float, int], None]] = None,
+    ):
+        self._snapshot = snapshot
+        self._send = send
+        # Колбэк для метрик: (длительность рассылки в секундах, число адресатов)
+        self._observe = observe
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self._dirty = asyncio.Event()
+        self._last = None
+        self._task: Optional[asyncio.Task] = None
+        self.marks = 0
+        self.ticks = 0
+        self.skipped_unchanged = 0
+        self.messages_requested = 0
+        self.messages_sent = 0
+
+    def mark_dirty(self, recipients: int = 0):
+        """Помечает рейтинг изменённым; recipients — сколько сообщений ушло бы без склейки."""
+        self.marks += 1
+        self.messages_requested += recipients
+        self._dirty.set()
+
+    async def run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            self.ticks += 1
+            try:
+                snapshot = self._snapshot()
+                if snapshot == self._last:
+                    self.skipped_unchanged += 1
+                    continue
+                self._last = snapshot
+                start = time.perf_counter()
+                sent = await self._send(snapshot)
+                self.messages_sent += sent
+                if self._observe is not None:
+                    self._observe(time.perf_counter() - start, sent)
+            except Exception as e:
+                log.exception("Leaderboard broadcast failed: %s", e)
+            if self.interval:
+                await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "rate_hz": 1.0 / self.interval if self.interval else None,
+            "marks": self.marks,
+            "ticks": self.ticks,
+            "skipped_unchanged": self.skipped_unchanged,
+            "messages_requested": self.messages_requested,
+            "messages_sent": self.messages_sent,
+            "messages_saved": max(0, self.messages_requested - self.messages_sent),
+        }
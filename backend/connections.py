@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from frames import dumps
+
+log = logging.getLogger(__name__)
+
+# Коды закрытия WebSocket при принудительном отключении
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Задачи «запустил и забыл»: цикл событий держит на них только слабые
+# ссылки, и незавершённую задачу без владельца может собрать GC
+_background: Set[asyncio.Task] = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    """asyncio.create_task, задача которой живёт до завершения без внешней ссылки."""
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+class Connection:
+    """Клиент с ограниченной очередью исходящих сообщений и своей задачей-писателем.
+
+    Отправка из обработчиков и рассылки только кладёт кадр в очередь.
+    Кадры рейтинга заменяют ещё не отправленный предыдущий рейтинг,
+    поэтому отстающий клиент получает только свежий снимок.
+    """
+
+    def __init__(self, ws: WebSocket, manager: "ConnectionManager"):
+        self.ws = ws
+        self.manager = manager
+        self.closed = False
+        self._queue: deque = deque()
+        self._pending_board: Optional[list] = None
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        # Компактный протокол: номера вопросов, которые клиент уже получил,
+        # и версия топа, которая у него есть (см. protocol.py)
+        self.compact = False
+        self.known_questions: Set[int] = set()
+        self.board_seq: Optional[int] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run())
+
+    def send(self, payload: Any, kind: str = "message") -> bool:
+        """Ставит кадр в очередь, не дожидаясь отправки.
+
+        payload — готовый JSON-текст (см. frames.dumps), dict, который
+        будет закодирован писателем, или функция payload(conn), которая
+        строит кадр в момент отправки (None — отправлять нечего).
+        """
+        if self.closed:
+            return False
+        if kind == "leaderboard":
+            if self._pending_board is not None:
+                self._pending_board[1] = payload
+                self.manager.stale_dropped += 1
+                return True
+            item = [kind, payload]
+            self._pending_board = item
+        else:
+            item = [kind, payload]
+        self._queue.append(item)
+        if len(self._queue) > self.manager.max_backlog:
+            self.evict("backlog")
+            return False
+        self._wakeup.set()
+        return True
+
+    async def _run(self):
+        while not self.closed:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            item = self._queue.popleft()
+            if item is self._pending_board:
+                self._pending_board = None
+            payload = item[1]
+            try:
+                if callable(payload):
+                    payload = payload(self)
+                    if payload is None:
+                        continue
+                elif not isinstance(payload, str):
+                    payload = dumps(payload)
+            except Exception as e:
+                # Ошибка сборки одного сообщения не должна останавливать писателя
+                log.exception("Failed to build %s message: %s", item[0], e)
+                continue
+            try:
+                await asyncio.wait_for(
+                    self.ws.send_text(payload),
+                    timeout=self.manager.send_timeout
+                )
+                self.manager.sent += 1
+            except asyncio.TimeoutError:
+                self.evict("timeout")
+            except Exception:
+                self.manager.send_failures += 1
+                self.evict("error")
+
+    def evict(self, reason: str):
+        """Отключает клиента, который не успевает принимать сообщения."""
+        if self.closed:
+            return
+        self.manager.evictions[reason] = self.manager.evictions.get(reason, 0) + 1
+        log.warning("Evicting client (%s), backlog %d", reason, len(self._queue))
+        self.close()
+        spawn(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(
+                self.ws.close(code=CLOSE_TRY_AGAIN_LATER),
+                timeout=self.manager.send_timeout
+            )
+        except Exception:
+            pass
+
+    def close(self):
+        """Останавливает писателя и убирает клиента из рассылки."""
+        self.closed = True
+        self._queue.clear()
+        self._pending_board = None
+        self.manager.discard(self)
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self._wakeup.set()
+
+
+class ConnectionManager:
+    """Набор активных клиентов и неблокирующая рассылка по их очередям."""
+
+    def __init__(self, max_backlog: int = 64, send_timeout: float = 5.0):
+        self.max_backlog = max_backlog
+        self.send_timeout = send_timeout
+        self.connections: Set[Connection] = set()
+        self.evictions: Dict[str, int] = {}
+        self.stale_dropped = 0
+        self.send_failures = 0
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def add(self, ws: WebSocket) -> Connection:
+        conn = Connection(ws, self)
+        self.connections.add(conn)
+        conn.start()
+        return conn
+
+    def discard(self, conn: Connection):
+        self.connections.discard(conn)
+
+    def broadcast(self, payload: Any, kind: str = "message") -> int:
+        """Кладёт кадр в очередь каждого клиента, возвращает число адресатов.
+
+        Кадр стоит кодировать заранее, чтобы все получили один и тот же текст.
+        """
+        queued = 0
+        for conn in list(self.connections):
+            if conn.send(payload, kind):
+                queued += 1
+        return queued
+
+    def stats(self) -> dict:
+        depths = [conn.depth for conn in self.connections]
+        return {
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "max_backlog": self.max_backlog,
+            "send_timeout": self.send_timeout,
+            "sent": self.sent,
+            "stale_dropped": self.stale_dropped,
+            "send_failures": self.send_failures,
+            "evictions": dict(self.evictions),
+        }
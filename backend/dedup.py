@@ -0,0 +1,313 @@
+"""Поиск дубликатов вопросов между банками и сборка объединённого банка.
+
+Точные дубликаты находятся по хешу нормализованного текста: регистр,
+пунктуация, пробелы и префиксы «A) » не учитываются, варианты ответа
+сортируются, поэтому перестановка вариантов дубликат не скрывает.
+Почти-дубликаты (опечатки, слегка другая формулировка) ищутся MinHash
+по символьным шинглам с одной перестановкой (one permutation hashing)
+и LSH по полосам; кандидаты проверяются точным коэффициентом Жаккара.
+
+Запуск ``python dedup.py [--report dedup.json]`` печатает сводку по
+найденным банкам.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+import zlib
+from operator import eq
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from snapshot import QuestionStore
+
+CHOICE_PREFIX = re.compile(r"^\s*[A-Za-z]\)\s*")
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Шинглы из 3 символов: опечатка портит только 3 шингла, а не 5
+SHINGLE = 3
+# 64 корзины MinHash = 16 полос по 4 строки: пары с Жаккаром от ~0.5
+# почти наверняка становятся кандидатами
+BINS = 64
+# Кандидат отбрасывается без точного подсчёта, если оценка Жаккара по
+# подписи ниже порога на столько (4 стандартных отклонения при 64 корзинах)
+ESTIMATE_MARGIN = 0.2
+BANDS = 16
+ROWS = BINS // BANDS
+EMPTY = 1 << 32
+# Для каждой пустой корзины — свой фиксированный порядок, в котором ищется
+# заполненная: соседние пустые корзины берут значения из разных мест
+PROBES = [random.Random(slot).sample(range(BINS), BINS) for slot in range(BINS)]
+
+Source = Tuple[str, int]
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(PUNCTUATION.sub(" ", text).split())
+
+
+def normalize_choice(choice: str) -> str:
+    return normalize_text(CHOICE_PREFIX.sub("", choice, count=1))
+
+
+def normalize_question(question: dict) -> Tuple[str, List[str]]:
+    """Нормализованный текст вопроса и варианты (в исходном порядке)."""
+    return normalize_text(question["question"]), [normalize_choice(c) for c in question["choices"]]
+
+
+def correct_choice(question: dict, choices: Optional[List[str]] = None) -> str:
+    """Текст правильного варианта: буква ответа меняется при перестановке вариантов."""
+    if choices is None:
+        choices = normalize_question(question)[1]
+    index = ord(question["answer"][:1] or "?") - ord("A")
+    if 0 <= index < len(choices):
+        return choices[index]
+    return question["answer"]
+
+
+def _key(text: str, choices: List[str], answer: str) -> str:
+    data = text + "\x1f" + "\x1e".join(sorted(choices)) + "\x1d" + answer
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def question_key(question: dict) -> str:
+    """Ключ точного дубликата; его начало служит стабильным ID вопроса.
+
+    Текст правильного варианта входит в ключ: один вопрос с разными
+    ответами в разных банках — два вопроса с разными ID.
+    """
+    text, choices = normalize_question(question)
+    return _key(text, choices, correct_choice(question, choices))
+
+
+def shingles(text: str) -> set:
+    """Хеши шинглов по байтам UTF-8 (для кириллицы шингл короче в символах)."""
+    data = f" {text} ".encode("utf-8")
+    if len(data) <= SHINGLE:
+        return {zlib.crc32(data)}
+    crc32 = zlib.crc32
+    return {crc32(data[i:i + SHINGLE]) for i in range(len(data) - SHINGLE + 1)}
+
+
+def minhash(hashes: Iterable[int]) -> List[int]:
+    """Подпись one permutation hashing: минимум в каждой из BINS корзин хеша.
+
+    Один проход по шинглам вместо BINS хеш-функций; пустые корзины
+    заполняются значением из заполненной, выбранной по PROBES
+    (densification), чтобы подписи коротких текстов оставались сравнимыми.
+    """
+    signature = [EMPTY] * BINS
+    for value in hashes:
+        mixed = (value * 0x9E3779B1) & 0xFFFFFFFF
+        slot = mixed % BINS
+        rest = mixed // BINS
+        if rest < signature[slot]:
+            signature[slot] = rest
+    if EMPTY in signature and any(value != EMPTY for value in signature):
+        filled = list(signature)
+        for slot in range(BINS):
+            if filled[slot] == EMPTY:
+                for source in PROBES[slot]:
+                    if filled[source] != EMPTY:
+                        signature[slot] = filled[source]
+                        break
+    return signature
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # Представитель группы — самый ранний вопрос
+            if b < a:
+                a, b = b, a
+            self.parent[b] = a
+
+
+class DedupResult:
+    """Итог дедупликации: объединённый банк, ID вопросов и отчёт о дубликатах."""
+
+    def __init__(self, store: QuestionStore, ids: List[str], sources: List[List[Source]],
+                 clusters: List[dict], conflicts: List[dict], total: int, elapsed: float):
+        self.store = store
+        self.ids = ids
+        self.sources = sources
+        self.clusters = clusters
+        self.conflicts = conflicts
+        self.total = total
+        self.elapsed = elapsed
+
+    def report(self) -> dict:
+        return {
+            "questions": self.total,
+            "unique": len(self.store),
+            "exact_duplicates": sum(len(c["members"]) - 1 for c in self.clusters if c["kind"] == "exact"),
+            "near_duplicates": sum(len(c["members"]) - 1 for c in self.clusters if c["kind"] == "near"),
+            "conflicts": self.conflicts,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "clusters": self.clusters,
+        }
+
+
+def deduplicate(
+    banks: Iterable[Tuple[str, Sequence[dict]]],
+    threshold: float = 0.8,
+    choice_threshold: float = 0.5,
+) -> DedupResult:
+    """Сливает банки в один без повторов.
+
+    Почти-дубликатами считаются вопросы с Жаккаром шинглов текста не ниже
+    threshold и вариантов — не ниже choice_threshold. Если у таких вопросов
+    разные правильные ответы («какой из…» и «какой НЕ из…»), они не
+    сливаются и попадают в conflicts.
+    """
+    start = time.perf_counter()
+    questions: List[dict] = []
+    sources: List[Source] = []
+    for name, bank in banks:
+        for i in range(len(bank)):
+            questions.append(bank[i])
+            sources.append((name, i))
+
+    # 1. Точные дубликаты: один проход по хешам. Ответ входит в ключ,
+    # поэтому копии с другим ответом остаются отдельными вопросами
+    first_by_key: Dict[str, int] = {}
+    first_by_content: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    keys: List[str] = []
+    contents: List[Tuple[str, Tuple[str, ...]]] = []
+    sets = DisjointSet(len(questions))
+    kinds: Dict[int, str] = {}
+    conflicts = []
+    normalized = [normalize_question(q) for q in questions]
+    answers = [correct_choice(q, normalized[i][1]) for i, q in enumerate(questions)]
+    for i, question in enumerate(questions):
+        text, choices = normalized[i]
+        key = _key(text, choices, answers[i])
+        keys.append(key)
+        content = (text, tuple(sorted(choices)))
+        contents.append(content)
+        first = first_by_key.setdefault(key, i)
+        if first != i:
+            sets.union(first, i)
+            kinds.setdefault(first, "exact")
+            continue
+        seen = first_by_content.setdefault(content, i)
+        if seen != i:
+            conflicts.append({"kind": "exact", "a": sources[seen], "b": sources[i],
+                              "question": question["question"]})
+
+    # 2. Почти-дубликаты среди оставшихся уникальных текстов
+    unique = sorted(first_by_key.values())
+    text_shingles: Dict[int, set] = {}
+    choice_shingles: Dict[int, set] = {}
+    signatures: Dict[int, List[int]] = {}
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    for i in unique:
+        text_shingles[i] = shingles(normalized[i][0])
+        signature = signatures[i] = minhash(text_shingles[i])
+        for band in range(BANDS):
+            key = (band, tuple(signature[band * ROWS:(band + 1) * ROWS]))
+            buckets.setdefault(key, []).append(i)
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                a, b = members[x], members[y]
+                if (a, b) in checked or sets.find(a) == sets.find(b):
+                    continue
+                checked.add((a, b))
+                # Дешёвые фильтры до точного Жаккара: размеры множеств и совпадение подписей
+                sa, sb = len(text_shingles[a]), len(text_shingles[b])
+                if min(sa, sb) < threshold * max(sa, sb):
+                    continue
+                if sum(map(eq, signatures[a], signatures[b])) < (threshold - ESTIMATE_MARGIN) * BINS:
+                    continue
+                if jaccard(text_shingles[a], text_shingles[b]) < threshold:
+                    continue
+                for i in (a, b):
+                    if i not in choice_shingles:
+                        choice_shingles[i] = shingles(" ".join(sorted(normalized[i][1])))
+                if jaccard(choice_shingles[a], choice_shingles[b]) < choice_threshold:
+                    continue
+                if answers[a] != answers[b]:
+                    # Точный конфликт уже записан на шаге 1
+                    if contents[a] != contents[b]:
+                        conflicts.append({"kind": "near", "a": sources[a], "b": sources[b],
+                                          "question": questions[a]["question"]})
+                    continue
+                sets.union(a, b)
+                kinds[sets.find(a)] = "near"
+
+    # 3. Объединённый банк: представитель каждой группы в исходном порядке
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(questions)):
+        groups.setdefault(sets.find(i), []).append(i)
+    merged, ids, merged_sources, clusters = [], [], [], []
+    for root in sorted(groups):
+        members = groups[root]
+        qid = keys[root][:12]
+        merged.append(questions[root])
+        ids.append(qid)
+        merged_sources.append([sources[i] for i in members])
+        if len(members) > 1:
+            clusters.append({
+                "id": qid,
+                "kind": kinds.get(root, "exact"),
+                "question": questions[root]["question"],
+                "members": [sources[i] for i in members],
+            })
+    # У разных групп разные ключи: копии с одним ключом слиты на шаге 1
+    assert len(set(ids)) == len(ids), "duplicate question IDs in merged bank"
+    digest = hashlib.sha256("\n".join(ids).encode("ascii")).digest()
+    store = QuestionStore.from_questions(merged, digest)
+    return DedupResult(store, ids, merged_sources, clusters, conflicts, len(questions),
+                       time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None):
+    from banks import QuestionBank
+
+    parser = argparse.ArgumentParser(description="Дубликаты вопросов между банками")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--report", help="записать полный отчёт в JSON")
+    args = parser.parse_args(argv)
+
+    result = deduplicate(QuestionBank().stores(), threshold=args.threshold)
+    report = result.report()
+    print(f"{report['questions']} questions -> {report['unique']} unique "
+          f"({report['exact_duplicates']} exact, {report['near_duplicates']} near duplicates, "
+          f"{len(report['conflicts'])} conflicts) in {report['elapsed_ms']:.1f} ms")
+    for cluster in report["clusters"]:
+        if cluster["kind"] == "near":
+            members = ", ".join(f"{name}#{i}" for name, i in cluster["members"])
+            print(f"  near {cluster['id']}: {cluster['question'][:60]!r} — {members}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
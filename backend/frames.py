@@ -0,0 +1,73 @@
+import json
+from typing import Any, Callable, Dict, Hashable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> str:
+    """Кодирует кадр в JSON-текст (orjson, если установлен, иначе stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def loads(data):
+    """Разбирает входящее сообщение (str или bytes); ошибка формата — ValueError.
+
+    NaN и Infinity, которые принимает stdlib json, отвергаются, как в orjson.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data, parse_constant=_reject_constant)
+
+
+def extend(frame: str, **fields: str) -> str:
+    """Дописывает в закодированный JSON-объект поля с уже закодированными значениями."""
+    extra = ",".join(f'"{name}":{value}' for name, value in fields.items())
+    return frame[:-1] + "," + extra + "}"
+
+
+class FrameCache:
+    """Кэш уже закодированных кадров: один раз сериализуем — много раз отправляем."""
+
+    def __init__(self):
+        self._frames: Dict[Hashable, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: Hashable, build: Callable[[], Any], encoded: bool = False) -> str:
+        """Возвращает кадр по ключу; build вызывается только при промахе.
+
+        Если encoded=True, build сам возвращает готовый JSON-текст.
+        """
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            frame = build() if encoded else dumps(build())
+            self._frames[key] = frame
+        else:
+            self.hits += 1
+        return frame
+
+    def clear(self):
+        self._frames.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": JSON_BACKEND,
+            "cached_frames": len(self._frames),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,130 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+
+class Leaderboard:
+    """Индекс рейтинга: корзины по очкам + дерево Фенвика для рангов.
+
+    Обновление очков игрока стоит O(log S), где S — максимальный счёт,
+    плюс O(D) на сдвиг отсортированного списка различных счетов (D ≤ S + 1),
+    когда корзина появляется или пустеет: это memmove короткого списка
+    int, на практике не дороже подъёма по дереву. Внутри одной корзины
+    игроки упорядочены по времени достижения счёта, поэтому тот, кто
+    набрал очки раньше, стоит выше.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._scores: Dict[str, int] = {}
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._distinct: List[int] = []
+        self._tree: List[int] = [0] * (max(1, capacity) + 1)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._scores
+
+    def _grow(self, score: int):
+        size = len(self._tree) - 1
+        while size <= score:
+            size *= 2
+        counts = [0] * (size + 1)
+        for value, bucket in self._buckets.items():
+            counts[value + 1] = len(bucket)
+        # Линейное построение дерева Фенвика
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                counts[parent] += counts[i]
+        self._tree = counts
+
+    def _add(self, score: int, delta: int):
+        i = score + 1
+        size = len(self._tree) - 1
+        while i <= size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, score: int) -> int:
+        i = min(score + 1, len(self._tree) - 1)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _detach(self, name: str, score: int):
+        bucket = self._buckets[score]
+        del bucket[name]
+        if not bucket:
+            del self._buckets[score]
+            del self._distinct[bisect_left(self._distinct, score)]
+        self._add(score, -1)
+
+    def set(self, name: str, score: int):
+        """Устанавливает счёт игрока (добавляет, если его ещё нет)."""
+        if score < 0:
+            raise ValueError("score must be non-negative")
+        old = self._scores.get(name)
+        if old == score:
+            return
+        if old is not None:
+            self._detach(name, old)
+        if score >= len(self._tree) - 1:
+            self._grow(score)
+        bucket = self._buckets.get(score)
+        if bucket is None:
+            bucket = self._buckets[score] = {}
+            insort(self._distinct, score)
+        bucket[name] = None
+        self._scores[name] = score
+        self._add(score, 1)
+
+    def remove(self, name: str):
+        score = self._scores.pop(name, None)
+        if score is not None:
+            self._detach(name, score)
+
+    def pop_lowest(self) -> Optional[Tuple[str, int]]:
+        """Удаляет игрока с наименьшим счётом (последнего достигшего его)."""
+        if not self._distinct:
+            return None
+        score = self._distinct[0]
+        name = next(reversed(self._buckets[score]))
+        self.remove(name)
+        return name, score
+
+    def score(self, name: str) -> Optional[int]:
+        return self._scores.get(name)
+
+    def rank(self, name: str) -> Optional[int]:
+        """Место игрока (1 — лучший); при равенстве очков места совпадают."""
+        score = self._scores.get(name)
+        if score is None:
+            return None
+        return len(self._scores) - self._count_at_most(score) + 1
+
+    def range(self, start: int, stop: int) -> List[Tuple[str, int]]:
+        """Игроки на позициях [start, stop) в порядке убывания очков."""
+        start = max(start, 0)
+        stop = min(stop, len(self._scores))
+        result: List[Tuple[str, int]] = []
+        if start >= stop:
+            return result
+        position = 0
+        for score in reversed(self._distinct):
+            bucket = self._buckets[score]
+            if position + len(bucket) <= start:
+                position += len(bucket)
+                continue
+            for name in bucket:
+                if position >= start:
+                    result.append((name, score))
+                    if len(result) == stop - start:
+                        return result
+                position += 1
+        return result
+
+    def top(self, k: int = 10) -> List[Tuple[str, int]]:
+        return self.range(0, k)
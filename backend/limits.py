@@ -0,0 +1,101 @@
+import time
+from typing import Dict, Optional, Tuple
+
+# Ключ общего лимита соединения: проверяется до разбора JSON
+ANY = "*"
+
+Limit = Tuple[float, float]
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше burst про запас."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        return True
+
+
+class RateLimiter:
+    """Лимиты входящих сообщений одного соединения: общий и по действиям.
+
+    Ведро заводится при первом сообщении с этим действием; действия без
+    лимита пропускаются. dropped_in_row — сколько сообщений подряд
+    отброшено (drop() без handled() между ними): по нему можно отключить
+    клиента, который не сбавляет темп.
+
+    Об отказах клиенту сообщают не чаще раза за окно пополнения общего
+    ведра (1 / скорость): notice_delay() и noticed().
+    """
+
+    __slots__ = ("limits", "buckets", "dropped", "dropped_in_row", "notice_interval", "notice_at")
+
+    def __init__(self, limits: Dict[str, Limit]):
+        self.limits = limits
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.dropped = 0
+        self.dropped_in_row = 0
+        limit = limits.get(ANY)
+        if limit is None and limits:
+            limit = min(limits.values())
+        self.notice_interval = 1.0 / limit[0] if limit is not None else 1.0
+        self.notice_at = 0.0
+
+    def allow(self, action: str, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        bucket = self.buckets.get(action)
+        if bucket is None:
+            limit = self.limits.get(action)
+            if limit is None:
+                return True
+            bucket = self.buckets[action] = TokenBucket(limit[0], limit[1], now)
+        return bucket.take(now)
+
+    def drop(self) -> int:
+        self.dropped += 1
+        self.dropped_in_row += 1
+        return self.dropped_in_row
+
+    def handled(self):
+        self.dropped_in_row = 0
+
+    def notice_delay(self, now: float) -> float:
+        """Через сколько секунд можно сообщить об отказе (0 — уже можно)."""
+        return max(0.0, self.notice_at - now)
+
+    def noticed(self, now: float):
+        self.notice_at = now + self.notice_interval
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """Разбирает RATE_LIMITS вида "get_question=10/20,*=30/60" (в секунду / запас).
+
+    Без запаса он равен скорости; нулевая или ошибочная скорость — без лимита.
+    """
+    limits = {}
+    for item in spec.split(","):
+        action, sep, value = item.partition("=")
+        if not sep or not action.strip():
+            continue
+        rate, _, burst = value.partition("/")
+        try:
+            rate_value = float(rate)
+            burst_value = float(burst) if burst.strip() else rate_value
+        except ValueError:
+            continue
+        if rate_value > 0:
+            limits[action.strip()] = (rate_value, max(1.0, burst_value))
+    return limits
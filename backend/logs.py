@@ -0,0 +1,194 @@
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from frames import dumps
+
+# Поля LogRecord, которые не считаются пользовательскими (extra=...)
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON: время, уровень, логгер, событие, текст и поля extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return dumps(entry)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только каждую N-ю запись частых событий (поле event).
+
+    rates — доля сохраняемых записей для события: 0.1 значит каждую десятую.
+    К сохранённой записи добавляется sample_weight, чтобы по логам можно
+    было восстановить реальное число событий.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {event: max(1, round(1 / rate)) for event, rate in rates.items() if rate > 0}
+        self.muted = {event for event, rate in rates.items() if rate <= 0}
+        self.seen: Dict[str, int] = {}
+        self.dropped = 0
+
+    def keep(self, event: str) -> int:
+        """Вес записи события (сколько событий она представляет); 0 — отбросить."""
+        every = self.every.get(event)
+        if every is None:
+            if event in self.muted:
+                self.dropped += 1
+                return 0
+            return 1
+        count = self.seen.get(event, 0)
+        self.seen[event] = count + 1
+        if count % every:
+            self.dropped += 1
+            return 0
+        return every
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        # Записи из EventLog уже прошли выборку
+        if event is None or hasattr(record, "sample_weight"):
+            return True
+        weight = self.keep(event)
+        if weight > 1:
+            record.sample_weight = weight
+        return weight > 0
+
+
+class EventLog:
+    """Запись частых событий горячего пути: выборка делается до создания LogRecord,
+    поэтому отброшенное событие стоит один счётчик.
+    """
+
+    __slots__ = ("logger", "sampler")
+
+    def __init__(self, logger: logging.Logger, sampler: SamplingFilter):
+        self.logger = logger
+        self.sampler = sampler
+
+    def __call__(self, level: int, event: str, msg: str, *args, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        weight = self.sampler.keep(event)
+        if not weight:
+            return
+        fields["event"] = event
+        fields["sample_weight"] = weight
+        self.logger.log(level, msg, *args, extra=fields)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, который никогда не ждёт: при полной очереди запись теряется.
+
+    prepare() не форматирует запись в потоке цикла событий — это делает
+    поток-писатель.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.overflowed = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.overflowed += 1
+
+
+class LogPipeline:
+    """Асинхронный вывод логов: обработчики кладут записи в очередь,
+    отдельный поток форматирует их и пишет в stream.
+    """
+
+    def __init__(
+        self,
+        level: str = "INFO",
+        fmt: str = "json",
+        sample: Optional[Dict[str, float]] = None,
+        max_queue: int = 10000,
+        stream=None,
+    ):
+        self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(self.level, int):
+            self.level = logging.INFO
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.sampler = SamplingFilter(sample or {})
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(self.sampler)
+        writer = logging.StreamHandler(stream or sys.stdout)
+        if fmt == "json":
+            writer.setFormatter(JsonFormatter())
+        else:
+            writer.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        self.listener = QueueListener(self.queue, writer)
+        self.started_at: Optional[float] = None
+
+    def events(self, logger: logging.Logger) -> EventLog:
+        return EventLog(logger, self.sampler)
+
+    def install(self, logger: Optional[logging.Logger] = None):
+        """Подключает очередь к логгеру (по умолчанию — корневому) и запускает писателя."""
+        logger = logger or logging.getLogger()
+        logger.setLevel(self.level)
+        # Не собираем то, что не выводим (см. раздел Optimization в Logging HOWTO):
+        # поиск вызывающего кадра, имена потока и процесса
+        logging._srcfile = None
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        for handler in list(logger.handlers):
+            if isinstance(handler, NonBlockingQueueHandler):
+                logger.removeHandler(handler)
+        logger.addHandler(self.handler)
+        self.start()
+
+    def start(self):
+        if self.started_at is None:
+            self.listener.start()
+            self.started_at = time.time()
+
+    def stop(self):
+        """Дописывает накопленные записи и останавливает поток-писатель."""
+        if self.started_at is not None:
+            self.listener.stop()
+            self.started_at = None
+
+    def stats(self) -> dict:
+        return {
+            "level": logging.getLevelName(self.level),
+            "queued": self.queue.qsize(),
+            "sampled_out": self.sampler.dropped,
+            "overflowed": self.handler.overflowed,
+            "sample_every": dict(self.sampler.every),
+        }
+
+
+def parse_sample(spec: str) -> Dict[str, float]:
+    """Разбирает LOG_SAMPLE вида "get_question=0.05,answer=0.1"."""
+    rates = {}
+    for item in spec.split(","):
+        event, sep, rate = item.partition("=")
+        if sep and event.strip():
+            try:
+                rates[event.strip()] = float(rate)
+            except ValueError:
+                pass
+    return rates
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Границы корзин по умолчанию: от 50 мкс до 2.5 с
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Монотонный счётчик, опционально с метками: inc() стоит одно сложение."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {} if labels else {(): 0}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for labels, value in self._values.items():
+            yield self.name + "_total", _labels(self.label_names, labels), value
+
+
+class Gauge:
+    """Значение, которое считается в момент опроса функцией fn.
+
+    fn возвращает число или, для метрики с метками, словарь
+    {кортеж значений меток: число}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.fn = fn
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, item in value.items():
+                yield self.name, _labels(self.label_names, labels), item
+        else:
+            yield self.name, "", value
+
+
+class CounterFunc(Gauge):
+    """Счётчик, который уже ведёт какой-то объект (например, send_failures):
+    значение берётся в момент опроса, горячий путь не трогается.
+    """
+
+    kind = "counter"
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for name, labels, value in super().samples():
+            yield name + "_total", labels, value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: observe() — bisect и три сложения."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labels: Sequence[str] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        self._children: Dict[Tuple, _HistogramChild] = {}
+        if not labels:
+            self._default = self.labels()
+
+    def labels(self, *values) -> _HistogramChild:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = _HistogramChild(self.bounds)
+        return child
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+                cumulative += count
+                yield (
+                    self.name + "_bucket",
+                    _labels(self.label_names, values, f'le="{_number(bound)}"'),
+                    cumulative,
+                )
+            yield self.name + "_sum", _labels(self.label_names, values), child.sum
+            yield self.name + "_count", _labels(self.label_names, values), child.count
+
+
+class Registry:
+    """Набор метрик процесса и их вывод в текстовом формате Prometheus."""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics: List = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, help, labels))
+
+    def counter_func(self, name: str, help: str, fn: Callable, labels: Sequence[str] = ()) -> CounterFunc:
+        return self._add(CounterFunc(self.prefix + name, help, fn, labels))
+
+    def gauge(self, name: str, help: str, fn: Callable, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(self.prefix + name, help, fn, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labels: Sequence[str] = (),
+    ) -> Histogram:
+        return self._add(Histogram(self.prefix + name, help, buckets, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class LoopLagMonitor:
+    """Измеряет задержку цикла событий: насколько позже заказанного просыпается sleep()."""
+
+    def __init__(self, histogram: Histogram, interval: float = 0.25):
+        self.histogram = histogram
+        self.interval = interval
+        self.last = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, time.perf_counter() - start - self.interval)
+            self.histogram.observe(self.last)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
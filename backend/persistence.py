@@ -0,0 +1,213 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    name TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    best INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    room TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS scores_updated ON scores (updated);
+CREATE INDEX IF NOT EXISTS scores_best ON scores (best);
+CREATE TABLE IF NOT EXISTS score_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO scores (name, score, best, updated, room) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    score = excluded.score,
+    best = max(scores.best, excluded.best),
+    updated = excluded.updated,
+    room = excluded.room
+"""
+
+_STOP = object()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    # Базы, созданные до появления комнат: пустая комната — комната по умолчанию
+    columns = {row[1] for row in db.execute("PRAGMA table_info(scores)")}
+    if "room" not in columns:
+        try:
+            db.execute("ALTER TABLE scores ADD COLUMN room TEXT NOT NULL DEFAULT ''")
+        except sqlite3.OperationalError:
+            # Колонку уже добавил соседний воркер
+            pass
+    return db
+
+
+class ScoreStore:
+    """Журнал изменений счёта в SQLite (WAL) с отложенной пакетной записью.
+
+    record() только кладёт событие в очередь; фоновый поток собирает
+    события в пакет — до batch_size штук или batch_ms миллисекунд —
+    и фиксирует его одной транзакцией, так что цикл событий не ждёт диска.
+    Тот же поток раз в prune_interval секунд удаляет из score_events
+    события старше retention секунд (0 — хранить всё); таблица scores
+    с последним счётом и рекордом не чистится.
+    """
+
+    def __init__(self, path: str, batch_ms: float = 50.0, batch_size: int = 500,
+                 retention: float = 7 * 86400.0, prune_interval: float = 3600.0):
+        self.path = path
+        self.batch_interval = batch_ms / 1000.0
+        self.batch_size = batch_size
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.pruned = 0
+        self.last_prune_ms = 0.0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def load(self, since: float = 0.0) -> List[Tuple[str, int, int, float, str]]:
+        """Счета, обновлённые после since, в порядке обновления: (имя, счёт, рекорд, время, комната)."""
+        db = connect(self.path)
+        try:
+            return db.execute(
+                "SELECT name, score, best, updated, room FROM scores WHERE updated > ? ORDER BY updated",
+                (since,)
+            ).fetchall()
+        finally:
+            db.close()
+
+    def load_best(self, limit: int) -> List[Tuple[str, int]]:
+        db = connect(self.path)
+        try:
+            return db.execute(
+                "SELECT name, best FROM scores ORDER BY best DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        finally:
+            db.close()
+
+    def record(self, name: str, score: int, room: str = ""):
+        """Ставит изменение счёта в очередь на запись (не блокирует)."""
+        self.queued += 1
+        self._queue.put((time.time(), name, score, room))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Дописывает очередь и останавливает поток записи."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        db = connect(self.path)
+        stopping = False
+        next_prune = time.monotonic()
+        try:
+            while not stopping:
+                if self.retention > 0 and time.monotonic() >= next_prune:
+                    self._prune(db)
+                    next_prune = time.monotonic() + self.prune_interval
+                try:
+                    item = self._queue.get(timeout=self.prune_interval)
+                except queue.Empty:
+                    continue
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.batch_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._write(db, batch)
+        finally:
+            db.close()
+
+    def _write(self, db: sqlite3.Connection, batch: list):
+        start = time.perf_counter()
+        try:
+            with db:
+                db.executemany(
+                    "INSERT INTO score_events (ts, name, score) VALUES (?, ?, ?)",
+                    [(ts, name, score) for ts, name, score, _ in batch]
+                )
+                db.executemany(UPSERT, [(name, score, score, ts, room) for ts, name, score, room in batch])
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = str(e)
+            log.error("Failed to persist %d score events: %s", len(batch), e)
+            return
+        self.written += len(batch)
+        self.batches += 1
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+    def _prune(self, db: sqlite3.Connection):
+        """Удаляет устаревшие события; id растёт вместе с ts, поэтому индекс по ts не нужен."""
+        start = time.perf_counter()
+        cutoff = time.time() - self.retention
+        try:
+            with db:
+                deleted = db.execute(
+                    "DELETE FROM score_events WHERE id < coalesce("
+                    "(SELECT id FROM score_events WHERE ts >= ? ORDER BY id LIMIT 1),"
+                    "(SELECT max(id) + 1 FROM score_events))",
+                    (cutoff,)
+                ).rowcount
+            if deleted:
+                # Освободившиеся страницы переиспользуются, WAL не растёт
+                db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = str(e)
+            log.error("Failed to prune score events: %s", e)
+            return
+        self.pruned += deleted
+        self.last_prune_ms = (time.perf_counter() - start) * 1000
+        if deleted:
+            log.info("Pruned %d score events older than %.0f s in %.1f ms",
+                     deleted, self.retention, self.last_prune_ms)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "queued": self.queued,
+            "written": self.written,
+            "backlog": self.queued - self.written,
+            "batches": self.batches,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "retention": self.retention,
+            "pruned": self.pruned,
+            "last_prune_ms": round(self.last_prune_ms, 3),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
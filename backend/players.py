@@ -0,0 +1,108 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional
+
+from leaderboard import Leaderboard
+from session import Session
+
+
+class PlayerStore:
+    """Реестр игроков в памяти с вытеснением завершённых и отключившихся сессий.
+
+    Сессия, которая не активна (игра закончилась или соединение закрыто)
+    дольше ttl секунд, удаляется при очередной чистке. Лучший результат
+    игрока сохраняется в таблице рекордов ограниченного размера:
+    при переполнении выбывает самый слабый рекорд.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        best_capacity: int = 1000,
+        on_evict: Optional[Callable[[Session], None]] = None,
+    ):
+        self.ttl = ttl
+        self.best_capacity = best_capacity
+        self.on_evict = on_evict
+        self.best = Leaderboard()
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, name) -> bool:
+        return name in self._sessions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sessions)
+
+    def __getitem__(self, name: str) -> Session:
+        return self._sessions[name]
+
+    def __setitem__(self, name: str, session: Session):
+        old = self._sessions.pop(name, None)
+        if old is not None:
+            self.record_best(old)
+        self._sessions[name] = session
+
+    def get(self, name, default=None) -> Optional[Session]:
+        return self._sessions.get(name, default)
+
+    def touch(self, session: Session):
+        """Отмечает активность игрока и двигает его в конец очереди на вытеснение."""
+        session.last_seen = time.time()
+        if self._sessions.get(session.name) is session:
+            self._sessions.move_to_end(session.name)
+
+    def record_best(self, session: Session):
+        best = self.best.score(session.name)
+        if best is not None and best >= session.score:
+            return
+        self.best.set(session.name, session.score)
+        while len(self.best) > self.best_capacity:
+            self.best.pop_lowest()
+
+    def _idle(self, session: Session) -> bool:
+        return not session.game_active or session.conn is None or session.conn.closed
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Удаляет сессии, простаивающие дольше ttl; возвращает число удалённых."""
+        if now is None:
+            now = time.time()
+        cutoff = now - self.ttl
+        removed = 0
+        # Очередь упорядочена по last_seen, поэтому смотрим только просроченное начало
+        for _ in range(len(self._sessions)):
+            name, session = next(iter(self._sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            if not self._idle(session):
+                self._sessions.move_to_end(name)
+                continue
+            del self._sessions[name]
+            self.record_best(session)
+            if self.on_evict is not None:
+                self.on_evict(session)
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def approx_bytes(self) -> int:
+        """Грубая оценка памяти под записи игроков (без общих объектов вроде банков)."""
+        total = sys.getsizeof(self._sessions)
+        for name, session in self._sessions.items():
+            total += sys.getsizeof(name) + sys.getsizeof(session)
+            total += sys.getsizeof(session.pending) + sys.getsizeof(session.scheduler)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "resident": len(self._sessions),
+            "approx_bytes": self.approx_bytes(),
+            "ttl": self.ttl,
+            "evicted": self.evicted,
+            "best_scores": len(self.best),
+            "best_capacity": self.best_capacity,
+        }
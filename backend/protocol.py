@@ -0,0 +1,155 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from frames import dumps
+
+# Версии протокола: клиент просит компактный режим полем "proto" в register
+PROTO_JSON = 1
+PROTO_COMPACT = 2
+
+# Типы кадров компактного протокола: кадр — JSON-массив [тип, ...]
+ERROR = 0
+REGISTERED = 1
+GAME_STARTED = 2
+QUESTION = 3
+ANSWER_RESULT = 4
+BOARD_DELTA = 5
+BOARD_FULL = 6
+GAME_OVER = 7
+
+# "A) Thales" → "Thales": буква восстанавливается клиентом по позиции
+CHOICE_PREFIX = re.compile(r"^[A-Z]\) ")
+
+
+def parse_proto(value) -> int:
+    """Версия протокола, запрошенная клиентом; неизвестное значение — обычный JSON."""
+    try:
+        return PROTO_COMPACT if int(value) >= PROTO_COMPACT else PROTO_JSON
+    except (TypeError, ValueError, OverflowError):
+        return PROTO_JSON
+
+
+def strip_choices(choices: Sequence[str]) -> List[str]:
+    return [CHOICE_PREFIX.sub("", choice, count=1) for choice in choices]
+
+
+def question_body(qid: int, question: str, choices: Sequence[str]) -> str:
+    """Полное тело вопроса: [id, текст, варианты без префиксов]."""
+    return dumps([qid, question, strip_choices(choices)])
+
+
+def error(message: str) -> str:
+    return dumps([ERROR, message])
+
+
+def registered(info: dict) -> str:
+    return dumps([REGISTERED, info])
+
+
+def game_started() -> str:
+    return dumps([GAME_STARTED])
+
+
+def question(body: str) -> str:
+    """body — номер уже известного клиенту вопроса или полное тело (см. question_body)."""
+    return f"[{QUESTION},{body}]"
+
+
+def answer_result(correct: bool, answer: str, score: int, rank: Optional[int], time_left: float,
+                  next_bodies: Optional[List[str]] = None) -> str:
+    frame = dumps([ANSWER_RESULT, int(correct), answer, score, rank, round(time_left, 1)])
+    if next_bodies is not None:
+        frame = frame[:-1] + ",[" + ",".join(next_bodies) + "]]"
+    return frame
+
+
+def game_over(score: int, duration: float) -> str:
+    return dumps([GAME_OVER, score, duration])
+
+
+class QuestionIds:
+    """Сквозные номера вопросов: по номеру клиент берёт вопрос из своего кэша.
+
+    Ключ включает digest банка, поэтому после перезагрузки изменённого
+    банка вопросы получают новые номера.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, key: Hashable) -> int:
+        qid = self._ids.get(key)
+        if qid is None:
+            qid = self._ids[key] = len(self._ids) + 1
+        return qid
+
+
+class LeaderboardDeltas:
+    """Версии топа комнаты и разности между ними для компактных клиентов.
+
+    Каждый новый топ получает номер seq. Клиент, у которого есть топ
+    с номером base из недавней истории, получает только изменившиеся
+    позиции; остальные — полный кадр. Кадры кешируются по base, пока
+    топ не изменится.
+    """
+
+    def __init__(self, history: int = 16):
+        self.history = history
+        self.seq = 0
+        self._tops: "OrderedDict[int, Tuple[Tuple[str, int], ...]]" = OrderedDict()
+        self._frames: Dict[Optional[int], Tuple[bool, str]] = {}
+        self.deltas_sent = 0
+        self.full_sent = 0
+
+    def record(self, top: Sequence[Tuple[str, int]]) -> int:
+        """Запоминает текущий топ; seq растёт, только если он изменился."""
+        top = tuple(tuple(entry) for entry in top)
+        if self._tops and self._tops[self.seq] == top:
+            return self.seq
+        self.seq += 1
+        self._tops[self.seq] = top
+        if len(self._tops) > self.history:
+            self._tops.popitem(last=False)
+        self._frames.clear()
+        return self.seq
+
+    def frame(self, base: Optional[int]) -> Optional[str]:
+        """Кадр, переводящий клиента с версии base на текущую; None — у клиента уже текущая."""
+        if base == self.seq or not self._tops:
+            return None
+        cached = self._frames.get(base)
+        if cached is None:
+            cached = self._frames[base] = self._build(base)
+        is_delta, frame = cached
+        if is_delta:
+            self.deltas_sent += 1
+        else:
+            self.full_sent += 1
+        return frame
+
+    def _build(self, base: Optional[int]) -> Tuple[bool, str]:
+        top = self._tops[self.seq]
+        old = self._tops.get(base) if base is not None else None
+        if old is None:
+            return False, dumps([BOARD_FULL, self.seq, top])
+        changes = []
+        for i, (name, score) in enumerate(top):
+            if i < len(old) and old[i] == (name, score):
+                continue
+            # Тот же игрок на той же позиции — достаточно нового счёта
+            if i < len(old) and old[i][0] == name:
+                changes.append([i, score])
+            else:
+                changes.append([i, name, score])
+        return True, dumps([BOARD_DELTA, self.seq, base, len(top), changes])
+
+    def stats(self) -> dict:
+        return {
+            "seq": self.seq,
+            "deltas_sent": self.deltas_sent,
+            "full_sent": self.full_sent,
+        }
@@ -0,0 +1,114 @@
+"""Потоковый разбор текстовых банков вопросов.
+
+Формат банка: строка вопроса, варианты «A) …» – «E) …», затем
+«ANSWER: <буква>». Разбор идёт за один проход по строкам файла и
+отдаёт вопросы по одному, как только прочитан ответ; семантика та же,
+что у прежнего разбора через re.split по ANSWER:
+- блок — текст между соседними ANSWER: (маркер может стоять и внутри
+  строки), ответ — первая непустая строка после маркера;
+- вопрос — первая непустая строка блока, не похожая на вариант ответа
+  и не состоящая из одной буквы A–E (это хвост строки ANSWER: X);
+- блок без текста вопроса или без вариантов пропускается с предупреждением.
+"""
+import io
+import re
+from typing import Callable, Iterable, Iterator, List, Optional
+
+ANSWER_MARKER = re.compile(r"\bANSWER:")
+CHOICE = re.compile(r"[A-E]\)")
+
+
+class ParseWarning:
+    """Пропущенный блок: строки начала блока и его ANSWER:, причина и первая строка."""
+
+    __slots__ = ("line", "answer_line", "reason", "text")
+
+    def __init__(self, line: int, answer_line: Optional[int], reason: str, text: str):
+        self.line = line
+        self.answer_line = answer_line
+        self.reason = reason
+        self.text = text
+
+    def as_dict(self) -> dict:
+        return {
+            "line": self.line,
+            "answer_line": self.answer_line,
+            "reason": self.reason,
+            "text": self.text,
+        }
+
+    def __str__(self) -> str:
+        where = f"line {self.line}" if self.answer_line in (None, self.line) \
+            else f"lines {self.line}-{self.answer_line}"
+        return f"{where}: {self.reason}: {self.text!r}"
+
+
+def parse_questions(
+    lines: Iterable[str],
+    on_warning: Optional[Callable[[ParseWarning], None]] = None,
+) -> Iterator[dict]:
+    """Вопросы из строк банка (файл, открытый с newline="\\n", или любой итератор строк).
+
+    Каждый вопрос — словарь question/choices/answer и line (номер строки
+    вопроса, с 1). О пропущенных блоках сообщает on_warning.
+    """
+    # Текущий блок
+    question = ""
+    question_line = 0
+    choices: List[str] = []
+    first_line = 0
+    first_text = ""
+    # Закрытый блок, которому ещё нужен ответ из следующей непустой строки
+    pending = None
+
+    def finish(block, answer: str):
+        text, text_line, block_choices, start, first, answer_line = block
+        if text and block_choices:
+            return {"question": text, "choices": block_choices, "answer": answer, "line": text_line}
+        if on_warning is not None:
+            reason = "no choices" if text else "no question text"
+            on_warning(ParseWarning(start or answer_line, answer_line, reason, first))
+        return None
+
+    number = 0
+    for number, raw in enumerate(lines, 1):
+        if "ANSWER:" in raw:
+            pieces = ANSWER_MARKER.split(raw)
+        else:
+            pieces = (raw,)
+        for position, piece in enumerate(pieces):
+            if position:
+                # Маркер ANSWER: закрывает текущий блок
+                if pending is not None:
+                    found = finish(pending, "")
+                    if found is not None:
+                        yield found
+                pending = (question, question_line, choices, first_line, first_text, number)
+                question, question_line, choices, first_line, first_text = "", 0, [], 0, ""
+            line = piece.strip()
+            if not line:
+                continue
+            if pending is not None:
+                found = finish(pending, line.upper())
+                pending = None
+                if found is not None:
+                    yield found
+            if CHOICE.match(line):
+                choices.append(line)
+            elif len(line) == 1 and line.upper() in "ABCDE":
+                continue
+            elif not question:
+                question, question_line = line, number
+            if not first_line:
+                first_line, first_text = number, line
+    if pending is not None:
+        found = finish(pending, "")
+        if found is not None:
+            yield found
+    if (question or choices) and on_warning is not None:
+        on_warning(ParseWarning(first_line, None, "no ANSWER", first_text))
+
+
+def parse_questions_text(raw: str, on_warning: Optional[Callable[[ParseWarning], None]] = None) -> List[dict]:
+    """Парсит текст банка вопросов в список словарей question/choices/answer/line."""
+    return list(parse_questions(io.StringIO(raw, newline="\n"), on_warning))
@@ -0,0 +1,207 @@
+import re
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from broadcaster import LeaderboardBroadcaster
+from connections import Connection
+from frames import dumps
+from leaderboard import Leaderboard
+from protocol import LeaderboardDeltas
+
+ROOM_ID = re.compile(r"[\w-]{1,32}")
+
+
+class Room:
+    """Комната: свой банк, длительность игры, рейтинг и группа соединений.
+
+    Рейтинг комнаты рассылается только её участникам, поэтому цена
+    рассылки зависит от размера комнаты, а не от числа всех клиентов.
+    """
+
+    def __init__(
+        self,
+        room_id: str,
+        bank: Tuple[str, ...],
+        duration: float,
+        rate_hz: float = 4.0,
+        shared_bank: bool = False,
+        observe: Optional[Callable[[float, int], None]] = None,
+    ):
+        self.id = room_id
+        self.bank = bank
+        self.duration = duration
+        # В общей комнате каждый игрок может выбрать свой банк
+        self.shared_bank = shared_bank
+        self.leaderboard = Leaderboard()
+        self.members: Set[Connection] = set()
+        self.broadcaster = LeaderboardBroadcaster(
+            self.snapshot, self._broadcast, rate_hz=rate_hz, observe=observe
+        )
+        self.created = time.time()
+        self.emptied_at: Optional[float] = self.created
+        self._frame = (None, None)
+        self.deltas = LeaderboardDeltas()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def join(self, conn: Connection):
+        conn.board_seq = None
+        self.members.add(conn)
+        self.emptied_at = None
+
+    def leave(self, conn: Connection):
+        self.members.discard(conn)
+        if not self.members and self.emptied_at is None:
+            self.emptied_at = time.time()
+
+    def snapshot(self) -> list:
+        """Текущий топ-10 комнаты в виде списка для отправки клиентам."""
+        return [
+            {"name": name, "score": score}
+            for name, score in self.leaderboard.top(10)
+        ]
+
+    def frame(self, snapshot=None) -> str:
+        """Закодированный кадр рейтинга; для неизменного снимка кодируется один раз."""
+        if snapshot is None:
+            snapshot = self.snapshot()
+        cached_snapshot, frame = self._frame
+        if frame is None or cached_snapshot != snapshot:
+            frame = dumps({
+                "type": "leaderboard",
+                "room": self.id,
+                "players": snapshot
+            })
+            self._frame = (snapshot, frame)
+        return frame
+
+    def compact_frame(self, conn: Connection):
+        """Кадр рейтинга компактного протокола: разность от версии, которая есть у клиента.
+
+        Вызывается писателем соединения в момент отправки, поэтому
+        склеенные в очереди обновления дают одну разность.
+        """
+        frame = self.deltas.frame(conn.board_seq)
+        conn.board_seq = self.deltas.seq
+        return frame
+
+    def frame_for(self, conn: Connection, full: bool = False):
+        """Текущий рейтинг в протоколе соединения; full — без разности (ответ на запрос)."""
+        if not conn.compact:
+            return self.frame()
+        self.deltas.record(self.leaderboard.top(10))
+        if full:
+            conn.board_seq = None
+        return self.compact_frame
+
+    async def _broadcast(self, snapshot) -> int:
+        frame = self.frame(snapshot)
+        self.deltas.record([(entry["name"], entry["score"]) for entry in snapshot])
+        queued = 0
+        for conn in list(self.members):
+            if conn.send(self.compact_frame if conn.compact else frame, kind="leaderboard"):
+                queued += 1
+        return queued
+
+    def schedule_leaderboard(self):
+        """Просит фоновую задачу комнаты разослать рейтинг на ближайшем тике."""
+        self.broadcaster.mark_dirty(len(self.members))
+
+    def stats(self) -> dict:
+        return {
+            "bank": list(self.bank),
+            "duration": self.duration,
+            "members": len(self.members),
+            "players": len(self.leaderboard),
+            "broadcast": self.broadcaster.stats(),
+            "deltas": self.deltas.stats(),
+        }
+
+
+class RoomRegistry:
+    """Реестр комнат: создаёт их по первому запросу и удаляет опустевшие.
+
+    Комната без соединений живёт ещё idle_ttl секунд, чтобы игроки
+    могли переподключиться; общая комната по умолчанию не удаляется.
+    """
+
+    def __init__(
+        self,
+        default_id: str,
+        bank: Tuple[str, ...],
+        duration: float,
+        rate_hz: float = 4.0,
+        idle_ttl: float = 60.0,
+        max_rooms: int = 1000,
+        observe: Optional[Callable[[float, int], None]] = None,
+    ):
+        self.rate_hz = rate_hz
+        self.observe = observe
+        self.idle_ttl = idle_ttl
+        self.max_rooms = max_rooms
+        self.default = Room(default_id, bank, duration, rate_hz=rate_hz, shared_bank=True, observe=observe)
+        self._rooms: Dict[str, Room] = {default_id: self.default}
+        self.created = 1
+        self.collected = 0
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __iter__(self):
+        return iter(self._rooms.values())
+
+    def get(self, room_id: str) -> Optional[Room]:
+        return self._rooms.get(room_id)
+
+    def open(self, room_id: str, bank: Tuple[str, ...], duration: float) -> Room:
+        """Возвращает комнату, создавая её с заданным банком и длительностью.
+
+        Бросает ValueError для недопустимого ID и при превышении max_rooms.
+        """
+        room = self._rooms.get(room_id)
+        if room is not None:
+            return room
+        if not ROOM_ID.fullmatch(room_id):
+            raise ValueError(f"Invalid room id: {room_id!r}")
+        if len(self._rooms) >= self.max_rooms:
+            raise ValueError("Too many rooms")
+        room = Room(room_id, bank, duration, rate_hz=self.rate_hz, observe=self.observe)
+        room.broadcaster.start()
+        self._rooms[room_id] = room
+        self.created += 1
+        return room
+
+    def start(self):
+        for room in self._rooms.values():
+            room.broadcaster.start()
+
+    async def stop(self):
+        for room in self._rooms.values():
+            await room.broadcaster.stop()
+
+    async def collect(self, now: Optional[float] = None) -> int:
+        """Удаляет комнаты, пустующие дольше idle_ttl; возвращает число удалённых."""
+        if now is None:
+            now = time.time()
+        expired = [
+            room for room in self._rooms.values()
+            if room is not self.default
+            and room.emptied_at is not None
+            and now - room.emptied_at >= self.idle_ttl
+        ]
+        for room in expired:
+            del self._rooms[room.id]
+            await room.broadcaster.stop()
+        self.collected += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "created": self.created,
+            "collected": self.collected,
+            "idle_ttl": self.idle_ttl,
+            "max_rooms": self.max_rooms,
+            "by_room": {room.id: room.stats() for room in self._rooms.values()},
+        }
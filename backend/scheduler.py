@@ -0,0 +1,104 @@
+import random
+from collections import deque
+from typing import Callable, Optional
+
+_MASK64 = (1 << 64) - 1
+_ROUNDS = 4
+# Сколько раз адаптивный выбор может отложить один вопрос
+MAX_DEFERRALS = 3
+
+
+def _mix(value: int) -> int:
+    """Перемешивание splitmix64 — дешёвая псевдослучайная функция раунда."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class QuestionScheduler:
+    """Порядок вопросов без повторов: ленивая псевдослучайная перестановка индексов.
+
+    Перестановка задаётся сидом (сеть Фейстеля на 2^k элементах с отбрасыванием
+    значений >= n), поэтому на сессию хранится несколько чисел вместо
+    перемешанного списка. Когда вопросы закончились или банк поменял размер,
+    берётся новый сид. Небольшая очередь ошибок позволяет с вероятностью
+    review_rate снова показать вопрос, на который игрок ответил неверно.
+
+    Для адаптивной сложности next() может выбрать лучший из нескольких
+    следующих вопросов перестановки; остальные откладываются. Вопрос,
+    отложенный MAX_DEFERRALS раз, выдаётся без сравнения, а новый круг
+    начинается только после отложенных, так что ни один вопрос круга
+    не теряется.
+    """
+
+    __slots__ = ("n", "seed", "position", "half_bits", "missed", "review_rate", "deferred")
+
+    def __init__(self, review_rate: float = 0.0, review_size: int = 8):
+        self.n = 0
+        self.seed = 0
+        self.position = 0
+        self.half_bits = 1
+        self.missed = deque(maxlen=review_size) if review_rate > 0 else None
+        self.review_rate = review_rate
+        # (индекс, сколько раз отложен)
+        self.deferred = deque()
+
+    def reseed(self, n: int, seed: Optional[int] = None):
+        self.n = n
+        self.seed = random.getrandbits(64) if seed is None else seed & _MASK64
+        self.position = 0
+        bits = max(2, (n - 1).bit_length())
+        self.half_bits = (bits + 1) // 2
+
+    def _permute(self, value: int) -> int:
+        half = self.half_bits
+        mask = (1 << half) - 1
+        while True:
+            left, right = value >> half, value & mask
+            for round_key in range(_ROUNDS):
+                left, right = right, left ^ (_mix(self.seed ^ (round_key << 56) ^ right) & mask)
+            value = (left << half) | right
+            if value < self.n:
+                return value
+
+    def _draw(self, n: int) -> int:
+        if self.position >= self.n:
+            self.reseed(n)
+        value = self._permute(self.position)
+        self.position += 1
+        return value
+
+    def next(self, n: int, rank: Optional[Callable[[int], float]] = None, candidates: int = 1) -> int:
+        """Следующий индекс в [0, n); после полного круга порядок перемешивается заново.
+
+        С rank выбирается индекс с наименьшим rank(index) среди candidates
+        ближайших (включая отложенные раньше).
+        """
+        if n <= 0:
+            raise ValueError("no questions to schedule")
+        if n != self.n:
+            self.reseed(n)
+            self.deferred.clear()
+            if self.missed is not None:
+                self.missed.clear()
+        if self.missed and random.random() < self.review_rate:
+            return self.missed.popleft()
+        if rank is None or candidates <= 1:
+            return self.deferred.popleft()[0] if self.deferred else self._draw(n)
+        pool = list(self.deferred)
+        self.deferred.clear()
+        best = next((entry for entry in pool if entry[1] >= MAX_DEFERRALS), None)
+        if best is None:
+            # Следующий круг не начинается, пока не выданы отложенные
+            while len(pool) < candidates and (self.position < self.n or not pool):
+                pool.append((self._draw(n), 0))
+            best = min(pool, key=lambda entry: rank(entry[0]))
+        pool.remove(best)
+        self.deferred.extend((index, deferrals + 1) for index, deferrals in pool)
+        return best[0]
+
+    def record(self, index: int, correct: bool):
+        """Запоминает вопрос с неверным ответом для повторения."""
+        if not correct and self.missed is not None and index not in self.missed:
+            self.missed.append(index)
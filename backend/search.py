@@ -0,0 +1,181 @@
+import heapq
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from snapshot import QuestionStore
+
+# \w в Python учитывает Unicode: латиница, кириллица, казахские ә, ғ, қ, ң, ө, ұ, ү, һ, і
+WORD = re.compile(r"\w+")
+
+# Вес слова из текста вопроса относительно слова из вариантов ответа
+QUESTION_WEIGHT = 2.0
+CHOICE_WEIGHT = 1.0
+# BM25
+K1 = 1.2
+B = 0.75
+# Термин, найденный только по префиксу, весит меньше точного совпадения
+PREFIX_BOOST = 0.6
+MIN_PREFIX = 2
+MAX_EXPANSIONS = 64
+# Сколько слов запроса держать уже слитыми с их префиксными раскрытиями
+MERGE_CACHE = 4096
+
+
+def normalize(text: str) -> str:
+    """NFKC (неразрывные пробелы, совместимые формы букв) и casefold."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return WORD.findall(normalize(text))
+
+
+class SearchIndex:
+    """Обратный индекс по тексту вопросов и вариантов ответа всех банков.
+
+    Строится один раз при загрузке: для каждого слова — словарь
+    {номер документа: вес BM25 без idf}. Словарь слов отсортирован,
+    поэтому префикс запроса раскрывается двоичным поиском. Документы
+    должны содержать все слова запроса (каждое — точно или как префикс).
+    """
+
+    def __init__(self):
+        # (банк, индекс, текст вопроса, варианты): результаты собираются без декодирования
+        self.docs: List[Tuple[str, int, str, List[str]]] = []
+        self.names: frozenset = frozenset()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._idf: Dict[str, float] = {}
+        self._vocabulary: List[str] = []
+        self.build_ms = 0.0
+        self.queries = 0
+        self._matches = lru_cache(maxsize=MERGE_CACHE)(self._merge)
+
+    @classmethod
+    def build(cls, banks: Iterable[Tuple[str, QuestionStore]]) -> "SearchIndex":
+        index = cls()
+        start = time.perf_counter()
+        names = []
+        lengths = []
+        frequencies: List[Counter] = []
+        for name, store in banks:
+            names.append(name)
+            for i in range(len(store)):
+                question, choices = store.question(i), store.choices(i)
+                tf: Counter = Counter()
+                for token in tokenize(question):
+                    tf[token] += QUESTION_WEIGHT
+                for choice in choices:
+                    for token in tokenize(choice):
+                        tf[token] += CHOICE_WEIGHT
+                index.docs.append((name, i, question, choices))
+                frequencies.append(tf)
+                lengths.append(sum(tf.values()))
+        average = sum(lengths) / len(lengths) if lengths else 1.0
+        postings: Dict[str, Dict[int, float]] = {}
+        for doc, tf in enumerate(frequencies):
+            norm = K1 * (1 - B + B * lengths[doc] / average)
+            for token, weight in tf.items():
+                postings.setdefault(token, {})[doc] = weight * (K1 + 1) / (weight + norm)
+        total = len(index.docs)
+        index._postings = postings
+        index._idf = {
+            token: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in postings.items()
+        }
+        index._vocabulary = sorted(postings)
+        index.names = frozenset(names)
+        index.build_ms = (time.perf_counter() - start) * 1000
+        return index
+
+    def _expand(self, token: str) -> Iterable[Tuple[str, float]]:
+        """Слова словаря, подходящие под слово запроса, с множителем веса."""
+        if token in self._postings:
+            yield token, 1.0
+        if len(token) < MIN_PREFIX:
+            return
+        position = bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[position:position + MAX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                yield term, PREFIX_BOOST
+
+    def _merge(self, token: str) -> Dict[int, float]:
+        """Документы, где есть слово token или слово с этим префиксом, с весом лучшего из них.
+
+        Результат кешируется: частые короткие префиксы («th», «of») раскрываются
+        в десятки слов, и повторять это слияние на каждый запрос дорого.
+        Словарь не изменяется после построения.
+        """
+        merged: Dict[int, float] = {}
+        for term, boost in self._expand(token):
+            idf = self._idf[term] * boost
+            if not merged:
+                merged = {doc: weight * idf for doc, weight in self._postings[term].items()}
+                continue
+            for doc, weight in self._postings[term].items():
+                score = weight * idf
+                if score > merged.get(doc, 0.0):
+                    merged[doc] = score
+        return merged
+
+    def search(self, query: str, limit: int = 10, banks: Optional[Iterable[str]] = None) -> List[dict]:
+        """Лучшие limit вопросов по запросу: bank, index, score, question, choices."""
+        self.queries += 1
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        matches = sorted((self._matches(token) for token in tokens), key=len)
+        scores = matches[0]
+        # Пересечение от самого редкого слова; перебирается меньший из словарей
+        for matched in matches[1:]:
+            if not scores:
+                break
+            if len(matched) < len(scores):
+                scores = {doc: score + scores[doc] for doc, score in matched.items() if doc in scores}
+            else:
+                scores = {doc: score + matched[doc] for doc, score in scores.items() if doc in matched}
+        if not scores:
+            return []
+        if banks is not None:
+            allowed = set(banks)
+            scores = {doc: score for doc, score in scores.items() if self.docs[doc][0] in allowed}
+        results = []
+        for doc, score in heapq.nlargest(limit, scores.items(), key=itemgetter(1)):
+            name, i, question, choices = self.docs[doc]
+            results.append({
+                "bank": name,
+                "index": i,
+                "score": round(score, 3),
+                "question": question,
+                "choices": choices,
+            })
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self.docs),
+            "terms": len(self._vocabulary),
+            "postings": sum(len(docs) for docs in self._postings.values()),
+            "build_ms": round(self.build_ms, 3),
+            "queries": self.queries,
+        }
+
+
+def linear_search(banks: Iterable[Tuple[str, QuestionStore]], query: str, limit: int = 10) -> List[dict]:
+    """Поиск перебором (как grep по файлам банков): для сравнения в бенчмарке."""
+    needles = tokenize(query)
+    results = []
+    for name, store in banks:
+        for i in range(len(store)):
+            text = normalize(" ".join([store.question(i), *store.choices(i)]))
+            if all(needle in text for needle in needles):
+                results.append({"bank": name, "index": i})
+    return results[:limit]
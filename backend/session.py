@@ -0,0 +1,80 @@
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from scheduler import QuestionScheduler
+
+
+class Session:
+    """Состояние игрока: счёт, часы игры, выбранные банки и выданный вопрос.
+
+    Хранится в __slots__, чтобы тысячи сессий не тянули по словарю каждая.
+    Правильный ответ клиенту не отправляется — сервер помнит, какие
+    вопросы выдал, и проверяет ответ сам. С prefetch > 0 клиент держит
+    prefetch вопросов про запас, и ответы относятся к самому старому
+    из выданных.
+    """
+
+    __slots__ = (
+        "name", "score", "start_time", "game_active", "bank",
+        "pending", "prefetch", "scheduler", "conn", "timer", "last_seen",
+        "room", "answered", "answered_at"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        bank: Tuple[str, ...],
+        review_rate: float = 0.0,
+        prefetch: int = 0,
+    ):
+        self.name = name
+        self.score = 0
+        self.start_time = time.time()
+        self.game_active = True
+        self.bank = bank
+        # Выданные, но ещё не отвеченные вопросы:
+        # (имя банка, банк, индекс в банке, индекс в наборе, время выдачи)
+        self.pending: deque = deque()
+        self.prefetch = prefetch
+        self.scheduler = QuestionScheduler(review_rate=review_rate)
+        # Соединение для серверных событий (game_over) и таймер конца игры
+        self.conn = None
+        self.timer = None
+        self.last_seen = self.start_time
+        # Комната, в рейтинге которой участвует игрок
+        self.room = None
+        # Сколько вопросов отвечено и когда последний (для времени ответа)
+        self.answered = 0
+        self.answered_at = time.monotonic()
+
+    def serve(self, bank_name: str, store, index: int, pick: int):
+        if not self.prefetch:
+            self.pending.clear()
+        elif len(self.pending) > self.prefetch:
+            self.pending.popleft()
+        self.pending.append((bank_name, store, index, pick, time.monotonic()))
+
+    def missing(self) -> int:
+        """Сколько вопросов нужно выдать, чтобы у клиента был текущий и prefetch в запасе."""
+        return max(0, self.prefetch + 1 - len(self.pending))
+
+    def check_answer(self, answer: str) -> Optional[Tuple[bool, str, tuple, float]]:
+        """Сверяет ответ с выданным вопросом; None, если вопроса нет.
+
+        Возвращает (верно ли, правильный ответ, (банк, хранилище, индекс),
+        секунды на ответ). Время считается с момента, когда вопрос стал
+        текущим: выдачи или, при prefetch, ответа на предыдущий.
+        Вопрос считается отвеченным, повторный ответ на него не засчитывается.
+        """
+        if not self.pending:
+            return None
+        bank_name, store, index, pick, served_at = self.pending.popleft()
+        correct = store.answer(index).upper()
+        is_correct = answer.strip().upper() == correct
+        self.scheduler.record(pick, is_correct)
+        now = time.monotonic()
+        seconds = now - max(served_at, self.answered_at)
+        self.answered += 1
+        self.answered_at = now
+        return is_correct, correct, (bank_name, store, index), seconds
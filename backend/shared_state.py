@@ -0,0 +1,405 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import pathlib
+import socket
+import struct
+import tempfile
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Колбэк из цикла событий: (имя, счёт) или (имя, None) при удалении игрока
+UpdateCallback = Callable[[str, Optional[int]], None]
+
+
+class LocalBackend:
+    """Один процесс: всё состояние и так в памяти воркера."""
+
+    name = "local"
+    # Ограничение на длину ключа игрока в байтах UTF-8 (None — без ограничения)
+    max_key_bytes = None
+
+    def start(self, on_update: UpdateCallback):
+        pass
+
+    def publish(self, player: str, score: Optional[int]):
+        pass
+
+    def snapshot(self) -> Iterator[Tuple[str, int]]:
+        return iter(())
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class SharedScores:
+    """Счета всех воркеров в файле, отображённом в память (/dev/shm — это tmpfs).
+
+    Файл состоит из заголовка, кольца последних изменений и таблицы
+    счетов с открытой адресацией. Запись идёт под эксклюзивным flock,
+    чтение — под разделяемым. Кольцо позволяет воркеру дочитать
+    пропущенные изменения; если он отстал больше чем на длину кольца,
+    он перечитывает таблицу целиком.
+
+    Удалённый игрок оставляет в таблице надгробие: его слот занимает
+    следующий новый ключ, а когда занятых слотов с надгробиями больше
+    COMPACT_LOAD, таблица перекладывается заново. Живых записей не больше
+    MAX_LOAD слотов; сверх этого новый игрок в таблицу не попадает (set()
+    возвращает False), но изменение всё равно уходит соседям через кольцо.
+    """
+
+    # номер последнего изменения, длина кольца, слотов, живых записей, надгробий
+    HEADER = struct.Struct("<QIIII")
+    COUNTS = struct.Struct("<II")
+    COUNTS_OFFSET = 16
+    HEADER_SIZE = 64
+    # хеш имени или номер события, счёт (-1 — игрок удалён), pid автора, длина имени
+    RECORD = struct.Struct("<QiIH")
+    # 256 байт: ключ «комната\x1fимя» из кириллицы на 64 + 32 символа влезает
+    RECORD_SIZE = 256
+    NAME_BYTES = RECORD_SIZE - RECORD.size
+    TOMBSTONE = (1 << 64) - 1
+    MAX_LOAD = 0.5
+    COMPACT_LOAD = 0.75
+
+    def __init__(self, path: pathlib.Path, slots: int, ring: int):
+        self.path = path
+        self._fd = fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            # Первый воркер размечает файл, остальные берут размеры из заголовка
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, self.HEADER_SIZE + (ring + slots) * self.RECORD_SIZE)
+                os.pwrite(fd, self.HEADER.pack(0, ring, slots, 0, 0), 0)
+            _, self.ring, self.slots, _, _ = self.HEADER.unpack(os.pread(fd, self.HEADER.size, 0))
+            self._map = mmap.mmap(fd, self.HEADER_SIZE + (self.ring + self.slots) * self.RECORD_SIZE)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._table = self.HEADER_SIZE + self.ring * self.RECORD_SIZE
+        self._pid = os.getpid()
+        self.rejected = 0
+        self.compactions = 0
+
+    @classmethod
+    def _hash(cls, player: str) -> int:
+        digest = hashlib.blake2b(player.encode("utf-8"), digest_size=8).digest()
+        key = int.from_bytes(digest, "little")
+        # 0 — пустой слот, TOMBSTONE — надгробие
+        return key if 0 < key < cls.TOMBSTONE else 1
+
+    @property
+    def seq(self) -> int:
+        return self.HEADER.unpack_from(self._map, 0)[0]
+
+    def _find(self, key: int) -> Tuple[Optional[int], Optional[int]]:
+        """(слот с этим ключом или None, первый слот, куда его можно вставить)."""
+        start = key % self.slots
+        free = None
+        for step in range(self.slots):
+            offset = self._table + (start + step) % self.slots * self.RECORD_SIZE
+            stored = self.RECORD.unpack_from(self._map, offset)[0]
+            if stored == key:
+                return offset, None
+            if stored == 0:
+                return None, offset if free is None else free
+            if stored == self.TOMBSTONE and free is None:
+                free = offset
+        return None, free
+
+    def _write(self, offset: int, key: int, score: int, name: bytes):
+        self.RECORD.pack_into(self._map, offset, key, score, self._pid, len(name))
+        start = offset + self.RECORD.size
+        self._map[start:start + len(name)] = name
+
+    def _read(self, offset: int) -> Tuple[int, Optional[int], int, str]:
+        key, score, pid, length = self.RECORD.unpack_from(self._map, offset)
+        start = offset + self.RECORD.size
+        name = self._map[start:start + length].decode("utf-8", "replace")
+        return key, (None if score < 0 else score), pid, name
+
+    def _store(self, key: int, value: int, name: bytes) -> bool:
+        """Пишет запись в таблицу; вызывается под эксклюзивным flock."""
+        used, tombstones = self.COUNTS.unpack_from(self._map, self.COUNTS_OFFSET)
+        found, free = self._find(key)
+        if value < 0:
+            if found is None:
+                return True
+            self._write(found, self.TOMBSTONE, -1, b"")
+            used -= 1
+            tombstones += 1
+        elif found is not None:
+            self._write(found, key, value, name)
+            return True
+        else:
+            if free is None or used >= self.slots * self.MAX_LOAD:
+                self.rejected += 1
+                return False
+            if self.RECORD.unpack_from(self._map, free)[0] == self.TOMBSTONE:
+                tombstones -= 1
+            self._write(free, key, value, name)
+            used += 1
+        self.COUNTS.pack_into(self._map, self.COUNTS_OFFSET, used, tombstones)
+        if used + tombstones > self.slots * self.COMPACT_LOAD:
+            self._compact()
+        return True
+
+    def _compact(self):
+        """Перекладывает живые записи в чистую таблицу, избавляясь от надгробий."""
+        size = self.RECORD_SIZE
+        end = self._table + self.slots * size
+        table = self._map[self._table:end]
+        # Ключ — первые 8 байт каждой записи
+        keys = memoryview(table).cast("Q")[::size // 8]
+        live = [
+            table[index * size:(index + 1) * size]
+            for index, key in enumerate(keys) if key and key != self.TOMBSTONE
+        ]
+        keys.release()
+        self._map[self._table:end] = bytes(self.slots * size)
+        for record in live:
+            _, free = self._find(self.RECORD.unpack_from(record)[0])
+            self._map[free:free + size] = record
+        self.COUNTS.pack_into(self._map, self.COUNTS_OFFSET, len(live), 0)
+        self.compactions += 1
+
+    def set(self, player: str, score: Optional[int]) -> bool:
+        """Записывает счёт (None — удаление); False, если таблица переполнена."""
+        key = self._hash(player)
+        name = player.encode("utf-8")
+        if len(name) > self.NAME_BYTES:
+            # Обрезанный ключ у соседей превратился бы в другое имя или комнату
+            raise ValueError(f"shared key is longer than {self.NAME_BYTES} bytes")
+        value = -1 if score is None else score
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            stored = self._store(key, value, name)
+            seq = self.seq + 1
+            self._write(self.HEADER_SIZE + seq % self.ring * self.RECORD_SIZE, seq, value, name)
+            struct.pack_into("<Q", self._map, 0, seq)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return stored
+
+    def changes(self, cursor: int) -> Tuple[int, Optional[list]]:
+        """Изменения других воркеров после cursor: (новый курсор, [(имя, счёт)]).
+
+        Вместо списка возвращает None, если кольцо уже перезаписано.
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            seq = self.seq
+            if seq - cursor > self.ring:
+                return seq, None
+            result = []
+            for number in range(cursor + 1, seq + 1):
+                _, score, pid, name = self._read(self.HEADER_SIZE + number % self.ring * self.RECORD_SIZE)
+                if pid != self._pid:
+                    result.append((name, score))
+            return seq, result
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def items(self) -> Tuple[int, list]:
+        """Все игроки таблицы со счетами и номер последнего изменения."""
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            result = []
+            for index in range(self.slots):
+                key, score, _, name = self._read(self._table + index * self.RECORD_SIZE)
+                if key and key != self.TOMBSTONE:
+                    result.append((name, score))
+            return self.seq, result
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        used, tombstones = self.COUNTS.unpack_from(self._map, self.COUNTS_OFFSET)
+        return {
+            "slots": self.slots,
+            "used": used,
+            "tombstones": tombstones,
+            "rejected": self.rejected,
+            "compactions": self.compactions,
+        }
+
+    def close(self, unlink: bool = False):
+        self._map.close()
+        os.close(self._fd)
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class SharedMemoryBackend:
+    """Счета в разделяемой памяти + пробуждение соседей через Unix-сокеты.
+
+    Каждый воркер слушает свой датаграммный сокет в общем каталоге. После
+    записи в SharedScores он шлёт соседям пустую датаграмму; получив её,
+    сосед дочитывает кольцо изменений. Полная очередь сокета значит, что
+    сосед и так проснётся, так что потерянная датаграмма не теряет данных.
+    """
+
+    name = "shm"
+    max_key_bytes = SharedScores.NAME_BYTES
+
+    def __init__(self, namespace: str = "sprint-quiz", slots: int = 65536, ring: int = 8192):
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        self.directory = pathlib.Path(base) / namespace
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.scores = SharedScores(self.directory / "scores", slots, ring)
+        self.address = str(self.directory / f"worker-{os.getpid()}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._peers: list = []
+        self._peers_checked = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cursor = 0
+        self.published = 0
+        self.wakeups = 0
+        self.applied = 0
+        self.resyncs = 0
+        self.dropped_peers = 0
+        # Игроки, чьи счета пришли от соседей: после перечитывания таблицы
+        # отсутствующие в ней удаляются
+        self._remote: set = set()
+
+    def snapshot(self) -> Iterator[Tuple[str, int]]:
+        seq, items = self.scores.items()
+        if self._sock is None:
+            # До start() дальнейшие изменения дочитываются от этого снимка
+            self._cursor = seq
+        return ((name, score) for name, score in items if score is not None)
+
+    def start(self, on_update: UpdateCallback):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._sock.bind(self.address)
+        self._sock.setblocking(False)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._receive, on_update)
+        # Изменения, сделанные между snapshot() и привязкой сокета
+        self._catch_up(on_update)
+
+    def _receive(self, on_update: UpdateCallback):
+        while True:
+            try:
+                self._sock.recv(16)
+            except BlockingIOError:
+                break
+            self.wakeups += 1
+        self._catch_up(on_update)
+
+    def _catch_up(self, on_update: UpdateCallback):
+        self._cursor, changes = self.scores.changes(self._cursor)
+        if changes is None:
+            self.resyncs += 1
+            self._cursor, changes = self.scores.items()
+            present = {name for name, _ in changes}
+            changes.extend((name, None) for name in self._remote - present)
+        for name, score in changes:
+            self.applied += 1
+            if score is None:
+                self._remote.discard(name)
+            else:
+                self._remote.add(name)
+            on_update(name, score)
+
+    def _peer_addresses(self) -> list:
+        now = time.monotonic()
+        if now - self._peers_checked > 1.0:
+            self._peers = [
+                str(path) for path in self.directory.glob("worker-*.sock")
+                if str(path) != self.address
+            ]
+            self._peers_checked = now
+        return self._peers
+
+    def publish(self, player: str, score: Optional[int]):
+        if not self.scores.set(player, score) and self.scores.rejected == 1:
+            log.warning("Shared score table is full (%d slots): new players reach peers "
+                        "only through the change ring", self.scores.slots)
+        self.published += 1
+        if self._sock is None:
+            return
+        for peer in list(self._peer_addresses()):
+            try:
+                self._sock.sendto(b"\0", peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Воркер умер, не убрав за собой сокет
+                self.dropped_peers += 1
+                self._peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                # Очередь соседа полна — он и так проснётся и дочитает кольцо
+                pass
+
+    def stop(self):
+        if self._sock is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        # Последний воркер убирает таблицу, чтобы новый запуск не поднял старые счета
+        last = not any(self.directory.glob("worker-*.sock"))
+        self.scores.close(unlink=last)
+        if last:
+            try:
+                self.directory.rmdir()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "pid": os.getpid(),
+            "peers": len(self._peers),
+            "seq": self.scores.seq,
+            "cursor": self._cursor,
+            "published": self.published,
+            "wakeups": self.wakeups,
+            "applied": self.applied,
+            "resyncs": self.resyncs,
+            "dropped_peers": self.dropped_peers,
+            "table": self.scores.stats(),
+        }
+
+
+class RedisBackend:
+    """Заготовка: те же операции поверх Redis (HSET для таблицы, XADD/XREAD вместо кольца)."""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        raise NotImplementedError("Redis state backend is not implemented yet; use STATE_BACKEND=shm")
+
+
+def create_backend(kind: str, namespace: str = "sprint-quiz", slots: int = 65536, url: str = ""):
+    """Бэкенд общего состояния по имени: local, shm или redis.
+
+    Каждый воркер держит свой индекс рейтинга и рассылает топ своим
+    клиентам; бэкенд лишь доставляет ему чужие изменения счёта.
+    """
+    if kind == "local":
+        return LocalBackend()
+    if kind == "shm":
+        return SharedMemoryBackend(namespace, slots)
+    if kind == "redis":
+        return RedisBackend(url)
+    raise ValueError(f"Unknown state backend: {kind}")
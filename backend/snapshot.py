@@ -0,0 +1,226 @@
+"""Компилятор банков вопросов в бинарные снимки.
+
+Снимок хранит все строки банка одним UTF-8 блоком плюс массивы смещений,
+поэтому при старте его достаточно прочитать, без разбора текста.
+Запуск ``python snapshot.py [файлы...]`` заранее компилирует банки
+(без аргументов — все найденные midterm*/endterm*/final*).
+"""
+import hashlib
+import logging
+import os
+import pathlib
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Iterable, List, Optional
+
+from questions import ParseWarning, parse_questions
+
+log = logging.getLogger(__name__)
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent
+BANK_DIRS = (BACKEND_DIR, BACKEND_DIR.parent)
+BANK_PATTERNS = ("midterm*.txt", "endterm*.txt", "final*.txt")
+CACHE_DIR = pathlib.Path(os.environ.get("QUESTION_CACHE_DIR", BACKEND_DIR / ".qcache"))
+
+MAGIC = b"SQZB"
+VERSION = 1
+# magic, version, source size, source mtime_ns, sha256 источника,
+# число вопросов, число строк, размер блока строк
+HEADER = struct.Struct("<4sHxxQq32sIII")
+
+
+def _offsets_array(values: Iterable[int] = ()) -> array:
+    return array("I", values)
+
+
+class QuestionStore(Sequence):
+    """Банк вопросов на массивах: строки в одном bytes, вопросы — срезы по смещениям.
+
+    Элемент ``store[i]`` собирается в dict question/choices/answer при обращении,
+    так что в памяти не висят тысячи мелких словарей и списков.
+    """
+
+    def __init__(self, blob: bytes, offsets: array, starts: array, digest: bytes = b""):
+        self._blob = blob
+        self._offsets = offsets
+        self._starts = starts
+        self.digest = digest
+
+    @classmethod
+    def from_questions(cls, questions: List[dict], digest: bytes = b"") -> "QuestionStore":
+        parts = []
+        offsets = _offsets_array([0])
+        starts = _offsets_array([0])
+        position = 0
+        for q in questions:
+            for text in (q["question"], q["answer"], *q["choices"]):
+                data = text.encode("utf-8")
+                parts.append(data)
+                position += len(data)
+                offsets.append(position)
+            starts.append(len(offsets) - 1)
+        return cls(b"".join(parts), offsets, starts, digest)
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+    def _string(self, index: int) -> str:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def question(self, i: int) -> str:
+        return self._string(self._starts[i])
+
+    def answer(self, i: int) -> str:
+        return self._string(self._starts[i] + 1)
+
+    def choices(self, i: int) -> List[str]:
+        return [self._string(j) for j in range(self._starts[i] + 2, self._starts[i + 1])]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("question index out of range")
+        return {
+            "question": self.question(i),
+            "choices": self.choices(i),
+            "answer": self.answer(i)
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self._blob)
+            + len(self._offsets) * self._offsets.itemsize
+            + len(self._starts) * self._starts.itemsize
+        )
+
+    def to_bytes(self, size: int, mtime_ns: int) -> bytes:
+        offsets, starts = self._offsets, self._starts
+        if sys.byteorder == "big":
+            offsets, starts = array(offsets.typecode, offsets), array(starts.typecode, starts)
+            offsets.byteswap()
+            starts.byteswap()
+        header = HEADER.pack(
+            MAGIC, VERSION, size, mtime_ns, self.digest,
+            len(self), len(offsets) - 1, len(self._blob)
+        )
+        return header + starts.tobytes() + offsets.tobytes() + self._blob
+
+
+def _read_header(data: bytes) -> Optional[tuple]:
+    if len(data) < HEADER.size:
+        return None
+    fields = HEADER.unpack_from(data)
+    if fields[0] != MAGIC or fields[1] != VERSION:
+        return None
+    return fields
+
+
+def store_from_bytes(data: bytes) -> Optional[QuestionStore]:
+    """Восстанавливает банк из снимка; None, если формат не подходит."""
+    fields = _read_header(data)
+    if fields is None:
+        return None
+    _, _, _, _, digest, count, nstrings, blob_size = fields
+    starts = _offsets_array()
+    offsets = _offsets_array()
+    position = HEADER.size
+    starts_size = (count + 1) * starts.itemsize
+    offsets_size = (nstrings + 1) * offsets.itemsize
+    if len(data) != position + starts_size + offsets_size + blob_size:
+        return None
+    starts.frombytes(data[position:position + starts_size])
+    position += starts_size
+    offsets.frombytes(data[position:position + offsets_size])
+    position += offsets_size
+    if sys.byteorder == "big":
+        starts.byteswap()
+        offsets.byteswap()
+    return QuestionStore(data[position:], offsets, starts, digest)
+
+
+def snapshot_path(source: pathlib.Path) -> pathlib.Path:
+    return CACHE_DIR / f"{source.name}.qbc"
+
+
+def compile_bank(
+    source: pathlib.Path,
+    on_warning: Optional[Callable[[ParseWarning], None]] = None,
+) -> QuestionStore:
+    """Парсит текстовый банк и сохраняет снимок рядом с остальными в CACHE_DIR.
+
+    Файл читается один раз: строки идут одновременно в sha256 и в разбор.
+    Пропущенные блоки логируются и передаются в on_warning.
+    """
+    def warn(warning: ParseWarning):
+        log.warning("%s:%s", source.name, warning)
+        if on_warning is not None:
+            on_warning(warning)
+
+    sha = hashlib.sha256()
+
+    def lines(f):
+        for line in f:
+            sha.update(line)
+            yield line.decode("utf-8")
+
+    with source.open("rb") as f:
+        st = os.fstat(f.fileno())
+        questions = list(parse_questions(lines(f), warn))
+    store = QuestionStore.from_questions(questions, sha.digest())
+    target = snapshot_path(source)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        tmp.write_bytes(store.to_bytes(st.st_size, st.st_mtime_ns))
+        os.replace(tmp, target)
+    except OSError as e:
+        log.warning("Could not write snapshot %s: %s", target, e)
+    return store
+
+
+def load_bank(source: pathlib.Path) -> QuestionStore:
+    """Загружает банк из снимка, если он свежий, иначе перекомпилирует.
+
+    Сначала сверяются размер и mtime; если mtime поменялся, а размер нет,
+    сверяется sha256 содержимого.
+    """
+    target = snapshot_path(source)
+    try:
+        data = target.read_bytes()
+    except OSError:
+        data = b""
+    fields = _read_header(data)
+    if fields is not None:
+        st = source.stat()
+        size, mtime_ns, digest = fields[2], fields[3], fields[4]
+        fresh = size == st.st_size and mtime_ns == st.st_mtime_ns
+        if not fresh and size == st.st_size:
+            fresh = hashlib.sha256(source.read_bytes()).digest() == digest
+        if fresh:
+            store = store_from_bytes(data)
+            if store is not None:
+                return store
+    return compile_bank(source)
+
+
+def discover_banks() -> List[pathlib.Path]:
+    """Находит файлы банков; файл из backend/ важнее одноимённого в корне репозитория."""
+    found = {}
+    for directory in BANK_DIRS:
+        for pattern in BANK_PATTERNS:
+            for path in sorted(directory.glob(pattern)):
+                found.setdefault(path.name, path)
+    return [found[name] for name in sorted(found)]
+
+
+if __name__ == "__main__":
+    sources = [pathlib.Path(p) for p in sys.argv[1:]] or discover_banks()
+    for source in sources:
+        store = compile_bank(source)
+        print(f"INFO: Compiled {len(store)} questions from {source} -> {snapshot_path(source)}")
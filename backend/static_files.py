@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import os
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# main.3f9a1c2b.js, main.3f9a1c2b.chunk.css — имя меняется вместе с содержимым
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Предсжатые варианты в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+MEDIA_TYPES = {
+    ".js": "text/javascript",
+    ".css": "text/css",
+    ".html": "text/html",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".map": "application/json",
+}
+
+
+def accepted_encodings(headers: Headers) -> set:
+    """Кодировки из Accept-Encoding (без учёта q=0)."""
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles для собранного фронтенда.
+
+    Файлы с хешем содержимого в имени кешируются браузером навсегда,
+    остальные (index.html, manifest) — с перепроверкой по ETag.
+    Если рядом лежит file.br или file.gz и клиент их принимает,
+    отдаётся сжатый вариант без сжатия на лету. ETag и 304 делает
+    FileResponse самого Starlette: ETag зависит от отдаваемого файла,
+    поэтому у сжатых вариантов он свой.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = str(full_path)
+        name = os.path.basename(path)
+        media_type = MEDIA_TYPES.get(os.path.splitext(name)[1])
+        headers = {
+            "Cache-Control": IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        accepted = accepted_encodings(request_headers)
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            headers["Content-Encoding"] = encoding
+            response = FileResponse(
+                path + suffix,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                stat_result=compressed_stat,
+                method=scope["method"],
+            )
+            break
+        else:
+            response = FileResponse(
+                path,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                stat_result=stat_result,
+                method=scope["method"],
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class CachedPage:
+    """Страница из памяти: байты, gzip/br и ETag готовятся один раз.
+
+    Используется для встроенного HTML, когда собранного фронтенда нет.
+    """
+
+    def __init__(self, html: str):
+        self.body = html.encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+        self.variants = {"gzip": gzip.compress(self.body, 9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(self.body, quality=11)
+
+    def response(self, headers: Headers) -> Response:
+        base = {"ETag": self.etag, "Cache-Control": REVALIDATE, "Vary": "Accept-Encoding"}
+        if self.etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=base)
+        accepted = accepted_encodings(headers)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                base["Content-Encoding"] = encoding
+                return Response(self.variants[encoding], media_type="text/html", headers=base)
+        return Response(self.body, media_type="text/html", headers=base)
+
+    def stats(self) -> dict:
+        return {
+            "bytes": len(self.body),
+            **{f"{encoding}_bytes": len(body) for encoding, body in self.variants.items()},
+        }
+
+
+def find_build(path: str) -> Optional[str]:
+    """Каталог сборки фронтенда, если в нём есть index.html."""
+    if path and os.path.isfile(os.path.join(path, "index.html")):
+        return path
+    return None
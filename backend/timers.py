@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """Отложенный вызов в колесе таймеров; cancel() снимает его до срабатывания."""
+
+    __slots__ = ("deadline", "callback", "args", "rounds", "slot", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.rounds = 0
+        self.slot = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Хешированное колесо таймеров: одна задача обслуживает тысячи дедлайнов.
+
+    Таймер попадает в ячейку (дедлайн / tick) mod slots и срабатывает,
+    когда стрелка проходит эту ячейку нужное число оборотов спустя.
+    Точность — один tick; запаздывание тиков относительно расписания
+    собирается в stats().
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 512):
+        self.tick = tick
+        self.slots: List[Dict[TimerHandle, None]] = [{} for _ in range(slots)]
+        self._origin = time.monotonic()
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self._lag_total = 0.0
+        self._lag_samples = 0
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args) -> TimerHandle:
+        """Вызывает callback(*args) примерно через delay секунд (синхронно, в цикле событий)."""
+        deadline = time.monotonic() + max(0.0, delay)
+        handle = TimerHandle(deadline, callback, args)
+        ticks = max(1, math.ceil((deadline - self._origin) / self.tick) - self._cursor)
+        handle.rounds, _ = divmod(ticks - 1, len(self.slots))
+        handle.slot = (self._cursor + ticks) % len(self.slots)
+        self.slots[handle.slot][handle] = None
+        self.pending += 1
+        return handle
+
+    def cancel(self, handle: Optional[TimerHandle]):
+        if handle is None or handle.cancelled:
+            return
+        handle.cancel()
+        bucket = self.slots[handle.slot]
+        if handle in bucket:
+            del bucket[handle]
+            self.pending -= 1
+            self.cancelled += 1
+
+    def _advance(self):
+        self._cursor += 1
+        bucket = self.slots[self._cursor % len(self.slots)]
+        due = []
+        for handle in bucket:
+            if handle.rounds > 0:
+                handle.rounds -= 1
+            else:
+                due.append(handle)
+        for handle in due:
+            del bucket[handle]
+            self.pending -= 1
+            if handle.cancelled:
+                continue
+            self.fired += 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                self.errors += 1
+                log.exception("Timer callback failed: %s", e)
+
+    async def run(self):
+        while True:
+            next_tick = self._origin + (self._cursor + 1) * self.tick
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            lag = max(0.0, time.monotonic() - next_tick)
+            self.lag_last = lag
+            self.lag_max = max(self.lag_max, lag)
+            self._lag_total += lag
+            self._lag_samples += 1
+            # Если цикл событий притормозил, догоняем все пропущенные тики
+            while self._origin + (self._cursor + 1) * self.tick <= time.monotonic():
+                self._advance()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "tick": self.tick,
+            "slots": len(self.slots),
+            "pending": self.pending,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "lag_last_ms": round(self.lag_last * 1000, 3),
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            "lag_avg_ms": round(self._lag_total / self._lag_samples * 1000, 3) if self._lag_samples else 0.0,
+        }
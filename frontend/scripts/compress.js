@@ -0,0 +1,36 @@
+// Готовит рядом с каждым текстовым файлом сборки .gz и .br:
+// сервер отдаёт их как есть, без сжатия на каждый запрос.
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const COMPRESSIBLE = /\.(js|css|html|json|svg|map|txt)$/;
+const MIN_SIZE = 1024;
+
+function walk(dir) {
+  return fs.readdirSync(dir, { withFileTypes: true }).flatMap((entry) => {
+    const full = path.join(dir, entry.name);
+    return entry.isDirectory() ? walk(full) : [full];
+  });
+}
+
+const root = process.argv[2] || 'build';
+let before = 0;
+let after = 0;
+for (const file of walk(root)) {
+  if (!COMPRESSIBLE.test(file)) continue;
+  const data = fs.readFileSync(file);
+  if (data.length < MIN_SIZE) continue;
+  const gz = zlib.gzipSync(data, { level: 9 });
+  const br = zlib.brotliCompressSync(data, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: 11,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    },
+  });
+  fs.writeFileSync(file + '.gz', gz);
+  fs.writeFileSync(file + '.br', br);
+  before += data.length;
+  after += br.length;
+}
+console.log(`compressed ${before} bytes -> ${after} bytes (brotli)`);
@@ -1,74 +1,124 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Trophy, Clock, Users, Play, Home } from 'lucide-react';
+import { PROTO_COMPACT, createState, decode } from './protocol';
 
 export default function SprintQuiz() {
-  const [ws, setWs] = useState(null);
   const [screen, setScreen] = useState('home'); // home, game, leaderboard
   const [playerName, setPlayerName] = useState('');
   const [currentQuestion, setCurrentQuestion] = useState(null);
   const [score, setScore] = useState(0);
-  const [timeLeft, setTimeLeft] = useState(60);
+  const [timeLeft, setTimeLeft] = useState(0);
   const [leaderboard, setLeaderboard] = useState([]);
   const [feedback, setFeedback] = useState(null);
-  const [isRegistered, setIsRegistered] = useState(false);
+  const [correctAnswer, setCorrectAnswer] = useState(null);
+  const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const timerRef = useRef(null);
+  const wsRef = useRef(null);
+  // Вопросы, присланные сервером заранее (режим prefetch)
+  const queueRef = useRef([]);
+  const hasQuestionRef = useRef(false);
 
-  // WebSocket URL - замени на свой Render backend URL после деплоя
-  const WS_URL = 'ws://localhost:8000/ws';
-  // const WS_URL = 'wss://your-backend.onrender.com/ws';
+  // Сокет на том же хосте, что и страница; REACT_APP_WS_URL — для отдельного бэкенда
+  const WS_URL = process.env.REACT_APP_WS_URL ||
+    `ws${window.location.protocol === 'https:' ? 's' : ''}://${window.location.host}/ws`;
 
   useEffect(() => {
     return () => {
-      if (ws) ws.close();
+      if (wsRef.current) wsRef.current.close();
       if (timerRef.current) clearInterval(timerRef.current);
     };
-  }, [ws]);
+  }, []);
 
   const connectWebSocket = () => {
     const socket = new WebSocket(WS_URL);
-    
+    wsRef.current = socket;
+    const protocolState = createState();
+
     socket.onopen = () => {
-      console.log('WebSocket подключен');
-      setWs(socket);
+      setConnectionStatus('connected');
+      // Комната берётся из ссылки вида /?room=group-1
+      const room = new URLSearchParams(window.location.search).get('room');
+      socket.send(JSON.stringify({
+        action: 'register',
+        name: playerName,
+        prefetch: 1,
+        proto: PROTO_COMPACT,
+        ...(room ? { room } : {})
+      }));
     };
-    
+
     socket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      
+      const data = decode(event.data, protocolState);
+
+      if (data.type === 'leaderboard_resync') {
+        socket.send(JSON.stringify({ action: 'get_leaderboard' }));
+        return;
+      }
+
       if (data.status === 'registered') {
-        setIsRegistered(true);
+        setConnectionStatus('registered');
+        socket.send(JSON.stringify({ action: 'start_game' }));
+        socket.send(JSON.stringify({ action: 'get_question' }));
+        setScreen('game');
+        setScore(0);
+        startTimer(data.duration);
       }
-      
+
       if (data.type === 'question') {
-        setCurrentQuestion(data.q);
-        setFeedback(null);
+        if (hasQuestionRef.current) {
+          queueRef.current.push(data.q);
+        } else {
+          hasQuestionRef.current = true;
+          setCurrentQuestion(data.q);
+          setFeedback(null);
+        }
       }
-      
+
       if (data.type === 'answer_result') {
         setScore(data.score);
+        setCorrectAnswer(data.correct);
         setFeedback(data.result);
-        
+        if (data.next) {
+          queueRef.current.push(...data.next);
+        }
+
         setTimeout(() => {
           setFeedback(null);
+          if (queueRef.current.length > 0) {
+            setCurrentQuestion(queueRef.current.shift());
+            return;
+          }
+          hasQuestionRef.current = false;
           socket.send(JSON.stringify({ action: 'get_question' }));
         }, 800);
       }
-      
+
       if (data.type === 'leaderboard') {
         setLeaderboard(data.players);
       }
-      
+
+      // Сервер отклонил запрос по лимиту сообщений: вопрос запрашиваем снова,
+      // а непринятый ответ можно просто дать ещё раз
+      if (data.error === 'rate_limited' && !hasQuestionRef.current) {
+        setTimeout(() => {
+          if (socket.readyState === WebSocket.OPEN && !hasQuestionRef.current) {
+            socket.send(JSON.stringify({ action: 'get_question' }));
+          }
+        }, 1000);
+      }
+
       if (data.type === 'game_over') {
         endGame(data.final_score);
       }
     };
-    
+
     socket.onerror = (error) => {
       console.error('WebSocket ошибка:', error);
+      setConnectionStatus('error');
     };
-    
+
     socket.onclose = () => {
-      console.log('WebSocket отключен');
+      setConnectionStatus('disconnected');
     };
   };
 
@@ -77,38 +127,27 @@ export default function SprintQuiz() {
       alert('Введите ваше имя!');
       return;
     }
-    
+
+    setConnectionStatus('connecting');
     connectWebSocket();
   };
 
-  const registerAndStart = () => {
-    if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify({
-        action: 'register',
-        name: playerName
-      }));
-      
-      setTimeout(() => {
-        ws.send(JSON.stringify({ action: 'start_game' }));
-        ws.send(JSON.stringify({ action: 'get_question' }));
-        setScreen('game');
-        setScore(0);
-        setTimeLeft(60);
-        startTimer();
-      }, 500);
+  // Длительность игры задаёт сервер (комната или GAME_DURATION); таймер
+  // только показывает остаток, а игру завершает game_over от сервера
+  const startTimer = (duration) => {
+    if (timerRef.current) {
+      clearInterval(timerRef.current);
     }
-  };
-
-  const startTimer = () => {
-    timerRef.current = setInterval(() => {
-      setTimeLeft((prev) => {
-        if (prev <= 1) {
-          endGame(score);
-          return 0;
-        }
-        return prev - 1;
-      });
-    }, 1000);
+    const deadline = Date.now() + duration * 1000;
+    const tick = () => {
+      const left = Math.max(0, Math.ceil((deadline - Date.now()) / 1000));
+      setTimeLeft(left);
+      if (left === 0) {
+        clearInterval(timerRef.current);
+      }
+    };
+    tick();
+    timerRef.current = setInterval(tick, 1000);
   };
 
   const endGame = (finalScore) => {
@@ -117,8 +156,8 @@ export default function SprintQuiz() {
     }
     setScore(finalScore);
     setScreen('leaderboard');
-    if (ws) {
-      ws.send(JSON.stringify({ action: 'get_leaderboard' }));
+    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ action: 'get_leaderboard' }));
     }
   };
 
@@ -127,11 +166,10 @@ export default function SprintQuiz() {
     
     const answer = choice.charAt(0);
     
-    if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify({
+    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({
         action: 'answer',
-        answer: answer,
-        correct: currentQuestion.answer
+        answer: answer
       }));
     }
   };
@@ -139,10 +177,13 @@ export default function SprintQuiz() {
   const restartGame = () => {
     setScreen('home');
     setScore(0);
-    setTimeLeft(60);
+    setTimeLeft(0);
     setCurrentQuestion(null);
     setFeedback(null);
-    if (ws) ws.close();
+    queueRef.current = [];
+    hasQuestionRef.current = false;
+    setConnectionStatus('disconnected');
+    if (wsRef.current) wsRef.current.close();
   };
 
   // HOME SCREEN
@@ -155,7 +196,7 @@ export default function SprintQuiz() {
               <Trophy className="w-12 h-12 text-white" />
             </div>
             <h1 className="text-4xl font-bold text-gray-800 mb-2">Sprint Quiz</h1>
-            <p className="text-gray-600">60 секунд. Максимум правильных ответов.</p>
+            <p className="text-gray-600">Игра на время. Максимум правильных ответов.</p>
           </div>
           
           <div className="space-y-4">
@@ -178,15 +219,13 @@ export default function SprintQuiz() {
             </button>
           </div>
           
-          {ws && !isRegistered && (
-            <div className="mt-4 text-center">
-              <button
-                onClick={registerAndStart}
-                className="text-blue-600 font-semibold hover:underline"
-              >
-                Подключиться к игре
-              </button>
-            </div>
+          {connectionStatus !== 'disconnected' && (
+            <p className="mt-4 text-center text-sm text-blue-600">
+              {connectionStatus === 'connecting' && 'Подключение...'}
+              {connectionStatus === 'connected' && 'Подключено!'}
+              {connectionStatus === 'registered' && 'Игра началась!'}
+              {connectionStatus === 'error' && 'Ошибка подключения'}
+            </p>
           )}
         </div>
       </div>
@@ -232,8 +271,8 @@ export default function SprintQuiz() {
               
               <div className="space-y-3">
                 {currentQuestion.choices.map((choice, idx) => {
-                  const isCorrect = feedback === 'correct' && choice.charAt(0) === currentQuestion.answer;
-                  const isWrong = feedback === 'wrong' && choice.charAt(0) !== currentQuestion.answer;
+                  const isCorrect = feedback === 'correct' && choice.charAt(0) === correctAnswer;
+                  const isWrong = feedback === 'wrong' && choice.charAt(0) !== correctAnswer;
                   
                   return (
                     <button
@@ -0,0 +1,91 @@
+// Компактный протокол (register с proto: 2): кадры — массивы [тип, ...],
+// вопросы после первой выдачи приходят номером, рейтинг — разностями.
+// decode() превращает такие кадры в те же объекты, что шлёт обычный JSON-режим.
+
+export const PROTO_COMPACT = 2;
+
+const ERROR = 0;
+const REGISTERED = 1;
+const GAME_STARTED = 2;
+const QUESTION = 3;
+const ANSWER_RESULT = 4;
+const BOARD_DELTA = 5;
+const BOARD_FULL = 6;
+const GAME_OVER = 7;
+
+const LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ';
+
+export function createState() {
+  return { questions: new Map(), boardSeq: null, board: [] };
+}
+
+function question(state, body) {
+  if (typeof body === 'number') {
+    return state.questions.get(body);
+  }
+  const [id, text, choices] = body;
+  const q = {
+    question: text,
+    choices: choices.map((choice, i) => `${LETTERS[i]}) ${choice}`),
+  };
+  state.questions.set(id, q);
+  return q;
+}
+
+function board(state) {
+  return {
+    type: 'leaderboard',
+    players: state.board.map(([name, score]) => ({ name, score })),
+  };
+}
+
+export function decode(text, state) {
+  const data = JSON.parse(text);
+  if (!Array.isArray(data)) {
+    return data; // сервер без компактного режима отвечает обычным JSON
+  }
+  switch (data[0]) {
+    case ERROR:
+      return { error: data[1] };
+    case REGISTERED:
+      return { status: 'registered', ...data[1] };
+    case GAME_STARTED:
+      return { status: 'game_started' };
+    case QUESTION:
+      return { type: 'question', q: question(state, data[1]) };
+    case ANSWER_RESULT: {
+      const [, correct, answer, score, rank, timeLeft, next] = data;
+      return {
+        type: 'answer_result',
+        result: correct ? 'correct' : 'wrong',
+        correct: answer,
+        score,
+        rank,
+        time_left: timeLeft,
+        ...(next ? { next: next.map((body) => question(state, body)) } : {}),
+      };
+    }
+    case BOARD_FULL:
+      state.boardSeq = data[1];
+      state.board = data[2];
+      return board(state);
+    case BOARD_DELTA: {
+      const [, seq, base, length, changes] = data;
+      if (base !== state.boardSeq) {
+        return { type: 'leaderboard_resync' };
+      }
+      const next = state.board.slice(0, length);
+      for (const change of changes) {
+        const [i, nameOrScore, score] = change;
+        next[i] = change.length === 3 ? [nameOrScore, score] : [next[i][0], nameOrScore];
+      }
+      state.boardSeq = seq;
+      state.board = next;
+      return board(state);
+    }
+    case GAME_OVER:
+      return { type: 'game_over', final_score: data[1], time: data[2] };
+    default:
+      return {};
+  }
+}
@@ -0,0 +1,12 @@
+/** Классы собираются из исходников при сборке вместо JIT из CDN в браузере. */
+module.exports = {
+  content: ['./src/**/*.{js,jsx}', './public/index.html'],
+  theme: {
+    extend: {
+      scale: {
+        102: '1.02',
+      },
+    },
+  },
+  plugins: [],
+};
@@ -1,51 +1,21 @@
-import re
 import pathlib
 import sys
 
 DATA_DIR = pathlib.Path(__file__).parent
-RAW_PATH = DATA_DIR / "midterm.txt"
-
-
-def parse_raw_questions(text):
-    blocks = re.split(r'\bANSWER:', text)
-    questions = []
-
-    for i in range(len(blocks) - 1):
-        block_lines = [line.strip() for line in blocks[i].split("\n")]
-        answer = blocks[i + 1].strip().split("\n")[0].strip().upper()
-
-        question = ""
-        choices = []
+sys.path.insert(0, str(DATA_DIR / "backend"))
 
-        for line in block_lines:
-            if not line:
-                continue  # пропустить пустые
+from questions import parse_questions  # noqa: E402
 
-            # вариант ответа?
-            if re.match(r"^[A-E]\)", line):
-                choices.append(line)
-                continue
-
-            # защитное: если строка - ОДНА буква (твоя ошибка)
-            if len(line) == 1 and line.upper() in "ABCDE":
-                continue
+RAW_PATH = DATA_DIR / "midterm.txt"
 
-            # если это нормальная строка — это вопрос
-            if question == "":
-                question = line
 
-        if question and choices:
-            questions.append({
-                "question": question,
-                "choices": choices,
-                "answer": answer
-            })
-        else:
-            print("⚠ Ошибка при парсинге блока, пропущен.")
-            print("Блок был:", block_lines)
-
-    return questions
+def parse_raw_questions(lines):
+    """Вопросы из открытого файла банка; пропущенные блоки печатаются с номером строки."""
+    def warn(warning):
+        print(f"⚠ Ошибка при парсинге блока, пропущен ({RAW_PATH.name}:{warning.line}): {warning.reason}")
+        print("Начало блока:", warning.text)
 
+    return list(parse_questions(lines, warn))
 
 
 def ask_question(q):
@@ -73,14 +43,13 @@ def main():
         print("Теперь вставьте туда свои вопросы и перезапустите.")
         return
 
-    raw_text = RAW_PATH.read_text(encoding="utf-8")
+    with RAW_PATH.open(encoding="utf-8", newline="\n") as f:
+        questions = parse_raw_questions(f)
 
-    if not raw_text.strip():
-        print("Файл raw_questions.txt пуст. Вставьте вопросы и перезапустите.")
+    if not questions:
+        print("В файле raw_questions.txt нет вопросов. Вставьте вопросы и перезапустите.")
         return
 
-    questions = parse_raw_questions(raw_text)
-
     print(f"Загружено вопросов: {len(questions)}")
     print("Начинаем тест...\n")
 
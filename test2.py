@@ -1,45 +1,21 @@
-import re
 import pathlib
+import sys
 
 DATA_DIR = pathlib.Path(__file__).parent
-RAW_PATH = DATA_DIR / "final2.txt"
-
-
-def parse_raw_questions(text):
-    blocks = re.split(r'\bANSWER:', text)
-    questions = []
-
-    for i in range(len(blocks) - 1):
-        block_lines = [line.strip() for line in blocks[i].split("\n")]
-        answer = blocks[i + 1].strip().split("\n")[0].strip().upper()
+sys.path.insert(0, str(DATA_DIR / "backend"))
 
-        question = ""
-        choices = []
+from questions import parse_questions  # noqa: E402
 
-        for line in block_lines:
-            if not line:
-                continue
-
-            # A–E)
-            if re.match(r"^[A-E]\)", line):
-                choices.append(line)
-                continue
-
-            # защитный фильтр от “D”
-            if len(line) == 1 and line.upper() in "ABCDE":
-                continue
+RAW_PATH = DATA_DIR / "final2.txt"
 
-            if question == "":
-                question = line
 
-        if question and choices:
-            questions.append({
-                "question": question,
-                "choices": choices,
-                "answer": answer
-            })
+def parse_raw_questions(lines):
+    """Вопросы из открытого файла банка; пропущенные блоки печатаются с номером строки."""
+    def warn(warning):
+        print(f"⚠ Ошибка при парсинге блока, пропущен ({RAW_PATH.name}:{warning.line}): {warning.reason}")
+        print("Начало блока:", warning.text)
 
-    return questions
+    return list(parse_questions(lines, warn))
 
 
 def ask_question(q):
@@ -74,13 +50,12 @@ def main():
         print("Файл raw_questions.txt не найден.")
         return
 
-    raw_text = RAW_PATH.read_text(encoding="utf-8")
-    if not raw_text.strip():
-        print("Файл пуст.")
+    with RAW_PATH.open(encoding="utf-8", newline="\n") as f:
+        questions = parse_raw_questions(f)
+    if not questions:
+        print("В файле нет вопросов.")
         return
 
-    questions = parse_raw_questions(raw_text)
-
     # создаём пакеты по 15
     pages = paginate(questions, page_size=15)
 